@@ -14,6 +14,7 @@
 # 404 → NotFoundError
 # 409 → ConflictError
 # 422 → ValidationError
+# 429 → TooManyRequestsError
 
 class AppError(Exception):
 #Error base de la aplicación que incluye código HTTP y mensaje.
@@ -57,4 +58,13 @@ class ConflictError(AppError):
 class BadRequestError(AppError):
     status_code = 400
     message  = "Bad request."
-# Solicitud inválida.
\ No newline at end of file
+# Solicitud inválida.
+
+class TooManyRequestsError(AppError):
+# Demasiados intentos (rate limiting de login, 2FA, recuperación de contraseña).
+    status_code = 429
+    message = "Too many requests. Try again later."
+
+    def __init__(self, message: str = None, retry_after: int = None):
+        super().__init__(message)
+        self.retry_after = retry_after
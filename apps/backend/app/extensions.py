@@ -1,15 +1,26 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
-from flask_migrate import Migrate
 from flask_mail import Mail
+from app.utils.metrics import time_bcrypt
+from app.utils.db_routing import RoutingSession
 
 
-db = SQLAlchemy()
-ma = Marshmallow()
+class TimedBcrypt(Bcrypt):
+    """Bcrypt que publica su duración en la métrica sentya_bcrypt_seconds."""
+
+    def generate_password_hash(self, password, rounds=None, prefix=None):
+        with time_bcrypt("hash"):
+            return super().generate_password_hash(password, rounds, prefix)
+
+    def check_password_hash(self, pw_hash, password):
+        with time_bcrypt("check"):
+            return super().check_password_hash(pw_hash, password)
+
+
+# RoutingSession: lecturas de las peticiones GET a la réplica si hay DATABASE_REPLICA_URL
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
-bcrypt = Bcrypt()
-migrate = Migrate()
+bcrypt = TimedBcrypt()
 mail = Mail()
 
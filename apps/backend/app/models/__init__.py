@@ -7,4 +7,6 @@ from .thematic_areas import ThematicArea
 from .sessions import Session
 from .css import Css
 from .attendance import Attendance
-from .audit_logs import AuditLog
\ No newline at end of file
+from .audit_logs import AuditLog
+from .reference_versions import ReferenceVersion
+from .report_jobs import ReportJob
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Boolean, Integer, DateTime, Text,ForeignKey
+from sqlalchemy import String, Boolean, Integer, DateTime, Text,ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List,Optional,TYPE_CHECKING
 from datetime import datetime,timezone
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 class Attendance(db.Model):
     __tablename__ = "attendances"
+    # MAX(recorded_at) = versión de los datos de los informes en segundo plano (report_jobs_service)
+    __table_args__ = (Index("ix_attendances_recorded_at", "recorded_at"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     session_id: Mapped[int] = mapped_column(Integer, ForeignKey('sessions.id'), nullable=False)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('system_users.id'), nullable=False)
@@ -36,5 +38,5 @@ class Attendance(db.Model):
             "observations": self.observations,
             "recorded_by": self.recorded_by,
             "recorded_by_name": f"{self.recorder.name} {self.recorder.last_name}" if self.recorder else None,#datos completos del usuario que registro la asistencia
-            "recorded_at": self.recorded_at.isoformat() if self.recorded_at else None
+            "recorded_at": self.recorded_at
         }   
\ No newline at end of file
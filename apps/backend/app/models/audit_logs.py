@@ -1,4 +1,4 @@
-from sqlalchemy import String, Boolean, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import String, Boolean, Integer, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional,TYPE_CHECKING
 from datetime import datetime,timezone
@@ -9,14 +9,21 @@ if TYPE_CHECKING:
 
 class AuditLog(db.Model):
     __tablename__ = "audit_logs"
-    
+    # En Postgres la tabla está particionada por mes sobre created_at (migración 85135ec61f52)
+    __table_args__ = (
+        Index("ix_audit_logs_record", "table_name", "record_id", "created_at"),
+        Index("ix_audit_logs_user", "user_id", "created_at"),
+        Index("ix_audit_logs_created_at", "created_at"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     table_name: Mapped[str] = mapped_column(String(50), nullable=False)
     record_id: Mapped[int] = mapped_column(Integer, nullable=False)
     action: Mapped[str] = mapped_column(String(20), nullable=False)
     old_data: Mapped[Optional[str]] = mapped_column(Text)
     new_data: Mapped[Optional[str]] = mapped_column(Text)
-    user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('system_users.id'))
+    # Sin FK a system_users: el historial se conserva aunque se borre el usuario (migración c2d8e5a1f734)
+    user_id: Mapped[Optional[int]] = mapped_column(Integer)
     ip_address: Mapped[Optional[str]] = mapped_column(String(45))
     user_agent: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime(),default=lambda: datetime.now(timezone.utc))#AGREGADO
@@ -26,4 +33,5 @@ class AuditLog(db.Model):
 
     
     # Relationships
-    user = relationship("SystemUser", back_populates="audit_logs")
\ No newline at end of file
+    user = relationship("SystemUser", back_populates="audit_logs", viewonly=True,
+                        primaryjoin="foreign(AuditLog.user_id) == SystemUser.id")
\ No newline at end of file
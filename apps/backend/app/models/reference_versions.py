@@ -0,0 +1,13 @@
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime,timezone
+from app.extensions import db
+
+
+class ReferenceVersion(db.Model):
+    """Contador de versión por conjunto de datos de referencia (áreas temáticas, CSS...).
+    Cada worker compara su copia en memoria con este contador para saber si debe recargarla."""
+    __tablename__ = "reference_versions"
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(), default=lambda: datetime.now(timezone.utc))
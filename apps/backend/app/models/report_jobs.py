@@ -0,0 +1,43 @@
+from sqlalchemy import String, Boolean, Integer, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+from datetime import datetime,timezone
+from app.extensions import db
+import enum
+
+
+class ReportJobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJob(db.Model):
+    """Informe pedido para generar en segundo plano (flask report-worker).
+    El fichero resultante se guarda por cache_key (informe + parámetros + formato + versión de los datos):
+    varios trabajos con la misma clave comparten el mismo fichero."""
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        Index("ix_report_jobs_status", "status", "id"),
+        Index("ix_report_jobs_cache_key", "cache_key"),
+        Index("ix_report_jobs_requested_by", "requested_by", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    report: Mapped[str] = mapped_column(String(50), nullable=False)
+    params: Mapped[str] = mapped_column(Text, nullable=False)  # JSON normalizado
+    format: Mapped[str] = mapped_column(String(10), nullable=False)
+    data_version: Mapped[str] = mapped_column(String(40), nullable=False)
+    cache_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[ReportJobStatus] = mapped_column(db.Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.PENDING)
+    cached: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    requested_by: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('system_users.id', ondelete="SET NULL"))
+    filename: Mapped[Optional[str]] = mapped_column(String(255))  # nombre de descarga, con extensión
+    size: Mapped[Optional[int]] = mapped_column(Integer)
+    rows: Mapped[Optional[int]] = mapped_column(Integer)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(), default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime())
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime())
@@ -91,6 +91,9 @@ class SystemUser(db.Model):
     css_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('css.id'), nullable=True)
     # Control de estado
     is_active: Mapped[bool] = mapped_column(Boolean(),default=True)
+    # Se incrementa al cambiar rol, estado o contraseña: los JWT con otra versión (claim "tv") ya no valen
+    # para la comprobación rápida de requires_role y pasan por la BD (app/utils/token_versions.py)
+    token_version: Mapped[int] = mapped_column(Integer(), default=1, nullable=False)
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime(),default=lambda: datetime.now(timezone.utc))#AGREGADO
     updated_at: Mapped[datetime] = mapped_column(DateTime(), default=lambda: datetime.now(timezone.utc))
@@ -104,7 +107,9 @@ class SystemUser(db.Model):
     sessions_taught = relationship("Session", foreign_keys="Session.professional_id", back_populates="professional")
     attendances = relationship("Attendance", foreign_keys="Attendance.user_id", back_populates="user")
     attendances_recorded = relationship("Attendance", foreign_keys="Attendance.recorded_by", back_populates="recorder")
-    audit_logs = relationship("AuditLog", back_populates="user")
+    # viewonly: borrar el usuario no toca audit_logs.user_id (quién hizo cada cambio)
+    audit_logs = relationship("AuditLog", back_populates="user", viewonly=True,
+                              primaryjoin="SystemUser.id == foreign(AuditLog.user_id)")
     
     def generate_2fa_secret(self):
         """Genera un secreto para 2FA DÓNDE SE ALMACENA -> En la BD local, campo two_factor_secret"""
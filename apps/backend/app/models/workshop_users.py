@@ -38,9 +38,9 @@ class WorkshopUser(db.Model):
             "workshop_name": self.workshop.name if self.workshop else None,
             "assigned_by": self.assigned_by,
             "assigned_by_name": f"{self.assigned_by_user.name} {self.assigned_by_user.last_name}" if self.assigned_by_user else None,
-            "assignment_date": self.assignment_date.isoformat() if self.assignment_date else None,
+            "assignment_date": self.assignment_date,
             "waitlist_position": self.waitlist_position,
             "in_waitlist": self.waitlist_position is not None,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": self.created_at
         }   
 
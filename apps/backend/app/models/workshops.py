@@ -72,13 +72,13 @@ class Workshop(db.Model):
             "start_time": self.start_time.strftime('%H:%M') if self.start_time else None,
             "end_time": self.end_time.strftime('%H:%M') if self.end_time else None,
             "week_days": self.week_days,
-            "start_date": self.start_date.strftime('%Y-%m-%d') if self.start_date else None,
-            "end_date": self.end_date.strftime('%Y-%m-%d') if self.end_date else None,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
             "location": self.location,
             "session_duration": self.session_duration,
-            "status": self.status.value if self.status else None,
+            "status": self.status,
             "observations": self.observations,
             "created_by": self.created_by,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
     }   
\ No newline at end of file
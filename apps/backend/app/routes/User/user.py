@@ -3,26 +3,24 @@ from app.extensions import db, jwt, bcrypt
 from werkzeug.utils import secure_filename
 import os
 from app.models.user import SystemUser, UserRole
-from uuid import uuid4
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, unset_jwt_cookies, set_access_cookies, decode_token
 from app.exceptions import ValidationError, UnauthorizedError, ForbiddenError, AppError, BadRequestError, NotFoundError, ConflictError
 from app.utils.helper import issue_tokens_for_user
+from app.utils.metrics import record_login
 from datetime import datetime, timezone, timedelta, date
 import re
 from functools import wraps
 from app.utils.decorators import requires_coordinator_or_admin
+from app.services.avatar_service import process_avatar, delete_avatar_files, AVATAR_SIZES
+from app.utils.response_cache import response_cache
 
 user_bp = Blueprint("user", __name__, url_prefix='/user')
 
 
 # Configuración
-UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), '../../uploads/avatars')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
-# Crear carpeta si no existe
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -40,10 +38,12 @@ def login():
     # Verificar si el usuario existe
     user = SystemUser.query.filter_by(email=email).first()
     if not user:
+        record_login("invalid_credentials")
         raise UnauthorizedError("Credenciales inválidas")
     
     # Verificar contraseña
     if not bcrypt.check_password_hash(user.password, password):
+        record_login("invalid_credentials")
         raise UnauthorizedError("Credenciales inválidas")
     
     # Verificar si el usuario está activo o es su primer login
@@ -52,11 +52,13 @@ def login():
             # Primer login - activar automáticamente
             user.is_active = True
         else:
+            record_login("inactive")
             raise UnauthorizedError("Usuario inactivo. Contacte al administrador.")
     
     # SOLO si pasó todas las verificaciones: Login exitoso
     user.last_login = datetime.now(timezone.utc)
     db.session.commit()
+    record_login("success")
     
     # Generar token JWT
     access_token = issue_tokens_for_user(user)
@@ -80,6 +82,7 @@ def login():
 
 @user_bp.route("/me", methods=["GET"])
 @jwt_required()
+@response_cache.cached("system_users", per_user=True)
 def get_current_user():
     current_user_id = get_jwt_identity()
     user = SystemUser.query.get(current_user_id)
@@ -464,28 +467,27 @@ def upload_avatar():
         if file_size > MAX_FILE_SIZE:
             return jsonify({"error": "El archivo es demasiado grande (máx. 5MB)"}), 400
         
-        # Generar nombre único
-        file_extension = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid4()}.{file_extension}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+        # Procesar imagen: miniaturas WebP sin metadatos guardadas por hash de contenido
+        digest = process_avatar(file.read())
+        public_filename = f"{digest}.webp"
         
-        # Eliminar avatar anterior si existe
+        # Eliminar avatar anterior si existe (y ningún otro usuario comparte la misma imagen)
         if user.avatar_url and user.avatar_type == 'upload':
             try:
                 # Extraer solo el nombre del archivo
-                old_filename = user.avatar_url.split('/')[-1]
-                old_path = os.path.join(UPLOAD_FOLDER, old_filename)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
+                old_filename = user.avatar_url.split('?')[0].split('/')[-1]
+                shared = SystemUser.query.filter(
+                    SystemUser.id != user.id,
+                    SystemUser.avatar_url.like(f"%/{old_filename}")
+                ).count()
+                if old_filename != public_filename and not shared:
+                    delete_avatar_files(old_filename)
             except:
                 pass
         
-        # Guardar archivo
-        file.save(file_path)
-        
-        # ✅ Generar URL COMPLETA
+        # ✅ Generar URL COMPLETA (el tamaño se elige con ?size=48|128|256)
         from flask import request as flask_request
-        avatar_url = f"{flask_request.host_url}uploads/avatars/{unique_filename}"
+        avatar_url = f"{flask_request.host_url}uploads/avatars/{public_filename}"
         
         # Actualizar usuario
         user.avatar_url = avatar_url
@@ -505,10 +507,14 @@ def upload_avatar():
                 "avatar_type": "upload",
                 "avatar_style": None,
                 "avatar_color": None,
-                "avatar_seed": None
+                "avatar_seed": None,
+                "sizes": {size: f"{avatar_url}?size={size}" for size in AVATAR_SIZES}
             }
         }), 200
         
+    except ValidationError as e:
+        db.session.rollback()
+        raise e
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
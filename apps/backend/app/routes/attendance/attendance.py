@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+import time
+from flask import Blueprint, current_app, request, jsonify, send_file, stream_with_context
 from flask_jwt_extended import get_jwt_identity
 from app.utils.decorators import (
     requires_coordinator_or_admin,
@@ -9,9 +10,21 @@ from app.models.attendance import Attendance
 from app.models.sessions import Session
 from app.models.workshops import Workshop
 from app.models.user import SystemUser, UserRole
+from app.models.css import Css
+from app.models.report_jobs import ReportJob
 from app.extensions import db
-from datetime import datetime, timezone
-from app.exceptions import ValidationError, NotFoundError, BadRequestError
+from datetime import date, datetime, timedelta, timezone
+from app.exceptions import ValidationError, NotFoundError, BadRequestError, ForbiddenError, ConflictError
+from app.services.attendance_service import iter_attendances, user_history_conditions, user_history_counts
+from app.services.report_jobs_service import (
+    FINISHED, REPORTS, export_report, report_job_dict, report_job_file, report_job_state, request_report
+)
+from app.utils.db_pool import statement_timeout
+from app.utils.db_routing import use_primary
+from app.utils.response_cache import response_cache
+from app.utils.streaming import stream_json
+from app.utils.exports import export_format, export_mimetype
+from werkzeug.datastructures import MultiDict
 
 
 attendance_bp = Blueprint("attendance", __name__, url_prefix='/attendance')
@@ -252,23 +265,12 @@ def get_user_attendance_history(user_id, workshop_id):
     if not workshop:
         raise NotFoundError(f"Taller con ID {workshop_id} no encontrado")
     
-    # Obtener todas las sesiones del taller
-    sessions = Session.query.filter_by(workshop_id=workshop_id).all()
-    session_ids = [s.id for s in sessions]
-    
-    # Obtener asistencias del usuario
-    attendances = Attendance.query.filter(
-        Attendance.user_id == user_id,
-        Attendance.session_id.in_(session_ids)
-    ).all()
-    
-    # Calcular estadísticas
-    total_sessions = len(sessions)
-    sessions_with_attendance = len(attendances)
-    present_count = sum(1 for att in attendances if att.present)
+    # Estadísticas en una consulta agregada; las asistencias se envían en streaming después
+    total_sessions, sessions_with_attendance, present_count = user_history_counts(user_id, workshop_id)
     absent_count = sessions_with_attendance - present_count
+    conditions = user_history_conditions(user_id, workshop_id)
     
-    return jsonify({
+    return stream_json({
         "user": {
             "id": user.id,
             "name": f"{user.name} {user.last_name}"
@@ -284,8 +286,8 @@ def get_user_attendance_history(user_id, workshop_id):
             "absent": absent_count,
             "attendance_rate": round((present_count / sessions_with_attendance * 100), 2) if sessions_with_attendance > 0 else 0
         },
-        "attendances": [att.serialize() for att in attendances]
-    }), 200
+        "attendances": iter_attendances(*conditions)
+    }, ndjson_items=iter_attendances(*conditions))
 
 
 # ============================================
@@ -294,6 +296,7 @@ def get_user_attendance_history(user_id, workshop_id):
 
 @attendance_bp.route("/workshop/<int:workshop_id>/report", methods=["GET"])
 @requires_staff_access
+@response_cache.cached("workshops", "sessions", "workshop_users", "attendances", "system_users", scope="workshop_id")
 def get_workshop_attendance_report(workshop_id):
     """Reporte completo de asistencia de un taller"""
     workshop = Workshop.query.get(workshop_id)
@@ -345,6 +348,7 @@ def get_workshop_attendance_report(workshop_id):
 
 @attendance_bp.route("/my-workshops", methods=["GET"])
 @requires_professional_access
+@response_cache.cached("workshops", "sessions", "attendances", per_user=(UserRole.PROFESSIONAL,))
 def get_my_workshops_attendance():
     """
     Ver TODAS las asistencias de los talleres del profesional
@@ -441,6 +445,8 @@ def get_my_workshops_attendance():
 
 @attendance_bp.route("/reports/workshop/<int:workshop_id>", methods=["GET"])
 @requires_staff_access
+@response_cache.cached("workshops", "sessions", "workshop_users", "attendances", "system_users", "css",
+                        scope="workshop_id")
 def get_workshop_detailed_report(workshop_id):
     """
     Reporte detallado de un taller con:
@@ -564,6 +570,7 @@ def get_workshop_detailed_report(workshop_id):
 
 @attendance_bp.route("/reports/workshops", methods=["GET"])
 @requires_staff_access
+@response_cache.cached("workshops", "sessions", "css")
 def get_workshops_for_reports():
     """
     Obtener lista de talleres disponibles para generar reportes
@@ -600,4 +607,193 @@ def get_workshops_for_reports():
     return jsonify({
         "workshops": workshops_with_sessions,
         "total": len(workshops_with_sessions)
-    }), 200
\ No newline at end of file
+    }), 200
+
+# ============================================
+# EXPORTACIONES CSV / XLSX (ADMIN/COORDINATOR)
+# ============================================
+# ?format=csv (por defecto) o xlsx. Se generan en streaming (app/utils/exports.py): un año completo de un CSS
+# no se carga en memoria. Los coordinadores solo exportan su CSS. El fichero queda en la caché de informes
+# (app/services/report_jobs_service.py): mientras no cambien los datos, la misma exportación sale de disco.
+
+def _export_css_scope(css_id=None):
+    """CSS que puede exportar el usuario: el admin el pedido (None = todos), el coordinador solo el suyo."""
+    user = SystemUser.query.get(int(get_jwt_identity()))
+    if user.rol == UserRole.ADMINISTRATOR:
+        return css_id
+    if not user.css_id or (css_id is not None and css_id != user.css_id):
+        raise ForbiddenError("Solo puedes exportar datos de tu centro")
+    return user.css_id
+
+
+def _export_date_range(args):
+    """from=YYYY-MM-DD&to=YYYY-MM-DD; por defecto el último año hasta hoy."""
+    try:
+        end = date.fromisoformat(args["to"]) if args.get("to") else date.today()
+        start = date.fromisoformat(args["from"]) if args.get("from") else end - timedelta(days=364)
+    except (TypeError, ValueError):
+        raise ValidationError("Fechas inválidas: usa el formato YYYY-MM-DD")
+    if start > end:
+        raise ValidationError("La fecha 'from' no puede ser posterior a 'to'")
+    return start, end
+
+
+def _report_params(report, args, workshop_id=None, css_id=None):
+    """Valida permisos y parámetros de un informe y los deja normalizados (clave de la caché de informes).
+    `args` es request.args en las rutas /export o el JSON del trabajo en POST /reports/jobs."""
+    if report == "workshop_matrix":
+        workshop_id = workshop_id or args.get("workshop_id", type=int)
+        workshop = Workshop.query.get(workshop_id) if workshop_id else None
+        if not workshop:
+            raise NotFoundError(f"Taller con ID {workshop_id} no encontrado")
+        _export_css_scope(workshop.css_id)
+        return {"workshop_id": workshop_id}
+
+    start, end = _export_date_range(args)
+    if report == "css_summary":
+        css_id = css_id or args.get("css_id", type=int)
+        _export_css_scope(css_id)
+        if not css_id or not Css.query.get(css_id):
+            raise NotFoundError(f"Centro social con ID {css_id} no encontrado")
+        return {"css_id": css_id, "from": start.isoformat(), "to": end.isoformat()}
+
+    if report == "attendance_detail":
+        return {"css_id": _export_css_scope(args.get("css_id", type=int)),
+                "workshop_id": args.get("workshop_id", type=int),
+                "from": start.isoformat(), "to": end.isoformat()}
+
+    raise BadRequestError(f"Informe desconocido: {report} ({', '.join(REPORTS)})")
+
+
+# Las descargas inmediatas recorren todo el rango pedido: más margen que DB_STATEMENT_TIMEOUT_MS
+EXPORT_STATEMENT_TIMEOUT_MS = 60000
+
+
+@attendance_bp.route("/reports/workshop/<int:workshop_id>/export", methods=["GET"])
+@statement_timeout(EXPORT_STATEMENT_TIMEOUT_MS)
+@requires_coordinator_or_admin
+def export_workshop_matrix(workshop_id):
+    """Matriz de asistencia de un taller (alumnos x sesiones)"""
+    fmt = export_format(request.args.get("format"))
+    return export_report("workshop_matrix", _report_params("workshop_matrix", request.args, workshop_id=workshop_id), fmt)
+
+
+@attendance_bp.route("/reports/css/<int:css_id>/export", methods=["GET"])
+@statement_timeout(EXPORT_STATEMENT_TIMEOUT_MS)
+@requires_coordinator_or_admin
+def export_css_summary(css_id):
+    """Resumen por taller de un CSS entre dos fechas"""
+    fmt = export_format(request.args.get("format"))
+    return export_report("css_summary", _report_params("css_summary", request.args, css_id=css_id), fmt)
+
+
+@attendance_bp.route("/reports/export", methods=["GET"])
+@statement_timeout(EXPORT_STATEMENT_TIMEOUT_MS)
+@requires_coordinator_or_admin
+def export_attendance_detail():
+    """Detalle de asistencias entre dos fechas (?css_id=, ?workshop_id= opcionales)"""
+    fmt = export_format(request.args.get("format"))
+    return export_report("attendance_detail", _report_params("attendance_detail", request.args), fmt)
+
+
+# ============================================
+# INFORMES EN SEGUNDO PLANO (ADMIN/COORDINATOR)
+# ============================================
+# POST /reports/jobs {"report": "css_summary", "css_id": 3, "from": "2025-01-01", "to": "2025-12-31",
+# "format": "xlsx"} -> 202 con el trabajo; lo genera `flask report-worker`. Si el mismo informe ya está en caché
+# con los datos actuales responde 200 con el trabajo terminado. El estado se consulta por sondeo
+# (GET /reports/jobs/<id>) o por Server-Sent Events (GET /reports/jobs/<id>/events).
+
+def _own_report_job(job_id):
+    job = db.session.get(ReportJob, job_id)
+    if not job:
+        raise NotFoundError(f"Trabajo con ID {job_id} no encontrado")
+    user_id = int(get_jwt_identity())
+    if job.requested_by != user_id and SystemUser.query.get(user_id).rol != UserRole.ADMINISTRATOR:
+        raise ForbiddenError("Este informe lo pidió otro usuario")
+    return job
+
+
+@attendance_bp.route("/reports/jobs", methods=["POST"])
+@requires_coordinator_or_admin
+def create_report_job():
+    """Pedir un informe en segundo plano"""
+    args = MultiDict(request.get_json(silent=True) or {})
+    report = args.get("report")
+    params = _report_params(report, args)
+    job = request_report(report, params, export_format(args.get("format")), int(get_jwt_identity()))
+    return jsonify(report_job_dict(job)), 202 if job.status not in FINISHED else 200
+
+
+@attendance_bp.route("/reports/jobs", methods=["GET"])
+@requires_coordinator_or_admin
+@use_primary
+def list_report_jobs():
+    """Últimos trabajos del usuario"""
+    jobs = ReportJob.query.filter_by(requested_by=int(get_jwt_identity())) \
+        .order_by(ReportJob.id.desc()).limit(request.args.get("limit", 20, type=int)).all()
+    return jsonify({"jobs": [report_job_dict(job) for job in jobs]}), 200
+
+
+@attendance_bp.route("/reports/jobs/<int:job_id>", methods=["GET"])
+@requires_coordinator_or_admin
+@use_primary
+def get_report_job(job_id):
+    """Estado de un trabajo (sondeo). Mientras no termina lleva Retry-After."""
+    job = _own_report_job(job_id)
+    response = jsonify(report_job_dict(job))
+    if job.status not in FINISHED:
+        response.headers["Retry-After"] = "2"
+    return response, 200
+
+
+@attendance_bp.route("/reports/jobs/<int:job_id>/events", methods=["GET"])
+@requires_coordinator_or_admin
+@use_primary
+def report_job_events(job_id):
+    """Server-Sent Events: un evento `status` por cada cambio de estado hasta que el trabajo termina.
+    La conexión se corta a los REPORT_JOBS_SSE_SECONDS (el navegador reconecta solo con EventSource)."""
+    _own_report_job(job_id)
+    config = current_app.config
+    poll, limit = config["REPORT_JOBS_SSE_POLL_SECONDS"], config["REPORT_JOBS_SSE_SECONDS"]
+
+    def events():
+        last, deadline, next_ping = None, time.monotonic() + limit, time.monotonic() + 15
+        yield f"retry: {int(poll * 1000)}\n\n"
+        while True:
+            status = report_job_state(job_id)
+            # Se cierra la transacción en cada vuelta: no retener la conexión ni leer una foto antigua
+            db.session.commit()
+            if status is not None and status != last:
+                last = status
+                job = db.session.get(ReportJob, job_id, populate_existing=True)
+                yield f"event: status\ndata: {current_app.json.dumps(report_job_dict(job))}\n\n"
+                db.session.commit()
+            if status is None or status in FINISHED or time.monotonic() >= deadline:
+                return
+            if time.monotonic() >= next_ping:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ": ping\n\n"
+                next_ping = time.monotonic() + 15
+            time.sleep(poll)
+
+    response = current_app.response_class(stream_with_context(events()), mimetype="text/event-stream")
+    # no-transform: ni el middleware de compresión ni un proxy deben acumular el stream antes de enviarlo
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@attendance_bp.route("/reports/jobs/<int:job_id>/download", methods=["GET"])
+@requires_coordinator_or_admin
+@use_primary
+def download_report_job(job_id):
+    """Fichero del informe terminado"""
+    job = _own_report_job(job_id)
+    if job.status not in FINISHED:
+        raise ConflictError("El informe todavía se está generando")
+    path = report_job_file(job)
+    if not path:
+        raise NotFoundError("El informe falló o ya caducó: vuelve a pedirlo")
+    return send_file(path, mimetype=export_mimetype(job.format), as_attachment=True, download_name=job.filename,
+                     conditional=True, etag=job.cache_key)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from app.models.user import UserRole
+from app.utils.decorators import requires_role
+from app.utils.audit_partitions import list_partitions
+from app.services.audit_service import query_audit_logs, role_history
+from app.exceptions import ValidationError
+
+# Consulta de audit_logs (solo administradores)
+audit_bp = Blueprint("audit", __name__, url_prefix='/audit')
+
+
+def _datetime_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(f"{name} debe tener formato YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS")
+
+
+@audit_bp.route('/logs', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_audit_logs():
+    """Registros de auditoría, del más reciente al más antiguo
+    Query params: ?table_name=system_users&record_id=5&user_id=1&action=UPDATE&since=2026-01-01&until=2026-02-01
+                  &limit=50&cursor=<next_cursor de la página anterior>"""
+    logs, next_cursor = query_audit_logs(
+        table_name=request.args.get('table_name'),
+        record_id=request.args.get('record_id', type=int),
+        user_id=request.args.get('user_id', type=int),
+        action=(request.args.get('action') or '').upper() or None,
+        since=_datetime_arg('since'),
+        until=_datetime_arg('until'),
+        limit=request.args.get('limit', 50, type=int),
+        cursor=request.args.get('cursor'),
+    )
+    return jsonify({"logs": logs, "next_cursor": next_cursor}), 200
+
+
+@audit_bp.route('/users/<int:user_id>/roles', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_role_history(user_id):
+    """Historial de cambios de rol de un usuario: quién lo cambió, cuándo y de qué rol a cuál"""
+    logs, next_cursor = role_history(user_id, limit=request.args.get('limit', 50, type=int),
+                                     cursor=request.args.get('cursor'))
+    return jsonify({"changes": logs, "next_cursor": next_cursor}), 200
+
+
+@audit_bp.route('/partitions', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_partitions():
+    """Particiones mensuales de audit_logs (o tablas rotadas en SQLite) con su nº de filas"""
+    return jsonify(list_partitions()), 200
@@ -6,11 +6,17 @@ from app.utils.decorators import requires_coordinator_or_admin,requires_professi
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, unset_jwt_cookies, set_access_cookies,decode_token
 from app.exceptions import ValidationError, UnauthorizedError, ForbiddenError, AppError, BadRequestError,NotFoundError,ConflictError
 from app.utils.helper import build_qr_data_uri, issue_tokens_for_user,validate_international_phone
+from app.utils.metrics import record_login
+from app.utils.db_routing import use_primary
 from datetime import datetime, timezone, timedelta,date
 import re
 from functools import wraps
 from app.services.mail_service import send_reset_password_email
 from app.services.reset_2fa_service import send_reset_2fa_email
+from app.utils.reference_cache import reference_cache, reference_response
+from app.services.css_service import load_admin_css_centers  # registra el loader "css_admin"
+from app.services.user_service import page_users, iter_users, user_stats
+from app.utils.streaming import stream_json
 
 auth_bp = Blueprint("auth", __name__, url_prefix='/auth')
 
@@ -32,10 +38,14 @@ def requires_admin(f):
 # =========================
 # LISTA DE ROLES
 # =========================
+@reference_cache.loader("roles", versioned=False)
+def load_roles():
+    # Los roles salen del enum: solo cambian con un despliegue
+    return {"roles": [r.value for r in UserRole if r != UserRole.PENDING]}
+
 @auth_bp.route("/roles", methods=["GET"])
 def list_roles():
-    roles = [r.value for r in UserRole if r != UserRole.PENDING]
-    return jsonify({"roles": roles})
+    return reference_response("roles")
 
 # =========================================================================================================
 #                                          Login con 2FA MEJORADO
@@ -54,10 +64,12 @@ def login():
     # Verificar si el usuario existe
     user = SystemUser.query.filter_by(email=email).first()
     if not user:
+        record_login("invalid_credentials")
         raise UnauthorizedError("Credenciales inválidas")
     
     # Verificar contraseña
     if not bcrypt.check_password_hash(user.password, password):
+        record_login("invalid_credentials")
         raise UnauthorizedError("Credenciales inválidas")
     
     # Verificar si el usuario está activo o es su primer login
@@ -66,6 +78,7 @@ def login():
             # Primer login - activar automáticamente
             user.is_active = True
         else:
+            record_login("inactive")
             raise UnauthorizedError("Usuario inactivo. Contacte al administrador.")
     
     # IMPORTANTE: Si es la primera vez (no tiene 2FA configurado), forzar configuración
@@ -73,6 +86,7 @@ def login():
         # Guardar credenciales temporalmente en sesión para después del setup 2FA
         session['temp_email'] = email
         session['temp_user_id'] = user.id
+        record_login("2fa_setup_required")
         
         # NO DAR ACCESO - Devolver 401 con flag especial
         return jsonify({
@@ -85,6 +99,7 @@ def login():
     if user.two_factor_enabled:
         if not token_2fa:
             # No se proporcionó token 2FA - NO DAR ACCESO
+            record_login("2fa_required")
             return jsonify({
                 "requires_2fa": True,
                 "message": "Se requiere código de autenticación de dos factores"
@@ -92,11 +107,13 @@ def login():
         
         # Verificar el token 2FA
         if not user.verify_2fa_token(token_2fa):
+            record_login("2fa_invalid")
             raise UnauthorizedError("Código de autenticación inválido")
     
     # SOLO si pasó todas las verificaciones: Login exitoso
     user.last_login = datetime.now(timezone.utc)
     db.session.commit()
+    record_login("success")
     
     # Generar token JWT
     access_token = issue_tokens_for_user(user)
@@ -120,6 +137,7 @@ def login():
 #                               2FA setup 
 # =========================================================================================================
 @auth_bp.route('/2fa/setup', methods=["GET"])
+@use_primary  # genera y guarda el secreto si no existe
 def twofa_setup():
     """Setup inicial de 2FA o regeneración del QR"""
     # Puede ser llamado sin JWT si es el setup inicial
@@ -435,6 +453,7 @@ def register():
     )
     
     db.session.add(user)
+    reference_cache.bump("css")  # cambia el conteo de usuarios del CSS
     db.session.commit()
     
     return jsonify({
@@ -458,93 +477,54 @@ def get_all_users():
         css_filter = request.args.get('css')  # ✅ NUEVO FILTRO agregado 
         search = request.args.get('search', '').strip()
         page = request.args.get('page', 1, type=int)
+        # per_page=all: todos los usuarios en streaming (exportaciones), sin tenerlos en memoria
+        all_pages = request.args.get('per_page') == 'all'
         per_page = request.args.get('per_page', 10, type=int)
         
-        # Query base
-        query = SystemUser.query
+        # Filtros (el de búsqueda por nombre de CSS usa el LEFT JOIN de page_users)
+        conditions = []
         
         # Aplicar filtros
         if role_filter and role_filter != 'all':
             try:
                 role_enum = UserRole(role_filter)
-                query = query.filter(SystemUser.rol == role_enum)
+                conditions.append(SystemUser.rol == role_enum)
             except ValueError:
                 raise ValidationError(f"Rol inválido: {role_filter}")
         
         if active_filter is not None:
             is_active = active_filter.lower() == 'true'
-            query = query.filter(SystemUser.is_active == is_active)
+            conditions.append(SystemUser.is_active == is_active)
             
+        css_id = None
         if css_filter and css_filter != 'all':
             try:
                 css_id = int(css_filter)
-                query = query.filter(SystemUser.css_id == css_id)
+                conditions.append(SystemUser.css_id == css_id)
             except ValueError:
                 raise ValidationError(f"CSS ID inválido: {css_filter}")
         
         if search:
             like = f"%{search}%"
-            query = query.filter(
+            conditions.append(
                 (SystemUser.email.ilike(like)) |
                 (SystemUser.name.ilike(like)) |
                 (SystemUser.last_name.ilike(like)) |
-                (SystemUser.dni.ilike(like))
-                (SystemUser.css.has(Css.name.ilike(like)))
+                (SystemUser.dni.ilike(like)) |
+                (Css.name.ilike(like))
             )
         
-        # Paginación
-        pagination = query.order_by(SystemUser.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        users = pagination.items
-        
-        # Estadísticas
-        total_count = SystemUser.query.count()
-        active_count = SystemUser.query.filter_by(is_active=True).count()
-        with_2fa_count = SystemUser.query.filter_by(two_factor_enabled=True).count()
+        # Estadísticas (una sola consulta)
+        total_count, active_count, with_2fa_count, css_total, css_active = user_stats(css_id)
         
         css_stats = {}
-        if css_filter and css_filter != 'all':
-            css_id = int(css_filter)
+        if css_id is not None:
             css_stats = {
-                'css_total': SystemUser.query.filter_by(css_id=css_id).count(),
-                'css_active': SystemUser.query.filter_by(css_id=css_id, is_active=True).count()
+                'css_total': css_total,
+                'css_active': css_active
             }
         
-        return jsonify({
-            "users": [
-                {
-                    "id": user.id,
-                    "email": user.email,
-                    "name": user.name,
-                    "last_name": user.last_name,
-                    "dni": user.dni,
-                    "phone": user.phone,
-                    "rol": user.rol.value,
-                    "is_active": user.is_active,
-                    "two_factor_enabled": user.two_factor_enabled,
-                    "created_at": user.created_at.isoformat() if user.created_at else None,
-                    "last_login": user.last_login.isoformat() if user.last_login else None,
-                    "birth_date": user.birth_date.isoformat() if user.birth_date else None,
-                    "age": user.age,
-                    "css_id": user.css_id,
-                    # ✅ INCLUIR INFORMACIÓN DEL CSS para el filtro 
-                    "css_info": {
-                        "id": user.css.id,
-                        "name": user.css.name,
-                        "code": user.css.code,
-                        "address": user.css.address
-                    } if user.css else None
-                }
-                for user in users
-            ],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": pagination.total,
-                "pages": pagination.pages
-            },
+        body = {
             "stats": {
                 "total_users": total_count,
                 "active_users": active_count,
@@ -558,6 +538,35 @@ def get_all_users():
                 "css": css_filter,
                 "search": search
             }
+        }
+        
+        if all_pages:
+            sent = [0]
+            
+            def counted(rows):
+                for row in rows:
+                    sent[0] += 1
+                    yield row
+            
+            return stream_json({
+                "users": counted(iter_users(conditions)),
+                # Se evalúa después de enviar los usuarios
+                "pagination": lambda: {"page": 1, "per_page": "all", "total": sent[0], "pages": 1 if sent[0] else 0},
+                **body
+            }, ndjson_items=iter_users(conditions))
+        
+        # Paginación
+        users, total, pages = page_users(conditions, page, per_page)
+        
+        return jsonify({
+            "users": users,
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "pages": pages
+            },
+            **body
         }), 200
         
     except Exception as e:
@@ -569,18 +578,7 @@ def get_all_users():
 @auth_bp.route("/admin/css", methods=["GET"])
 @requires_coordinator_or_admin
 def get_active_css():
-    css_centers = Css.query.filter_by(is_active=True).all()
-    return jsonify({
-        "css_centers": [
-            {
-                "id": css.id,
-                "name": css.name,
-                "code": css.code,
-                "address": css.address,
-                "manager": css.manager
-            } for css in css_centers
-        ]
-    }), 200
+    return reference_response("css_admin")
     
 #OBTENER DETALLES DE UN CSS    
   
@@ -607,6 +605,7 @@ def update_user_css(user_id):
     
     user = SystemUser.query.get_or_404(user_id)
     user.css_id = css_id
+    reference_cache.bump("css")
     
     db.session.commit()
     
@@ -955,6 +954,7 @@ def admin_delete_user(user_id: int):
     # Hard delete
     try:
         db.session.delete(user)
+        reference_cache.bump("css")
         db.session.commit()
         return jsonify({
             "message": "Usuario eliminado permanentemente",
@@ -2,7 +2,8 @@ from flask import Blueprint, jsonify
 from app.models.css import Css
 from app.utils.decorators import requires_staff_access,requires_professional_access
 from app.exceptions import NotFoundError,AppError
-from app.models.user import SystemUser
+from app.utils.reference_cache import reference_response
+from app.services.css_service import load_active_css_centers  # registra los loaders "css" y "css_admin"
 
 
 css_bp = Blueprint("css", __name__, url_prefix='/css')
@@ -12,26 +13,8 @@ css_bp = Blueprint("css", __name__, url_prefix='/css')
 def get_active_css_centers():
     """Obtener todos los centros CSS activos con conteo de usuarios"""
     try:
-        # Query con conteo de usuarios
-        css_centers = Css.query.filter_by(is_active=True).order_by(Css.name).all()
-        
-        result = []
-        for css in css_centers:
-            # Contar usuarios de este CSS
-            user_count = SystemUser.query.filter_by(css_id=css.id).count()
-            
-            result.append({
-                "id": css.id,
-                "name": css.name,
-                "code": css.code,
-                "address": css.address,
-                "phone": css.phone,
-                "email": css.email,
-                "is_active": css.is_active,
-                "total_users": user_count
-            })
-        
-        return jsonify({"css_centers": result}), 200
+        # Cacheado por worker; se invalida al crear/mover/eliminar usuarios (contador "css")
+        return reference_response("css")
         
     except Exception as e:
         raise AppError(f"Error obteniendo centros CSS: {str(e)}")
@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from app.extensions import db
+from app.exceptions import ForbiddenError, NotFoundError
+from app.models.user import SystemUser
+from app.services.dashboard_service import build_dashboard, parse_sections
+from app.utils.db_routing import primary_bind
+from app.utils.response_cache import TABLES, response_cache
+
+dashboard_bp = Blueprint("dashboard", __name__, url_prefix='/dashboard')
+
+
+# ============================================
+# DASHBOARD INICIAL (TODOS LOS ROLES)
+# Una sola petición tras el login en lugar de /user/me + talleres + sesiones + asistencias + áreas + CSS
+# ============================================
+
+@dashboard_bp.route("", methods=["GET"])
+@jwt_required()
+@response_cache.cached(*TABLES, per_user=True)
+def get_dashboard():
+    """
+    Datos para pintar el dashboard según el rol del usuario
+    Query params:
+        sections: secciones separadas por comas (por defecto todas las del rol):
+                  me, workshops, sessions, attendance, thematic_areas, css
+        fields[<sección>]: campos a devolver de los elementos de esa sección, ej: fields[workshops]=id,name,status
+    Ejemplo:
+        GET /dashboard?sections=me,sessions&fields[sessions]=id,date,start_time,workshop_name
+    """
+    user_id = int(get_jwt_identity())
+    # Del primario, como requires_role: el rol decide qué secciones se devuelven
+    user = db.session.get(SystemUser, user_id, bind_arguments=primary_bind())
+
+    if not user:
+        raise NotFoundError("Usuario no encontrado en el sistema")
+    if not user.is_active:
+        raise ForbiddenError("Tu cuenta ha sido desactivada. Contacta al administrador")
+
+    names, fields = parse_sections(user.rol, request.args.get("sections"), request.args)
+    return jsonify(build_dashboard(user, names, fields)), 200
@@ -0,0 +1,68 @@
+from flask import Blueprint, current_app, jsonify, request, send_file
+from app.extensions import db
+from app.models.user import UserRole
+from app.utils.decorators import requires_role
+from app.utils.db_pool import pool_stats
+from app.utils.query_diagnostics import load_offenders
+from app.utils.profiler import list_profiles, profile_path, profile_summary
+from app.utils.audit import audit_stats
+from app.exceptions import NotFoundError, ValidationError
+
+# Endpoints internos de diagnóstico (solo administradores). Los datos son del worker que atiende la petición.
+diagnostics_bp = Blueprint("diagnostics", __name__, url_prefix='/diagnostics')
+
+
+@diagnostics_bp.route('/pool', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_pool_stats():
+    """Estado del pool de conexiones: conexiones en uso, overflow y tiempos de espera"""
+    return jsonify({"pool": pool_stats(db.engine)}), 200
+
+
+@diagnostics_bp.route('/audit', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_audit_stats():
+    """Cola de auditoría del worker: registros pendientes, escritos y descartados"""
+    return jsonify({"mode": current_app.config["AUDIT_MODE"], "audit": audit_stats()}), 200
+
+
+@diagnostics_bp.route('/queries', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_query_offenders():
+    """Consultas lentas y N+1 agrupadas, ordenadas por tiempo total (requiere QUERY_DIAGNOSTICS_ENABLED)
+    Query params: ?limit=20&type=slow_query|n_plus_one"""
+    kind = request.args.get('type')
+    if kind not in (None, 'slow_query', 'n_plus_one'):
+        raise ValidationError("type debe ser slow_query o n_plus_one")
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    return jsonify({
+        "enabled": current_app.config["QUERY_DIAGNOSTICS_ENABLED"],
+        "slow_query_ms": current_app.config["SLOW_QUERY_MS"],
+        "n_plus_one_threshold": current_app.config["N_PLUS_ONE_THRESHOLD"],
+        "offenders": load_offenders(limit=limit, kind=kind),
+    }), 200
+
+
+@diagnostics_bp.route('/profiles', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def get_profiles():
+    """Perfiles capturados con la cabecera X-Profile (del más reciente al más antiguo)"""
+    return jsonify({"profiles": list_profiles()}), 200
+
+
+@diagnostics_bp.route('/profiles/<profile_id>', methods=['GET'])
+@requires_role(UserRole.ADMINISTRATOR)
+def download_profile(profile_id):
+    """Descarga un perfil (.prof o .speedscope.json). Con ?format=text devuelve el resumen de pstats (solo cProfile)"""
+    found = profile_path(profile_id)
+    if not found:
+        raise NotFoundError(f"Perfil {profile_id} no encontrado")
+    path, kind = found
+    if request.args.get('format') == 'text':
+        if kind != 'cprofile':
+            raise ValidationError("El resumen en texto solo está disponible para perfiles cProfile")
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'ncalls'):
+            raise ValidationError("sort debe ser cumulative, tottime o ncalls")
+        return current_app.response_class(profile_summary(path, sort=sort), mimetype='text/plain')
+    return send_file(path, as_attachment=True)
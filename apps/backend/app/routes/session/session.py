@@ -9,8 +9,15 @@ from app.models.workshops import Workshop
 from app.models.user import SystemUser, UserRole
 from app.models.workshop_users import WorkshopUser
 from app.extensions import db
+from sqlalchemy import select
 from datetime import datetime, timezone
 from app.exceptions import ValidationError, NotFoundError, BadRequestError
+from app.services.session_service import (
+    iter_enrolled_sessions, is_enrolled_anywhere, iter_schedule_sessions, iter_sessions
+)
+from app.services.workshop_service import iter_schedule_workshops
+from app.utils.response_cache import response_cache
+from app.utils.streaming import stream_json
 
 session_bp = Blueprint("sessions", __name__, url_prefix='/sessions')
 
@@ -161,6 +168,7 @@ def create_session():
 
 @session_bp.route("/workshop/<int:workshop_id>", methods=["GET"])
 @jwt_required()
+@response_cache.cached("sessions", "workshops", "system_users", scope="workshop_id")
 def get_workshop_sessions(workshop_id):
     """Listar todas las sesiones de un taller 
     Ver todas las clases programadas de un taller"""
@@ -376,6 +384,7 @@ def cancel_session(session_id):
 
 @session_bp.route("/my-sessions", methods=["GET"])
 @requires_professional_access
+@response_cache.cached("sessions", "workshops", "system_users", per_user=(UserRole.PROFESSIONAL,))
 def get_my_sessions():
     """Obtener sesiones del profesional 
     Profesionales ven solo SUS clases asignadas"""
@@ -407,6 +416,7 @@ def get_my_sessions():
 
 @session_bp.route("/my-enrolled-sessions", methods=["GET"])
 @jwt_required()
+@response_cache.cached("sessions", "workshops", "workshop_users", "system_users", per_user=True)
 def get_my_enrolled_sessions():
     """Obtener sesiones de talleres donde estoy inscrito (PARA CLIENTES)
     Los clientes ven todas las sesiones (pasadas y futuras) de sus talleres"""
@@ -420,31 +430,17 @@ def get_my_enrolled_sessions():
     if user.rol != UserRole.CLIENT:
         raise BadRequestError("Esta ruta es solo para clientes")
     
-    # Obtener talleres donde está inscrito (sin lista de espera)
-    enrollments = WorkshopUser.query.filter_by(
-        user_id=user_id
-    ).filter(
-        WorkshopUser.waitlist_position.is_(None)  # Solo inscritos activos
-    ).all()
-    
-    workshop_ids = [e.workshop_id for e in enrollments]
+    # Todas las sesiones (pasadas y futuras) de los talleres donde está inscrito, sin lista de espera
+    sessions = list(iter_enrolled_sessions(user_id))
     
-    if not workshop_ids:
+    if not sessions and not is_enrolled_anywhere(user_id):
         return jsonify({
             "sessions": [],
             "message": "No estás inscrito en ningún taller"
         }), 200
     
-    # Obtener todas las sesiones de esos talleres (pasadas y futuras)
-    sessions = Session.query.filter(
-        Session.workshop_id.in_(workshop_ids)
-    ).order_by(
-        Session.date.desc(),
-        Session.start_time.desc()
-    ).all()
-    
     return jsonify({
-        "sessions": [s.serialize() for s in sessions]
+        "sessions": sessions
     }), 200
 
 # ============================================
@@ -466,79 +462,48 @@ def get_my_schedule():
     
     # Obtener talleres del profesional
     if user.rol == UserRole.PROFESSIONAL:
-        workshops = Workshop.query.filter_by(professional_id=user_id).all()
+        workshop_conditions = (Workshop.professional_id == user_id,)
+        session_conditions = (
+            Session.workshop_id.in_(select(Workshop.id).where(*workshop_conditions).scalar_subquery()),
+        )
     else:
         # Admin/Coordinator ven todos
-        workshops = Workshop.query.all()
+        workshop_conditions = session_conditions = ()
     
-    workshop_ids = [w.id for w in workshops]
-    
-    if not workshop_ids:
+    if db.session.execute(select(Workshop.id).where(*workshop_conditions).limit(1)).first() is None:
         return jsonify({
             "message": "No tienes talleres asignados",
             "workshops": [],
             "sessions": []
         }), 200
     
-    # Obtener TODAS las sesiones (pasadas y futuras)
-    sessions = Session.query.filter(
-        Session.workshop_id.in_(workshop_ids)
-    ).order_by(Session.date.asc(), Session.start_time.asc()).all()
-    
-    # Separar sesiones en categorías
+    # Un año de sesiones pueden ser decenas de miles: la respuesta se envía en streaming (app/utils/streaming.py)
+    # y cada lista sale de su propia consulta, sin tener todas las sesiones en memoria
     from datetime import date as date_class
     today = date_class.today()
-    
-    upcoming_sessions = []
-    past_sessions = []
-    today_sessions = []
-    
-    for session in sessions:
-        session_data = {
-            "id": session.id,
-            "workshop_id": session.workshop_id,
-            "workshop_name": session.workshop.name,
-            "workshop_color": session.workshop.thematic_area.color if session.workshop.thematic_area else '#E9531A',
-            "date": session.date.strftime('%Y-%m-%d'),
-            "day_of_week": session.date.strftime('%A'),  # Monday, Tuesday, etc.
-            "start_time": session.start_time.strftime('%H:%M'),
-            "end_time": session.end_time.strftime('%H:%M'),
-            "topic": session.topic,
-            "status": session.status,
-            "observations": session.observations,
-            "location": session.workshop.location
-        }
-        
-        if session.date == today:
-            today_sessions.append(session_data)
-        elif session.date > today:
-            upcoming_sessions.append(session_data)
-        else:
-            past_sessions.append(session_data)
-    
-    return jsonify({
-        "workshops": [
-            {
-                "id": w.id,
-                "name": w.name,
-                "color": w.thematic_area.color if w.thematic_area else '#E9531A',
-                "week_days": w.week_days,
-                "start_time": w.start_time.strftime('%H:%M'),
-                "end_time": w.end_time.strftime('%H:%M')
-            } 
-            for w in workshops
-        ],
+    stats = {"total_sessions": 0, "completed": 0, "scheduled": 0, "today": 0, "upcoming": 0}
+    
+    def counted(rows, key):
+        for row in rows:
+            stats[key] += 1
+            yield row
+    
+    def all_sessions():
+        # TODAS las sesiones (pasadas y futuras), contando por estado
+        for row in iter_sessions(*session_conditions, order_by=(Session.date.asc(), Session.start_time.asc(), Session.id)):
+            stats["total_sessions"] += 1
+            if row["status"] in ("completed", "scheduled"):
+                stats[row["status"]] += 1
+            yield row
+    
+    return stream_json({
+        "workshops": iter_schedule_workshops(*workshop_conditions),
         "sessions": {
-            "today": today_sessions,
-            "upcoming": upcoming_sessions,
-            "past": past_sessions,
-            "all": [s.serialize() for s in sessions]
+            "today": counted(iter_schedule_sessions(*session_conditions, Session.date == today), "today"),
+            "upcoming": counted(iter_schedule_sessions(*session_conditions, Session.date > today), "upcoming"),
+            "past": iter_schedule_sessions(*session_conditions, Session.date < today),
+            "all": all_sessions()
         },
-        "stats": {
-            "total_sessions": len(sessions),
-            "completed": len([s for s in sessions if s.status == 'completed']),
-            "scheduled": len([s for s in sessions if s.status == 'scheduled']),
-            "today": len(today_sessions),
-            "upcoming": len(upcoming_sessions)
-        }
-    }), 200
\ No newline at end of file
+        # Se evalúa al final, con las listas ya enviadas
+        "stats": lambda: stats
+    }, ndjson_items=all_sessions())
\ No newline at end of file
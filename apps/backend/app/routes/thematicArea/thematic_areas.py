@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify
 from app.models.thematic_areas import ThematicArea
 from app.utils.decorators import requires_staff_access
 from app.exceptions import NotFoundError
+from app.utils.reference_cache import reference_response
+from app.services.thematic_service import load_thematic_areas  # registra el loader "thematic_areas"
 
 thematic_areas_bp = Blueprint("thematic_areas", __name__, url_prefix='/thematic-areas')
 
@@ -9,12 +11,8 @@ thematic_areas_bp = Blueprint("thematic_areas", __name__, url_prefix='/thematic-
 @thematic_areas_bp.route("/", methods=["GET"])
 @requires_staff_access
 def get_all_thematic_areas():
-    """Obtener todas las áreas temáticas"""
-    areas = ThematicArea.query.all()
-    
-    return jsonify({
-        "thematic_areas": [{"id": area.id, "name": area.name} for area in areas]
-    }), 200
+    """Obtener todas las áreas temáticas (servidas desde la cache de datos de referencia)"""
+    return reference_response("thematic_areas")
 
 
 @thematic_areas_bp.route("/<int:area_id>", methods=["GET"])
@@ -15,6 +15,8 @@ from datetime import datetime, timezone
 from app.exceptions import ValidationError,NotFoundError,BadRequestError,ForbiddenError
 from app.models.sessions import Session
 from app.models.attendance import Attendance
+from app.services.workshop_service import iter_workshops
+from app.utils.response_cache import response_cache
 
 
 workshop_bp = Blueprint("workshops", __name__, url_prefix='/workshops')
@@ -162,6 +164,7 @@ def create_workshop():
 
 @workshop_bp.route("/", methods=["GET"])
 @jwt_required()  # Cambiar de @requires_staff_access
+@response_cache.cached("workshops", "css", "thematic_areas", "system_users")
 def get_all_workshops():
     """Listar talleres según permisos del usuario"""
     user_id = int(get_jwt_identity())
@@ -173,17 +176,17 @@ def get_all_workshops():
     # Clientes solo ven talleres de su CSS
     if user.rol == UserRole.CLIENT:
         # Solo talleres de su CSS (activos con cupo)
-        workshops = Workshop.query.filter(
+        conditions = (
             Workshop.css_id == user.css_id,
             Workshop.status == WorkshopStatus.ACTIVE,
             # Workshop.current_capacity < Workshop.max_capacity comentada por verificar 
-        ).all()
+        )
     else:
         # Staff ve todos
-        workshops = Workshop.query.all()
+        conditions = ()
     
     return jsonify({
-        "workshops": [w.serialize() for w in workshops]
+        "workshops": list(iter_workshops(*conditions))
     }), 200
 
 # ===========================================================================
@@ -210,6 +213,7 @@ def get_workshop_details(workshop_id):
 
 @workshop_bp.route("/available", methods=["GET"])
 @jwt_required()
+@response_cache.cached("workshops", "css", "thematic_areas", "system_users")
 def get_available_workshops():
     """
     Obtener TODOS los talleres activos del CSS del cliente
@@ -538,6 +542,7 @@ def assign_professional(workshop_id):
 
 @workshop_bp.route("/my-workshops", methods=["GET"])
 @requires_professional_access  # ← Admin, coordinador y profesional
+@response_cache.cached("workshops", "css", "thematic_areas", "system_users", per_user=(UserRole.PROFESSIONAL,))
 def get_my_workshops():
     """Obtener talleres del usuario (profesionales ven solo los suyos)"""
     user_id = int(get_jwt_identity())
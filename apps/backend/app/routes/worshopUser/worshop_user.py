@@ -11,6 +11,7 @@ from app.models.user import SystemUser, UserRole
 from app.extensions import db
 from datetime import datetime, timezone
 from app.exceptions import ValidationError, NotFoundError, BadRequestError, ConflictError
+from app.utils.response_cache import response_cache
 
 
 workshop_users_bp = Blueprint("workshop_users", __name__, url_prefix='/workshop-users')
@@ -246,6 +247,7 @@ def unenroll_user(enrollment_id):
 
 @workshop_users_bp.route("/workshop/<int:workshop_id>/students", methods=["GET"])
 @jwt_required()#Cambiado el decorador a JWT para que los clientes vean los inscritos del taller
+@response_cache.cached("workshop_users", "workshops", "system_users", scope="workshop_id")
 def get_workshop_students(workshop_id):
     """Ver todos los usuarios inscritos en un taller (activos y en espera)"""
     workshop = Workshop.query.get(workshop_id)
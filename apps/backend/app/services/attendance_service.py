@@ -0,0 +1,207 @@
+from itertools import groupby
+from operator import itemgetter
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.attendance import Attendance
+from app.models.css import Css
+from app.models.sessions import Session
+from app.models.thematic_areas import ThematicArea
+from app.models.user import SystemUser
+from app.models.workshop_users import WorkshopUser
+from app.models.workshops import Workshop
+
+# LISTADOS DE ASISTENCIAS (solo lectura)
+# Como en workshop_service/session_service: columnas justas con JOIN al alumno y a quien registró la asistencia,
+# dicts en el formato de Attendance.serialize().
+
+Student = aliased(SystemUser, name="student")
+Recorder = aliased(SystemUser, name="recorder")
+
+
+def iter_attendances(*conditions, batch=1000):
+    """Genera las asistencias que cumplen `conditions` como dicts, de `batch` en `batch`."""
+    stmt = (
+        select(
+            Attendance.id, Attendance.session_id, Attendance.user_id, Student.name, Student.last_name,
+            Attendance.present, Attendance.observations, Attendance.recorded_by, Recorder.name,
+            Recorder.last_name, Attendance.recorded_at,
+        )
+        .outerjoin(Student, Student.id == Attendance.user_id)
+        .outerjoin(Recorder, Recorder.id == Attendance.recorded_by)
+        .where(*conditions)
+        .order_by(Attendance.id)
+        .execution_options(yield_per=batch)
+    )
+    for (attendance_id, session_id, user_id, user_name, user_last_name, present, observations, recorded_by,
+         recorder_name, recorder_last_name, recorded_at) in db.session.execute(stmt):
+        yield {
+            "id": attendance_id,
+            "session_id": session_id,
+            "user_id": user_id,
+            "user_name": f"{user_name} {user_last_name}" if user_name is not None else None,
+            "present": present,
+            "observations": observations,
+            "recorded_by": recorded_by,
+            "recorded_by_name": f"{recorder_name} {recorder_last_name}" if recorder_name is not None else None,
+            "recorded_at": recorded_at
+        }
+
+
+def workshop_session_ids(workshop_id):
+    return select(Session.id).where(Session.workshop_id == workshop_id).scalar_subquery()
+
+
+def user_history_conditions(user_id, workshop_id):
+    """Asistencias de un usuario en las sesiones de un taller."""
+    return (Attendance.user_id == user_id, Attendance.session_id.in_(workshop_session_ids(workshop_id)))
+
+
+def user_history_counts(user_id, workshop_id):
+    """(sesiones del taller, asistencias registradas, presentes) en una consulta."""
+    total_sessions = (
+        select(func.count(Session.id)).where(Session.workshop_id == workshop_id).scalar_subquery()
+    )
+    return tuple(db.session.execute(
+        select(
+            total_sessions,
+            func.count(Attendance.id),
+            func.coalesce(func.sum(case((Attendance.present.is_(True), 1), else_=0)), 0),
+        ).where(*user_history_conditions(user_id, workshop_id))
+    ).one())
+
+
+# EXPORTACIONES (app/utils/exports.py)
+# Cada función devuelve (cabecera, generador de filas); las filas salen del cursor con yield_per y no se
+# acumulan. Las columnas de la matriz (sesiones del taller) sí se cargan: son cientos como mucho.
+
+def _rate(present, total):
+    return round(present / total * 100, 2) if total else 0
+
+
+def workshop_matrix(workshop_id, batch=1000):
+    """Matriz alumnos inscritos x sesiones del taller: P (presente), A (ausente) o vacío (sin registrar)."""
+    sessions = db.session.execute(
+        select(Session.id, Session.date, Session.start_time)
+        .where(Session.workshop_id == workshop_id)
+        .order_by(Session.date, Session.start_time, Session.id)
+    ).all()
+    columns = {session_id: index for index, (session_id, _, _) in enumerate(sessions)}
+    header = ["Apellidos", "Nombre", "Email"] + [
+        f"{day.isoformat()} {start_time.strftime('%H:%M')}" for _, day, start_time in sessions
+    ] + ["Presentes", "Ausentes", "% asistencia"]
+
+    enrolled = (
+        select(WorkshopUser.user_id)
+        .where(WorkshopUser.workshop_id == workshop_id, WorkshopUser.waitlist_position.is_(None))
+    )
+    stmt = (
+        select(SystemUser.id, SystemUser.last_name, SystemUser.name, SystemUser.email,
+               Attendance.session_id, Attendance.present)
+        .outerjoin(Attendance, and_(Attendance.user_id == SystemUser.id,
+                                    Attendance.session_id.in_(workshop_session_ids(workshop_id))))
+        .where(SystemUser.id.in_(enrolled))
+        .order_by(SystemUser.last_name, SystemUser.name, SystemUser.id)
+        .execution_options(yield_per=batch)
+    )
+
+    def rows():
+        # Las filas de un mismo alumno llegan seguidas (ORDER BY): se agrupan sin guardar más de un alumno
+        for _, records in groupby(db.session.execute(stmt), key=itemgetter(0)):
+            cells = [""] * len(sessions)
+            present = total = 0
+            for _, last_name, name, email, session_id, is_present in records:
+                if session_id is None:
+                    continue
+                cells[columns[session_id]] = "P" if is_present else "A"
+                total += 1
+                present += bool(is_present)
+            yield [last_name, name, email, *cells, present, total - present, _rate(present, total)]
+
+    return header, rows()
+
+
+def css_summary(css_id, start, end):
+    """Una fila por taller del CSS con sus sesiones, inscritos y asistencias entre start y end (incluidos)."""
+    in_range = Session.date.between(start, end)
+    sessions = (
+        select(Session.workshop_id,
+               func.count(Session.id).label("sessions"),
+               func.sum(case((Session.status == "completed", 1), else_=0)).label("completed"))
+        .where(in_range)
+        .group_by(Session.workshop_id)
+        .subquery()
+    )
+    enrolled = (
+        select(WorkshopUser.workshop_id, func.count(WorkshopUser.id).label("students"))
+        .where(WorkshopUser.waitlist_position.is_(None))
+        .group_by(WorkshopUser.workshop_id)
+        .subquery()
+    )
+    attendances = (
+        select(Session.workshop_id,
+               func.count(Attendance.id).label("records"),
+               func.sum(case((Attendance.present.is_(True), 1), else_=0)).label("present"))
+        .join(Session, Session.id == Attendance.session_id)
+        .where(in_range)
+        .group_by(Session.workshop_id)
+        .subquery()
+    )
+    Professional = aliased(SystemUser, name="professional")
+    stmt = (
+        select(Workshop.name, ThematicArea.name, Professional.name, Professional.last_name, Workshop.status,
+               func.coalesce(sessions.c.sessions, 0), func.coalesce(sessions.c.completed, 0),
+               func.coalesce(enrolled.c.students, 0), func.coalesce(attendances.c.records, 0),
+               func.coalesce(attendances.c.present, 0))
+        .outerjoin(ThematicArea, ThematicArea.id == Workshop.thematic_area_id)
+        .outerjoin(Professional, Professional.id == Workshop.professional_id)
+        .outerjoin(sessions, sessions.c.workshop_id == Workshop.id)
+        .outerjoin(enrolled, enrolled.c.workshop_id == Workshop.id)
+        .outerjoin(attendances, attendances.c.workshop_id == Workshop.id)
+        .where(Workshop.css_id == css_id)
+        .order_by(Workshop.name, Workshop.id)
+    )
+    header = ["Taller", "Área temática", "Profesional", "Estado", "Sesiones", "Sesiones completadas",
+              "Inscritos", "Registros de asistencia", "Presentes", "Ausentes", "% asistencia"]
+
+    def rows():
+        for (name, area, prof_name, prof_last_name, status, total_sessions, completed, students, records,
+             present) in db.session.execute(stmt):
+            yield [name, area, f"{prof_name} {prof_last_name}" if prof_name is not None else None,
+                   status.value if status else None, total_sessions, completed, students, records, present,
+                   records - present, _rate(present, records)]
+
+    return header, rows()
+
+
+def attendance_detail(start, end, css_id=None, workshop_id=None, batch=1000):
+    """Una fila por asistencia registrada en sesiones entre start y end, opcionalmente de un CSS o un taller."""
+    conditions = [Session.date.between(start, end)]
+    if css_id is not None:
+        conditions.append(Workshop.css_id == css_id)
+    if workshop_id is not None:
+        conditions.append(Workshop.id == workshop_id)
+    stmt = (
+        select(Session.date, Session.start_time, Css.name, Workshop.name, Student.last_name, Student.name,
+               Student.dni, Attendance.present, Attendance.observations, Recorder.name, Recorder.last_name,
+               Attendance.recorded_at)
+        .join(Session, Session.id == Attendance.session_id)
+        .join(Workshop, Workshop.id == Session.workshop_id)
+        .outerjoin(Css, Css.id == Workshop.css_id)
+        .outerjoin(Student, Student.id == Attendance.user_id)
+        .outerjoin(Recorder, Recorder.id == Attendance.recorded_by)
+        .where(*conditions)
+        .order_by(Session.date, Session.start_time, Workshop.name, Student.last_name, Student.name, Attendance.id)
+        .execution_options(yield_per=batch)
+    )
+    header = ["Fecha", "Hora", "CSS", "Taller", "Apellidos", "Nombre", "DNI", "Asistencia", "Observaciones",
+              "Registrado por", "Registrado el"]
+
+    def rows():
+        for (day, start_time, css_name, workshop_name, last_name, name, dni, present, observations, recorder_name,
+             recorder_last_name, recorded_at) in db.session.execute(stmt):
+            yield [day, start_time.strftime('%H:%M'), css_name, workshop_name, last_name, name, dni,
+                   "Presente" if present else "Ausente", observations,
+                   f"{recorder_name} {recorder_last_name}" if recorder_name is not None else None, recorded_at]
+
+    return header, rows()
@@ -0,0 +1,82 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_, select
+from app.extensions import db
+from app.exceptions import ValidationError
+from app.models.audit_logs import AuditLog
+from app.utils.audit_partitions import audit_tables, month_bounds, partition_month
+
+MAX_LIMIT = 500
+
+
+def _encode_cursor(row):
+    return f"{row['created_at'].isoformat()}~{row['id']}"
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, record_id = cursor.rsplit("~", 1)
+        return datetime.fromisoformat(created_at), int(record_id)
+    except ValueError:
+        raise ValidationError("cursor inválido")
+
+
+def _filtered(table, filters, cursor, limit):
+    """SELECT de una tabla (padre, partición o tabla rotada) con los filtros y el orden de la paginación.
+    Todos los filtros tienen índice: (table_name, record_id, created_at), (user_id, created_at) y (created_at)."""
+    c = table.c
+    conditions = []
+    for field in ("table_name", "record_id", "user_id", "action"):
+        if filters.get(field) is not None:
+            conditions.append(c[field] == filters[field])
+    if filters.get("since") is not None:
+        conditions.append(c.created_at >= filters["since"])
+    if filters.get("until") is not None:
+        conditions.append(c.created_at < filters["until"])
+    if filters.get("role_changes"):
+        # _record solo rellena role_assignment_date cuando cambia el rol
+        conditions.append(c.role_assignment_date.is_not(None))
+    if cursor:
+        created_at, last_id = cursor
+        conditions.append(or_(c.created_at < created_at, and_(c.created_at == created_at, c.id < last_id)))
+    return select(table).where(*conditions).order_by(c.created_at.desc(), c.id.desc()).limit(limit)
+
+
+def query_audit_logs(table_name=None, record_id=None, user_id=None, action=None, since=None, until=None,
+                     role_changes=False, limit=50, cursor=None):
+    """Registros de auditoría del más reciente al más antiguo, paginados por (created_at, id).
+    since/until acotan created_at (UTC, until excluido) y con ellos solo se leen los meses del rango.
+    Devuelve (registros, cursor de la página siguiente o None)."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    filters = {"table_name": table_name, "record_id": record_id, "user_id": user_id, "action": action,
+               "since": since, "until": until, "role_changes": role_changes}
+    position = _decode_cursor(cursor) if cursor else None
+
+    # Particionado nativo: una sola consulta sobre la tabla padre. Tablas rotadas (SQLite): la caliente y luego
+    # los meses del más reciente al más antiguo, parando en cuanto los meses que quedan ya no pueden entrar en la página
+    # Conexión para una lectura (clause=SELECT): con réplica, las tablas se buscan en la misma BD que luego se lee y
+    # la petición no se marca como escritura (sin cambiar al primario ni cookie sentya_db_primary)
+    conn = db.session.connection(bind_arguments={"clause": select(AuditLog.__table__)})
+    rows = []
+    for table in audit_tables(conn, since, until):
+        month = partition_month(table.name)
+        if month is not None and len(rows) > limit and rows[limit]["created_at"] >= month_bounds(month)[1]:
+            break
+        if month is not None and position and position[0] < month_bounds(month)[0]:
+            continue
+        rows.extend(dict(row._mapping) for row in db.session.execute(_filtered(table, filters, position, limit + 1)))
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        del rows[limit + 1:]
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    loads = current_app.json.loads
+    for row in rows[:limit]:
+        for field in ("old_data", "new_data"):
+            if row[field] is not None:
+                row[field] = loads(row[field])
+    return rows[:limit], next_cursor
+
+
+def role_history(user_id, limit=50, cursor=None):
+    """Quién cambió el rol de un usuario y cuándo (índice (table_name, record_id, created_at))."""
+    return query_audit_logs(table_name="system_users", record_id=user_id, role_changes=True, limit=limit, cursor=cursor)
@@ -0,0 +1,142 @@
+import hashlib
+import io
+import mimetypes
+import os
+import re
+from flask import current_app, request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from app.exceptions import ValidationError
+
+# PIPELINE DE AVATARES SUBIDOS
+# La imagen subida (hasta 5MB) se decodifica con Pillow, se descartan los metadatos (EXIF, GPS...),
+# se recorta al centro en cuadrado y se generan miniaturas WebP de tamaño fijo. Los ficheros se guardan
+# con el hash del contenido, así dos subidas idénticas comparten los mismos ficheros.
+#   uploads/avatars/<sha256>-48.webp
+#   uploads/avatars/<sha256>-128.webp
+#   uploads/avatars/<sha256>-256.webp
+# La URL pública es /uploads/avatars/<sha256>.webp y el tamaño se elige con ?size=
+
+AVATAR_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../uploads/avatars'))
+AVATAR_SIZES = (48, 128, 256)
+DEFAULT_AVATAR_SIZE = 128  # suficiente para las burbujas del navbar y tablas en pantallas retina
+WEBP_QUALITY = 80
+MAX_AVATAR_PIXELS = 40_000_000  # protección ante "decompression bombs"
+AVATAR_CACHE_MAX_AGE = 365 * 24 * 3600  # los nombres nunca se reutilizan: se pueden cachear un año
+
+_HASHED_NAME = re.compile(r"^(?P<digest>[0-9a-f]{64})\.webp$")
+_THUMBNAIL_NAME = re.compile(r"^[0-9a-f]{64}-\d+\.webp$")
+
+
+def _avatar_folder():
+    return current_app.config.get("AVATAR_FOLDER", AVATAR_FOLDER)
+
+
+def thumbnail_filename(digest, size):
+    return f"{digest}-{size}.webp"
+
+
+def process_avatar(raw: bytes) -> str:
+    """Genera las miniaturas WebP de una imagen subida y devuelve su hash de contenido.
+    Si ya existen (misma imagen subida antes por cualquier usuario) no se vuelve a procesar.
+    Raises:
+        ValidationError: el fichero no es una imagen válida"""
+    digest = hashlib.sha256(raw).hexdigest()
+    folder = _avatar_folder()
+    targets = {size: os.path.join(folder, thumbnail_filename(digest, size)) for size in AVATAR_SIZES}
+    if all(os.path.exists(path) for path in targets.values()):
+        return digest
+
+    # Pillow solo se importa cuando alguien sube un avatar
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_AVATAR_PIXELS
+    try:
+        with Image.open(io.BytesIO(raw)) as img:
+            # En JPEG decodifica directamente a menor resolución (mucho más rápido)
+            img.draft("RGB", (max(AVATAR_SIZES) * 2, max(AVATAR_SIZES) * 2))
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+            img = img.convert("RGBA" if has_alpha else "RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ValidationError("El archivo no es una imagen válida")
+
+    os.makedirs(folder, exist_ok=True)
+    # De mayor a menor: cada miniatura se reduce desde la anterior
+    source = img
+    for size in sorted(AVATAR_SIZES, reverse=True):
+        source = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+        # Guardamos en un temporal y renombramos: nunca se sirve un fichero a medio escribir
+        tmp_path = f"{targets[size]}.{os.getpid()}.tmp"
+        source.save(tmp_path, format="WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp_path, targets[size])
+
+    return digest
+
+
+def avatar_filename_for(filename, size=None):
+    """Traduce el nombre público (<hash>.webp) al fichero de la miniatura más adecuada para `size`.
+    Los avatares antiguos (<uuid>.<ext>) se sirven tal cual."""
+    match = _HASHED_NAME.match(filename)
+    if not match:
+        return filename
+    size = size or DEFAULT_AVATAR_SIZE
+    best = next((s for s in AVATAR_SIZES if s >= size), AVATAR_SIZES[-1])
+    return thumbnail_filename(match.group("digest"), best)
+
+
+def delete_avatar_files(filename):
+    """Elimina del disco un avatar (todas sus miniaturas si es de contenido direccionado)."""
+    folder = _avatar_folder()
+    match = _HASHED_NAME.match(filename)
+    if match:
+        paths = [os.path.join(folder, thumbnail_filename(match.group("digest"), s)) for s in AVATAR_SIZES]
+    else:
+        paths = [os.path.join(folder, os.path.basename(filename))]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def init_avatar_serving(app):
+    """Configuración para servir avatares, resuelta una sola vez al crear la app.
+    Con USE_X_SENDFILE (Apache/lighttpd) o AVATAR_ACCEL_REDIRECT_PREFIX (nginx, location internal)
+    el proxy envía el fichero y el worker de Flask queda libre."""
+    app.config.setdefault("AVATAR_FOLDER", os.getenv("AVATAR_FOLDER", AVATAR_FOLDER))
+    app.config.setdefault("AVATAR_CACHE_MAX_AGE", int(os.getenv("AVATAR_CACHE_MAX_AGE", AVATAR_CACHE_MAX_AGE)))
+    app.config.setdefault("AVATAR_ACCEL_REDIRECT_PREFIX", os.getenv("AVATAR_ACCEL_REDIRECT_PREFIX"))
+    if os.getenv("USE_X_SENDFILE", "false").lower() == "true":
+        app.config["USE_X_SENDFILE"] = True
+
+
+def avatar_response(filename, size=None):
+    """Respuesta para GET /uploads/avatars/<filename>.
+    send_file gestiona ETag/If-None-Match (304), If-Modified-Since y Range (206); añadimos caché inmutable
+    porque cada nombre corresponde siempre al mismo contenido."""
+    config = current_app.config
+    name = avatar_filename_for(filename, size)
+    path = safe_join(config["AVATAR_FOLDER"], name)
+    if path is None:
+        raise NotFound()
+
+    # Las miniaturas se nombran por hash: el propio nombre sirve de ETag y la revalidación
+    # se resuelve sin tocar disco. Los avatares antiguos usan el ETag de werkzeug (mtime + tamaño).
+    etag = name if _THUMBNAIL_NAME.match(name) else True
+    cache_control = f"public, max-age={config['AVATAR_CACHE_MAX_AGE']}, immutable"
+
+    if etag is not True and request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+    elif config["AVATAR_ACCEL_REDIRECT_PREFIX"]:
+        # nginx resuelve el fichero, los condicionales y los rangos; aquí solo devolvemos la ruta interna
+        response = current_app.response_class(mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = f"{config['AVATAR_ACCEL_REDIRECT_PREFIX'].rstrip('/')}/{name}"
+    else:
+        try:
+            # Sin max_age: la cabecera Cache-Control se escribe una sola vez más abajo
+            response = send_file(path, conditional=True, etag=etag)
+        except FileNotFoundError:
+            raise NotFound()
+
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,54 @@
+from sqlalchemy import func
+from app.models.css import Css
+from app.models.user import SystemUser
+from app.extensions import db
+from app.utils.reference_cache import reference_cache
+
+
+@reference_cache.loader("css")
+def load_active_css_centers():
+    """Centros CSS activos con su conteo de usuarios (una sola consulta agrupada)"""
+    user_counts = (
+        db.select(SystemUser.css_id, func.count(SystemUser.id).label("total_users"))
+        .group_by(SystemUser.css_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(Css, func.coalesce(user_counts.c.total_users, 0))
+        .outerjoin(user_counts, user_counts.c.css_id == Css.id)
+        .where(Css.is_active.is_(True))
+        .order_by(Css.name)
+    ).all()
+
+    return {
+        "css_centers": [
+            {
+                "id": css.id,
+                "name": css.name,
+                "code": css.code,
+                "address": css.address,
+                "phone": css.phone,
+                "email": css.email,
+                "is_active": css.is_active,
+                "total_users": total_users
+            }
+            for css, total_users in rows
+        ]
+    }
+
+
+@reference_cache.loader("css_admin", version_key="css")
+def load_admin_css_centers():
+    """Centros CSS activos para el filtro del panel de administración"""
+    css_centers = Css.query.filter_by(is_active=True).all()
+    return {
+        "css_centers": [
+            {
+                "id": css.id,
+                "name": css.name,
+                "code": css.code,
+                "address": css.address,
+                "manager": css.manager
+            } for css in css_centers
+        ]
+    }
@@ -0,0 +1,254 @@
+from datetime import date
+from sqlalchemy import case, func, select
+from app.extensions import db
+from app.exceptions import BadRequestError, ForbiddenError
+from app.models.attendance import Attendance
+from app.models.sessions import Session
+from app.models.user import UserRole
+from app.models.workshops import Workshop, WorkshopStatus
+from app.services.session_service import iter_enrolled_sessions, is_enrolled_anywhere, iter_schedule_sessions
+from app.services.workshop_service import iter_schedule_workshops, iter_workshops
+from app.utils.reference_cache import reference_cache
+from app.services.css_service import load_active_css_centers  # registra el loader "css"
+from app.services.thematic_service import load_thematic_areas  # registra el loader "thematic_areas"
+
+# DASHBOARD TRAS EL LOGIN (GET /dashboard)
+# Junta en una sola respuesta lo que el SPA pedía por separado al entrar: /user/me, /workshops/my-workshops o
+# /workshops/available, /sessions/schedule o /sessions/my-enrolled-sessions, /attendance/my-workshops,
+# /thematic-areas/ y /css/active. Cada sección devuelve el mismo JSON que su endpoint (salvo lo indicado) y
+# comparte lo ya cargado: el usuario se lee una vez y la lista de talleres sirve para talleres y asistencias.
+# Una consulta por sección como mucho; áreas temáticas y CSS salen de reference_cache sin consultas.
+
+ADMIN_ROLES = (UserRole.ADMINISTRATOR, UserRole.COORDINATOR)
+STAFF_ROLES = ADMIN_ROLES + (UserRole.PROFESSIONAL, UserRole.CSS_TECHNICIAN)
+
+
+class _Context:
+    """Datos compartidos entre secciones de una misma petición."""
+
+    def __init__(self, user):
+        self.user = user
+        self.role = user.rol
+        self._workshops = None
+
+    def workshop_conditions(self):
+        # Igual que las rutas originales: el profesional ve sus talleres, admin y coordinador todos
+        if self.role == UserRole.PROFESSIONAL:
+            return (Workshop.professional_id == self.user.id,)
+        return ()
+
+    def workshops(self):
+        if self._workshops is None:
+            self._workshops = list(iter_workshops(*self.workshop_conditions()))
+        return self._workshops
+
+
+def _me(ctx):
+    """Como /user/me."""
+    user = ctx.user
+    return {
+        "user": {
+            "id": user.id,
+            "name": user.name,
+            "last_name": user.last_name,
+            "email": user.email,
+            "rol": user.rol.value,
+            "css_id": user.css_id,
+            "avatar_url": user.avatar_url,
+            "avatar_type": user.avatar_type,
+            "avatar_style": user.avatar_style,
+            "avatar_color": user.avatar_color,
+            "avatar_seed": user.avatar_seed
+        },
+        "role": user.rol.value
+    }
+
+
+def _workshops(ctx):
+    """Clientes: como /workshops/available. Personal: como /workshops/my-workshops."""
+    if ctx.role != UserRole.CLIENT:
+        return {"workshops": ctx.workshops()}
+    user = ctx.user
+    if not user.css_id:
+        return {"workshops": [], "message": "No tienes un centro social asignado"}
+    workshops = list(iter_workshops(Workshop.css_id == user.css_id, Workshop.status == WorkshopStatus.ACTIVE))
+    return {
+        "workshops": workshops,
+        "total": len(workshops),
+        "css_name": workshops[0]["css_name"] if workshops else (user.css.name if user.css else None)
+    }
+
+
+def _sessions(ctx):
+    """Clientes: como /sessions/my-enrolled-sessions.
+    Personal: como /sessions/schedule sin las listas "past" y "all" (historial completo, que no hace falta para
+    pintar el dashboard: siguen en /sessions/schedule); las estadísticas salen de una consulta agregada."""
+    if ctx.role == UserRole.CLIENT:
+        sessions = list(iter_enrolled_sessions(ctx.user.id))
+        if not sessions and not is_enrolled_anywhere(ctx.user.id):
+            return {"sessions": [], "message": "No estás inscrito en ningún taller"}
+        return {"sessions": sessions}
+
+    workshop_conditions = ctx.workshop_conditions()
+    workshops = list(iter_schedule_workshops(*workshop_conditions))
+    if not workshops:
+        return {"message": "No tienes talleres asignados", "workshops": [], "sessions": []}
+    session_conditions = ()
+    if workshop_conditions:
+        session_conditions = (
+            Session.workshop_id.in_(select(Workshop.id).where(*workshop_conditions).scalar_subquery()),
+        )
+
+    today = date.today()
+    sessions = {"today": [], "upcoming": []}
+    for row in iter_schedule_sessions(*session_conditions, Session.date >= today):
+        sessions["today" if row["date"] == today else "upcoming"].append(row)
+    total, completed, scheduled = db.session.execute(
+        select(
+            func.count(Session.id),
+            func.coalesce(func.sum(case((Session.status == "completed", 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Session.status == "scheduled", 1), else_=0)), 0),
+        ).where(*session_conditions)
+    ).one()
+    return {
+        "workshops": workshops,
+        "sessions": sessions,
+        "stats": {
+            "total_sessions": total,
+            "completed": completed,
+            "scheduled": scheduled,
+            "today": len(sessions["today"]),
+            "upcoming": len(sessions["upcoming"])
+        }
+    }
+
+
+def _attendance(ctx):
+    """Como /attendance/my-workshops, con los recuentos de todas las sesiones en una consulta agrupada."""
+    workshops = ctx.workshops()
+    stats = {"total_sessions": 0, "total_workshops": 0, "total_attendances": 0, "average_attendance_rate": 0}
+    if not workshops:
+        return {"message": "No tienes talleres asignados", "workshops": [], "sessions_with_attendance": [],
+                "stats": stats}
+
+    present = func.sum(case((Attendance.present.is_(True), 1), else_=0))
+    rows = db.session.execute(
+        select(Session.id, Session.workshop_id, Workshop.name, Session.date, Session.start_time, Session.end_time,
+               Session.topic, func.count(Attendance.id), present, func.min(Attendance.recorded_at))
+        .join(Workshop, Workshop.id == Session.workshop_id)
+        .join(Attendance, Attendance.session_id == Session.id)
+        .where(Session.status == "completed", *ctx.workshop_conditions())
+        .group_by(Session.id, Session.workshop_id, Workshop.name, Session.date, Session.start_time,
+                  Session.end_time, Session.topic)
+        .order_by(Session.id)
+    ).all()
+
+    sessions_data = []
+    total_present = total_records = 0
+    for (session_id, workshop_id, workshop_name, day, start_time, end_time, topic, records, present_count,
+         recorded_at) in rows:
+        total_present += present_count
+        total_records += records
+        sessions_data.append({
+            "session_id": session_id,
+            "workshop_id": workshop_id,
+            "workshop_name": workshop_name,
+            "date": day.strftime('%Y-%m-%d'),
+            "start_time": start_time.strftime('%H:%M'),
+            "end_time": end_time.strftime('%H:%M'),
+            "topic": topic,
+            "total_students": records,
+            "present": present_count,
+            "absent": records - present_count,
+            "attendance_rate": round(present_count / records * 100, 2),
+            "recorded_at": recorded_at.isoformat() if recorded_at else None
+        })
+
+    return {
+        "workshops": [{"id": w["id"], "name": w["name"]} for w in workshops],
+        "sessions_with_attendance": sessions_data,
+        "stats": {
+            "total_sessions": len(sessions_data),
+            "total_workshops": len(workshops),
+            "total_attendances": total_records,
+            "total_present": total_present,
+            "total_absent": total_records - total_present,
+            "average_attendance_rate": round(total_present / total_records * 100, 2) if total_records else 0
+        }
+    }
+
+
+def _reference(name):
+    return lambda ctx: reference_cache.get(name).payload
+
+
+# sección -> (roles que la pueden pedir, constructor, listas/objetos a los que se aplica fields[sección])
+SECTIONS = {
+    "me": (tuple(UserRole), _me, (("user",),)),
+    "workshops": (ADMIN_ROLES + (UserRole.PROFESSIONAL, UserRole.CLIENT), _workshops, (("workshops",),)),
+    "sessions": (ADMIN_ROLES + (UserRole.PROFESSIONAL, UserRole.CLIENT), _sessions,
+                 (("sessions",), ("sessions", "today"), ("sessions", "upcoming"))),
+    "attendance": (ADMIN_ROLES + (UserRole.PROFESSIONAL,), _attendance, (("sessions_with_attendance",),)),
+    "thematic_areas": (STAFF_ROLES, _reference("thematic_areas"), (("thematic_areas",),)),
+    "css": (STAFF_ROLES, _reference("css"), (("css_centers",),)),
+}
+
+
+def _is_record(value):
+    return isinstance(value, dict) and not any(isinstance(v, (dict, list)) for v in value.values())
+
+
+def _select_fields(payload, paths, fields):
+    """Copia de payload con solo `fields` en los registros de `paths` (listas de objetos o un objeto plano).
+    No modifica el original: puede venir de reference_cache."""
+    payload = dict(payload)
+    for path in paths:
+        parent = payload
+        for key in path[:-1]:
+            if not isinstance(parent.get(key), dict):
+                break
+            parent[key] = parent = dict(parent[key])
+        else:
+            value = parent.get(path[-1])
+            if _is_record(value):
+                parent[path[-1]] = {key: value[key] for key in fields if key in value}
+            elif isinstance(value, list):
+                parent[path[-1]] = [{key: item[key] for key in fields if key in item} for item in value]
+    return payload
+
+
+def parse_sections(role, sections_arg, fields_args):
+    """Valida ?sections=a,b y ?fields[sección]=x,y. Sin sections: todas las que permite el rol."""
+    if sections_arg:
+        names = [name.strip() for name in sections_arg.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SECTIONS]
+        if unknown:
+            raise BadRequestError(f"Secciones desconocidas: {', '.join(unknown)}. Disponibles: {', '.join(SECTIONS)}")
+        forbidden = [name for name in names if role not in SECTIONS[name][0]]
+        if forbidden:
+            raise ForbiddenError(f"Tu rol no tiene acceso a: {', '.join(forbidden)}")
+    else:
+        names = [name for name, (roles, _, _) in SECTIONS.items() if role in roles]
+
+    fields = {}
+    for key, value in fields_args.items():
+        if not (key.startswith("fields[") and key.endswith("]")):
+            continue
+        section = key[len("fields["):-1]
+        if section not in SECTIONS:
+            raise BadRequestError(f"fields[{section}]: sección desconocida")
+        fields[section] = [field.strip() for field in value.split(",") if field.strip()]
+    return list(dict.fromkeys(names)), fields
+
+
+def build_dashboard(user, names, fields):
+    """Construye las secciones `names` para `user` (SystemUser ya validado)."""
+    ctx = _Context(user)
+    result = {"role": user.rol.value}
+    for name in names:
+        _, build, paths = SECTIONS[name]
+        payload = build(ctx)
+        if name in fields:
+            payload = _select_fields(payload, paths, fields[name])
+        result[name] = payload
+    return result
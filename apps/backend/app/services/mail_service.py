@@ -1,6 +1,7 @@
 from jinja2 import TemplateNotFound
 from flask_mail import Message
 from app.extensions import mail
+from app.utils.metrics import track_email
 from flask import render_template,current_app
 from flask_jwt_extended import create_access_token
 from app.exceptions import AppError,ValidationError
@@ -32,7 +33,8 @@ def send_reset_password_email(user_email: str)-> bool:
         html = render_template("emails/reset.html",reset_url=reset_url,minutes=minutes,app_name=current_app.config.get('APP_NAME') )
     
         msg = Message(subject=f"{current_app.config.get('APP_NAME')} - Restablece Tu Contraseña",recipients=[user_email],html=html)
-        mail.send(msg)
+        with track_email("reset_password"):
+            mail.send(msg)
         current_app.logger.info("Reset-password email sent to %s", user_email)
         
     except TemplateNotFound as template_error:
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app, send_file, url_for
+from sqlalchemy import delete, func, or_, select, update
+from app.extensions import db
+from app.models.attendance import Attendance
+from app.models.css import Css
+from app.models.report_jobs import ReportJob, ReportJobStatus
+from app.models.sessions import Session
+from app.models.user import SystemUser
+from app.models.workshop_users import WorkshopUser
+from app.models.workshops import Workshop
+from app.services.attendance_service import attendance_detail, css_summary, workshop_matrix
+from app.utils.db_routing import primary_bind
+from app.utils.exports import EXPORT_FORMAT_VERSION, export_chunks, export_filename, export_mimetype, export_response
+
+# INFORMES EN SEGUNDO PLANO CON RESULTADO EN CACHÉ
+# Los informes pesados (resumen anual de un CSS, detalle de todos los talleres para un administrador) se piden con
+# POST /attendance/reports/jobs y los genera `flask report-worker` (app/utils/report_worker.py) fuera de la
+# petición. El fichero se guarda en REPORT_JOBS_DIR con nombre = cache_key, un hash de informe + parámetros +
+# formato + versión de los datos (MAX de recorded_at/updated_at y recuentos de las tablas que leen los informes).
+# La clave incluye también EXPORT_FORMAT_VERSION: los ficheros de un formato anterior no se reutilizan.
+# Mientras los datos no cambien, volver a pedir el mismo informe (por job o por las rutas /export) devuelve el
+# fichero ya generado sin tocar las tablas grandes. Los ficheros y trabajos caducan a las
+# REPORT_JOBS_RETENTION_HOURS.
+
+REPORT_JOBS_RETENTION_HOURS = 72
+REPORT_JOB_TIMEOUT_SECONDS = 1800
+REPORT_JOB_MAX_ATTEMPTS = 2
+FINISHED = (ReportJobStatus.DONE, ReportJobStatus.FAILED)
+
+
+def _workshop_matrix_report(params):
+    name = db.session.execute(select(Workshop.name).where(Workshop.id == params["workshop_id"])).scalar()
+    return export_filename("asistencia", name), "Asistencia", lambda: workshop_matrix(params["workshop_id"])
+
+
+def _css_summary_report(params):
+    name = db.session.execute(select(Css.name).where(Css.id == params["css_id"])).scalar()
+    start, end = datetime.fromisoformat(params["from"]).date(), datetime.fromisoformat(params["to"]).date()
+    return (export_filename("resumen", name, params["from"], params["to"]), "Resumen",
+            lambda: css_summary(params["css_id"], start, end))
+
+
+def _attendance_detail_report(params):
+    start, end = datetime.fromisoformat(params["from"]).date(), datetime.fromisoformat(params["to"]).date()
+    return (export_filename("asistencias", params["from"], params["to"]), "Asistencias",
+            lambda: attendance_detail(start, end, css_id=params.get("css_id"), workshop_id=params.get("workshop_id")))
+
+
+# informe -> función(params) que devuelve (nombre de fichero, hoja, build); build() = (cabecera, filas)
+REPORTS = {
+    "workshop_matrix": _workshop_matrix_report,
+    "css_summary": _css_summary_report,
+    "attendance_detail": _attendance_detail_report,
+}
+
+
+def init_report_jobs(app):
+    app.config.setdefault("REPORT_JOBS_DIR", os.getenv("REPORT_JOBS_DIR", os.path.join(app.instance_path, "report_jobs")))
+    app.config.setdefault("REPORT_JOBS_RETENTION_HOURS",
+                          float(os.getenv("REPORT_JOBS_RETENTION_HOURS", REPORT_JOBS_RETENTION_HOURS)))
+    app.config.setdefault("REPORT_JOB_TIMEOUT_SECONDS",
+                          int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", REPORT_JOB_TIMEOUT_SECONDS)))
+    # /reports/jobs/<id>/events: cada cuánto se mira el estado y cuánto dura como mucho una conexión SSE
+    app.config.setdefault("REPORT_JOBS_SSE_POLL_SECONDS", float(os.getenv("REPORT_JOBS_SSE_POLL_SECONDS", 1)))
+    app.config.setdefault("REPORT_JOBS_SSE_SECONDS", int(os.getenv("REPORT_JOBS_SSE_SECONDS", 55)))
+    # true = POST /reports/jobs genera el informe en la propia petición (desarrollo, sin worker)
+    app.config.setdefault("REPORT_JOBS_EAGER", os.getenv("REPORT_JOBS_EAGER", "false").lower() == "true")
+
+
+def data_version():
+    """Huella de los datos que leen los informes, en una consulta. Las asistencias nunca se borran y al
+    editarlas se actualiza recorded_at; el resto de tablas cambia updated_at o el recuento."""
+    def scalar(*columns):
+        return select(*columns).scalar_subquery()
+
+    row = db.session.execute(select(
+        scalar(func.max(Attendance.recorded_at)), scalar(func.max(Attendance.id)),
+        scalar(func.max(Session.updated_at)), scalar(func.count(Session.id)),
+        scalar(func.max(Workshop.updated_at)), scalar(func.count(Workshop.id)),
+        scalar(func.count(WorkshopUser.id)), scalar(func.max(WorkshopUser.id)),
+        scalar(func.max(SystemUser.updated_at)), scalar(func.count(SystemUser.id)),
+        scalar(func.max(Css.updated_at)),
+    )).one()
+    return hashlib.sha1("|".join(str(value) for value in row).encode()).hexdigest()
+
+
+def report_key(report, params, fmt, version):
+    payload = json.dumps([report, params, fmt, EXPORT_FORMAT_VERSION, version], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _artifact_path(key, fmt):
+    return os.path.join(current_app.config["REPORT_JOBS_DIR"], f"{key}.{fmt}")
+
+
+def _cached_artifact(key, fmt):
+    """Ruta del fichero en caché o None. Usarlo alarga su vida (la limpieza va por fecha de modificación)."""
+    path = _artifact_path(key, fmt)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _cache_chunks(chunks, path):
+    """Deja pasar los trozos y a la vez los escribe en un temporal junto a `path`. Solo si se completa se
+    renombra (atómico) y queda en caché; si el cliente corta la descarga o falla el informe se borra."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+                yield chunk
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def export_report(report, params, fmt):
+    """Descarga inmediata (rutas /export): el fichero en caché si los datos no han cambiado; si no, se genera en
+    streaming y se guarda para la próxima vez."""
+    filename, sheet_title, build = REPORTS[report](params)
+    key = report_key(report, params, fmt, data_version())
+    cached = _cached_artifact(key, fmt)
+    if cached:
+        return send_file(cached, mimetype=export_mimetype(fmt), as_attachment=True,
+                         download_name=f"{filename}.{fmt}", conditional=True, etag=key)
+    header, rows = build()
+    return export_response(fmt, filename, _cache_chunks(export_chunks(fmt, sheet_title, header, rows),
+                                                        _artifact_path(key, fmt)))
+
+
+def request_report(report, params, fmt, user_id):
+    """Crea el trabajo. Si el fichero ya está en caché el trabajo nace terminado (cached=True)."""
+    version = data_version()
+    key = report_key(report, params, fmt, version)
+    job = ReportJob(report=report, params=json.dumps(params, sort_keys=True), format=fmt, data_version=version,
+                    cache_key=key, requested_by=user_id)
+    cached = _cached_artifact(key, fmt)
+    if cached:
+        filename, _, _ = REPORTS[report](params)
+        # filas del trabajo que generó el fichero (si sigue en la tabla)
+        rows = db.session.execute(
+            select(ReportJob.rows).where(ReportJob.cache_key == key, ReportJob.status == ReportJobStatus.DONE)
+            .order_by(ReportJob.id.desc()).limit(1)
+        ).scalar()
+        now = datetime.now(timezone.utc)
+        job.status, job.cached, job.filename = ReportJobStatus.DONE, True, f"{filename}.{fmt}"
+        job.size, job.rows, job.started_at, job.finished_at = os.path.getsize(cached), rows, now, now
+    db.session.add(job)
+    db.session.commit()
+    if job.status == ReportJobStatus.PENDING and current_app.config["REPORT_JOBS_EAGER"]:
+        run_job(job.id)
+        db.session.refresh(job)
+    return job
+
+
+def claim_next_job():
+    """Marca como RUNNING el trabajo pendiente más antiguo y devuelve su id (None si no hay).
+    El UPDATE ... WHERE status = PENDING hace que dos workers no cojan el mismo."""
+    now = datetime.now(timezone.utc)
+    _requeue_stale(now)
+    while True:
+        job_id = db.session.execute(
+            select(ReportJob.id).where(ReportJob.status == ReportJobStatus.PENDING).order_by(ReportJob.id).limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        claimed = db.session.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, ReportJob.status == ReportJobStatus.PENDING)
+            .values(status=ReportJobStatus.RUNNING, started_at=now, attempts=ReportJob.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id
+
+
+def _requeue_stale(now):
+    """Trabajos RUNNING de un worker que murió: se reintentan hasta REPORT_JOB_MAX_ATTEMPTS y luego fallan."""
+    stale = ReportJob.status == ReportJobStatus.RUNNING, \
+        ReportJob.started_at < now - timedelta(seconds=current_app.config["REPORT_JOB_TIMEOUT_SECONDS"])
+    db.session.execute(update(ReportJob).where(*stale, ReportJob.attempts < REPORT_JOB_MAX_ATTEMPTS)
+                       .values(status=ReportJobStatus.PENDING))
+    db.session.execute(update(ReportJob).where(*stale)
+                       .values(status=ReportJobStatus.FAILED, finished_at=now,
+                               error="El worker no terminó el informe a tiempo"))
+    db.session.commit()
+
+
+def run_job(job_id):
+    """Genera el fichero de un trabajo RUNNING (o pendiente en modo eager). Si otro trabajo con la misma clave ya
+    lo dejó en caché solo se enlaza."""
+    job = db.session.get(ReportJob, job_id)
+    params = json.loads(job.params)
+    job.started_at = job.started_at or datetime.now(timezone.utc)
+    try:
+        filename, sheet_title, build = REPORTS[job.report](params)
+        path = _cached_artifact(job.cache_key, job.format)
+        rows = None
+        if path is None:
+            path = _artifact_path(job.cache_key, job.format)
+            header, source = build()
+            counter = {"rows": 0}
+
+            def counted():
+                for row in source:
+                    counter["rows"] += 1
+                    yield row
+
+            for _ in _cache_chunks(export_chunks(job.format, sheet_title, header, counted()), path):
+                pass
+            rows = counter["rows"]
+        job.status, job.filename, job.size, job.rows = (ReportJobStatus.DONE, f"{filename}.{job.format}",
+                                                        os.path.getsize(path), rows)
+        job.error = None
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("Informe %s (trabajo %s) fallido", job.report, job_id)
+        job = db.session.get(ReportJob, job_id)
+        job.status, job.error = ReportJobStatus.FAILED, str(exc)[:500]
+    job.finished_at = datetime.now(timezone.utc)
+    db.session.commit()
+    return job.status
+
+
+def cleanup_report_jobs(retention_hours=None):
+    """Borra trabajos terminados y ficheros sin usar más antiguos que la retención. Devuelve (trabajos, ficheros)."""
+    hours = current_app.config["REPORT_JOBS_RETENTION_HOURS"] if retention_hours is None else retention_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    jobs = db.session.execute(
+        delete(ReportJob).where(ReportJob.status.in_(FINISHED),
+                                or_(ReportJob.finished_at < cutoff, ReportJob.finished_at.is_(None)),
+                                ReportJob.created_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    files = 0
+    folder = current_app.config["REPORT_JOBS_DIR"]
+    if os.path.isdir(folder):
+        oldest = time.time() - hours * 3600
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+                files += 1
+    return jobs, files
+
+
+def report_job_state(job_id):
+    """Estado actual leído del primario, sin cargar el objeto (sondeo de /events). None si ya no existe."""
+    return db.session.execute(
+        select(ReportJob.status).where(ReportJob.id == job_id), bind_arguments=primary_bind()
+    ).scalar()
+
+
+def report_job_dict(job):
+    data = {
+        "id": job.id,
+        "report": job.report,
+        "params": json.loads(job.params),
+        "format": job.format,
+        "status": job.status.value,
+        "cached": job.cached,
+        "filename": job.filename,
+        "size": job.size,
+        "rows": job.rows,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "status_url": url_for("attendance.get_report_job", job_id=job.id),
+        "events_url": url_for("attendance.report_job_events", job_id=job.id),
+    }
+    if job.status == ReportJobStatus.DONE:
+        data["download_url"] = url_for("attendance.download_report_job", job_id=job.id)
+    return data
+
+
+def report_job_file(job):
+    """Ruta del fichero de un trabajo terminado, o None si ya caducó."""
+    path = _cached_artifact(job.cache_key, job.format)
+    return path if job.status == ReportJobStatus.DONE else None
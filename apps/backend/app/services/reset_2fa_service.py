@@ -2,6 +2,7 @@
 from jinja2 import TemplateNotFound
 from flask_mail import Message
 from app.extensions import mail
+from app.utils.metrics import track_email
 from flask import render_template, current_app
 from flask_jwt_extended import create_access_token
 from app.exceptions import AppError, ValidationError
@@ -52,7 +53,8 @@ def send_reset_2fa_email(user_email: str, user_name: str = None) -> bool:
             html=html
         )
         
-        mail.send(msg)
+        with track_email("reset_2fa"):
+            mail.send(msg)
         return True
         
     except TemplateNotFound:
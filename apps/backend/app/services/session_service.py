@@ -0,0 +1,105 @@
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.sessions import Session
+from app.models.thematic_areas import ThematicArea
+from app.models.user import SystemUser
+from app.models.workshop_users import WorkshopUser
+from app.models.workshops import Workshop
+
+# LISTADOS DE SESIONES (solo lectura)
+# Igual que en workshop_service: columnas justas con JOIN a taller y profesional y dicts construidos desde la
+# tupla, en el formato de Session.serialize().
+
+Professional = aliased(SystemUser, name="professional")
+
+
+def iter_sessions(*conditions, order_by=(Session.id,), batch=1000):
+    """Genera las sesiones que cumplen `conditions` como dicts, de `batch` en `batch`."""
+    stmt = (
+        select(
+            Session.id, Session.workshop_id, Workshop.name, Session.date, Session.start_time, Session.end_time,
+            Session.topic, Session.observations, Session.professional_id, Professional.name,
+            Professional.last_name, Session.status, Session.created_at, Session.updated_at,
+        )
+        .outerjoin(Workshop, Workshop.id == Session.workshop_id)
+        .outerjoin(Professional, Professional.id == Session.professional_id)
+        .where(*conditions)
+        .order_by(*order_by)
+        .execution_options(yield_per=batch)
+    )
+    for (session_id, workshop_id, workshop_name, day, start_time, end_time, topic, observations, professional_id,
+         prof_name, prof_last_name, status, created_at, updated_at) in db.session.execute(stmt):
+        yield {
+            "id": session_id,
+            "workshop_id": workshop_id,
+            "workshop_name": workshop_name,
+            "date": day,
+            "start_time": start_time.strftime('%H:%M') if start_time else None,
+            "end_time": end_time.strftime('%H:%M') if end_time else None,
+            "topic": topic,
+            "observations": observations,
+            "professional_id": professional_id,
+            "professional_name": f"{prof_name} {prof_last_name}" if prof_name is not None else None,
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+
+def iter_schedule_sessions(*conditions, batch=1000):
+    """Sesiones en el formato de las categorías de /sessions/schedule, por fecha y hora."""
+    stmt = (
+        select(
+            Session.id, Session.workshop_id, Workshop.name, ThematicArea.id, ThematicArea.color, Session.date,
+            Session.start_time, Session.end_time, Session.topic, Session.status, Session.observations,
+            Workshop.location,
+        )
+        .join(Workshop, Workshop.id == Session.workshop_id)
+        .outerjoin(ThematicArea, ThematicArea.id == Workshop.thematic_area_id)
+        .where(*conditions)
+        .order_by(Session.date.asc(), Session.start_time.asc(), Session.id)
+        .execution_options(yield_per=batch)
+    )
+    for (session_id, workshop_id, workshop_name, area_id, color, day, start_time, end_time, topic, status,
+         observations, location) in db.session.execute(stmt):
+        yield {
+            "id": session_id,
+            "workshop_id": workshop_id,
+            "workshop_name": workshop_name,
+            "workshop_color": color if area_id is not None else '#E9531A',
+            "date": day,
+            "day_of_week": day.strftime('%A'),  # Monday, Tuesday, etc.
+            "start_time": start_time.strftime('%H:%M'),
+            "end_time": end_time.strftime('%H:%M'),
+            "topic": topic,
+            "status": status,
+            "observations": observations,
+            "location": location
+        }
+
+
+def enrolled_workshop_ids(user_id):
+    """Subconsulta con los talleres donde el usuario está inscrito (sin lista de espera)."""
+    return (
+        select(WorkshopUser.workshop_id)
+        .where(WorkshopUser.user_id == user_id, WorkshopUser.waitlist_position.is_(None))
+        .scalar_subquery()
+    )
+
+
+def iter_enrolled_sessions(user_id, batch=1000):
+    """Sesiones (pasadas y futuras) de los talleres del cliente, las más recientes primero."""
+    return iter_sessions(
+        Session.workshop_id.in_(enrolled_workshop_ids(user_id)),
+        order_by=(Session.date.desc(), Session.start_time.desc()),
+        batch=batch,
+    )
+
+
+def is_enrolled_anywhere(user_id):
+    return db.session.execute(
+        select(WorkshopUser.id)
+        .where(WorkshopUser.user_id == user_id, WorkshopUser.waitlist_position.is_(None))
+        .limit(1)
+    ).first() is not None
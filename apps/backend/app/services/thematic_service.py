@@ -0,0 +1,14 @@
+from app.models.thematic_areas import ThematicArea
+from app.extensions import db
+from app.utils.reference_cache import reference_cache
+
+
+@reference_cache.loader("thematic_areas")
+def load_thematic_areas():
+    """Listado de áreas temáticas para selects del frontend (cacheado por worker)"""
+    rows = db.session.execute(
+        db.select(ThematicArea.id, ThematicArea.name).order_by(ThematicArea.id)
+    ).all()
+    return {
+        "thematic_areas": [{"id": area_id, "name": name} for area_id, name in rows]
+    }
@@ -0,0 +1,82 @@
+import math
+from sqlalchemy import case, func, select
+from app.extensions import db
+from app.models.css import Css
+from app.models.user import SystemUser
+
+# LISTADO DE USUARIOS DEL PANEL DE ADMINISTRACIÓN (solo lectura)
+# Columnas justas con LEFT JOIN al CSS (antes: objetos ORM completos + un lazy load de user.css por fila) y
+# estadísticas en una sola consulta agregada en lugar de tres/cinco COUNT.
+
+
+def _users_select(*columns):
+    return select(*columns).select_from(SystemUser).outerjoin(Css, Css.id == SystemUser.css_id)
+
+
+def _user_rows(stmt):
+    for (user_id, email, name, last_name, dni, phone, rol, is_active, two_factor_enabled, created_at,
+         last_login, birth_date, age, css_id, css_pk, css_name, css_code, css_address) in db.session.execute(stmt):
+        yield {
+            "id": user_id,
+            "email": email,
+            "name": name,
+            "last_name": last_name,
+            "dni": dni,
+            "phone": phone,
+            "rol": rol,
+            "is_active": is_active,
+            "two_factor_enabled": two_factor_enabled,
+            "created_at": created_at,
+            "last_login": last_login,
+            "birth_date": birth_date,
+            "age": age,
+            "css_id": css_id,
+            "css_info": {
+                "id": css_pk,
+                "name": css_name,
+                "code": css_code,
+                "address": css_address
+            } if css_pk is not None else None
+        }
+
+
+def _list_select(conditions):
+    return (
+        _users_select(
+            SystemUser.id, SystemUser.email, SystemUser.name, SystemUser.last_name, SystemUser.dni,
+            SystemUser.phone, SystemUser.rol, SystemUser.is_active, SystemUser.two_factor_enabled,
+            SystemUser.created_at, SystemUser.last_login, SystemUser.birth_date, SystemUser.age,
+            SystemUser.css_id, Css.id, Css.name, Css.code, Css.address,
+        )
+        .where(*conditions)
+        .order_by(SystemUser.created_at.desc(), SystemUser.id.desc())
+    )
+
+
+def page_users(conditions, page, per_page):
+    """Página de usuarios (más recientes primero) que cumplen `conditions` (pueden usar columnas de Css).
+    Devuelve (filas como dicts, total, páginas); page/per_page inválidos se corrigen como en paginate()."""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    total = db.session.execute(_users_select(func.count(SystemUser.id)).where(*conditions)).scalar()
+    users = list(_user_rows(_list_select(conditions).limit(per_page).offset((page - 1) * per_page)))
+    return users, total, math.ceil(total / per_page) if total else 0
+
+
+def iter_users(conditions, batch=1000):
+    """Todos los usuarios que cumplen `conditions`, de `batch` en `batch` (per_page=all)."""
+    return _user_rows(_list_select(conditions).execution_options(yield_per=batch))
+
+
+def user_stats(css_id=None):
+    """(total, activos, con 2FA, total del CSS, activos del CSS) en una consulta; los del CSS son None sin css_id."""
+    def counts(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    columns = [func.count(SystemUser.id), counts(SystemUser.is_active.is_(True)),
+               counts(SystemUser.two_factor_enabled.is_(True))]
+    if css_id is not None:
+        columns += [counts(SystemUser.css_id == css_id),
+                    counts((SystemUser.css_id == css_id) & SystemUser.is_active.is_(True))]
+    row = db.session.execute(select(*columns)).one()
+    return tuple(row) + ((None, None) if css_id is None else ())
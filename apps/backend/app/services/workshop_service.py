@@ -0,0 +1,83 @@
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.css import Css
+from app.models.thematic_areas import ThematicArea
+from app.models.user import SystemUser
+from app.models.workshops import Workshop
+
+# LISTADOS DE TALLERES (solo lectura)
+# Selecciona solo las columnas que devuelve la API con un JOIN a área, CSS y profesional y construye cada dict
+# desde la tupla: sin objetos ORM, sin identity map ni lazy loads por fila. Mismo formato que Workshop.serialize().
+
+Professional = aliased(SystemUser, name="professional")
+
+
+def iter_workshops(*conditions, batch=1000):
+    """Genera los talleres que cumplen `conditions` (expresiones sobre Workshop) como dicts, de `batch` en `batch`."""
+    stmt = (
+        select(
+            Workshop.id, Workshop.name, Workshop.description, Workshop.thematic_area_id, ThematicArea.name,
+            Workshop.css_id, Css.name, Workshop.professional_id, Professional.name, Professional.last_name,
+            Workshop.max_capacity, Workshop.current_capacity, Workshop.start_time, Workshop.end_time,
+            Workshop.week_days, Workshop.start_date, Workshop.end_date, Workshop.location,
+            Workshop.session_duration, Workshop.status, Workshop.observations, Workshop.created_by,
+            Workshop.created_at, Workshop.updated_at,
+        )
+        .outerjoin(ThematicArea, ThematicArea.id == Workshop.thematic_area_id)
+        .outerjoin(Css, Css.id == Workshop.css_id)
+        .outerjoin(Professional, Professional.id == Workshop.professional_id)
+        .where(*conditions)
+        .order_by(Workshop.id)
+        .execution_options(yield_per=batch)
+    )
+    for (workshop_id, name, description, area_id, area_name, css_id, css_name, professional_id, prof_name,
+         prof_last_name, max_capacity, current_capacity, start_time, end_time, week_days, start_date, end_date,
+         location, session_duration, status, observations, created_by, created_at, updated_at) in db.session.execute(stmt):
+        yield {
+            "id": workshop_id,
+            "name": name,
+            "description": description,
+            "thematic_area_id": area_id,
+            "thematic_area_name": area_name,
+            "css_id": css_id,
+            "css_name": css_name,
+            "professional_id": professional_id,
+            "professional_name": f"{prof_name} {prof_last_name}" if prof_name is not None else None,
+            "max_capacity": max_capacity,
+            "current_capacity": current_capacity,
+            "available_spots": max_capacity - current_capacity,
+            "start_time": start_time.strftime('%H:%M') if start_time else None,
+            "end_time": end_time.strftime('%H:%M') if end_time else None,
+            "week_days": week_days,
+            "start_date": start_date,
+            "end_date": end_date,
+            "location": location,
+            "session_duration": session_duration,
+            "status": status,
+            "observations": observations,
+            "created_by": created_by,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+
+def iter_schedule_workshops(*conditions, batch=1000):
+    """Talleres en el formato resumido de /sessions/schedule."""
+    stmt = (
+        select(Workshop.id, Workshop.name, ThematicArea.id, ThematicArea.color, Workshop.week_days,
+               Workshop.start_time, Workshop.end_time)
+        .outerjoin(ThematicArea, ThematicArea.id == Workshop.thematic_area_id)
+        .where(*conditions)
+        .order_by(Workshop.id)
+        .execution_options(yield_per=batch)
+    )
+    for workshop_id, name, area_id, color, week_days, start_time, end_time in db.session.execute(stmt):
+        yield {
+            "id": workshop_id,
+            "name": name,
+            "color": color if area_id is not None else '#E9531A',
+            "week_days": week_days,
+            "start_time": start_time.strftime('%H:%M'),
+            "end_time": end_time.strftime('%H:%M')
+        }
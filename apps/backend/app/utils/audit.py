@@ -0,0 +1,275 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event, insert, inspect
+from app.extensions import db
+from app.models.attendance import Attendance
+from app.models.audit_logs import AuditLog
+from app.models.user import SystemUser
+from app.models.workshop_users import WorkshopUser
+from app.models.workshops import Workshop
+
+# AUDITORÍA AUTOMÁTICA (tabla audit_logs)
+# Los eventos de la sesión detectan en cada flush los cambios auditados (cambios de rol y de estado de usuarios
+# y su borrado definitivo, de estado/profesional/centro de talleres, inscripciones y bajas, correcciones de asistencia) sin tocar las
+# rutas. Modos (AUDIT_MODE):
+#   async (defecto)  los registros se encolan al hacer commit y un hilo por worker los inserta en lotes
+#                    (un INSERT multi-fila cada AUDIT_FLUSH_INTERVAL s o cada AUDIT_BATCH_SIZE registros):
+#                    la petición no espera a la auditoría. Si el proceso muere de golpe se pierde lo encolado.
+#                    Un lote que falla se reintenta AUDIT_WRITE_RETRIES veces (espera creciente desde
+#                    AUDIT_RETRY_BACKOFF s); si sigue fallando se inserta fila a fila y solo se descartan (con su
+#                    clave en el log) las filas que fallan.
+#   sync             un INSERT multi-fila en la misma transacción que el cambio (atómico, algo más lento)
+#   off              sin auditoría
+
+logger = logging.getLogger("app.audit")
+
+# Modelo -> (campos que se guardan, acciones auditadas). En UPDATE solo cuenta si cambia alguno de los campos.
+AUDITED = {
+    SystemUser: (("rol", "is_active", "css_id"), ("UPDATE", "DELETE")),
+    WorkshopUser: (("user_id", "workshop_id", "waitlist_position", "unassignment_reason"), ("INSERT", "UPDATE", "DELETE")),
+    Attendance: (("session_id", "user_id", "present", "observations"), ("UPDATE", "DELETE")),
+    Workshop: (("status", "professional_id", "css_id"), ("UPDATE",)),
+}
+_COLUMNS = ("table_name", "record_id", "action", "old_data", "new_data", "user_id", "ip_address", "user_agent",
+            "created_at", "role_assigned_by", "role_assignment_date")
+
+
+def _plain(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def _actor():
+    """(user_id, ip, user_agent) de quien hace el cambio, si estamos en una petición autenticada.
+    Se calcula una vez por petición: una ruta puede hacer varios flush (autoflush en cada consulta)."""
+    if not has_request_context():
+        return None, None, None
+    actor = g.get("_audit_actor")
+    if actor is None:
+        try:
+            from flask_jwt_extended import get_jwt_identity
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        user_agent = request.user_agent.string[:500] if request.user_agent.string else None
+        actor = g._audit_actor = ((int(identity) if identity is not None else None), request.remote_addr, user_agent)
+    return actor
+
+
+def _record(action, obj, actor, now, old=None, new=None):
+    # old_data/new_data se quedan como dict: se serializan al escribir (en el hilo, en modo async)
+    user_id, ip, user_agent = actor
+    row = dict.fromkeys(_COLUMNS)
+    row.update(
+        table_name=obj.__tablename__, record_id=obj.id, action=action, old_data=old or None, new_data=new or None,
+        user_id=user_id, ip_address=ip, user_agent=user_agent, created_at=now,
+    )
+    if isinstance(obj, SystemUser) and new and "rol" in new:
+        row.update(role_assigned_by=user_id, role_assignment_date=now)
+    return row
+
+
+def _serialize(rows, dumps):
+    for row in rows:
+        if row["old_data"] is not None:
+            row["old_data"] = dumps(row["old_data"])
+        if row["new_data"] is not None:
+            row["new_data"] = dumps(row["new_data"])
+    return rows
+
+
+def _collect(session, flush_context):
+    """after_flush: los ids ya existen y el historial de atributos aún tiene los valores anteriores."""
+    mode = current_app.config["AUDIT_MODE"]
+    if mode == "off":
+        return
+    rows = []
+    actor = None
+    now = datetime.now(timezone.utc)
+    for action, objects in (("INSERT", session.new), ("UPDATE", session.dirty), ("DELETE", session.deleted)):
+        for obj in objects:
+            audited = AUDITED.get(type(obj))
+            if audited is None or action not in audited[1]:
+                continue
+            fields = audited[0]
+            if actor is None:
+                actor = _actor()
+            if action == "INSERT":
+                rows.append(_record(action, obj, actor, now, new={f: _plain(getattr(obj, f)) for f in fields}))
+            elif action == "DELETE":
+                rows.append(_record(action, obj, actor, now, old={f: _plain(getattr(obj, f)) for f in fields}))
+            else:
+                state = inspect(obj)
+                old, new = {}, {}
+                for field in fields:
+                    history = state.attrs[field].history
+                    if not history.has_changes():
+                        continue
+                    old[field] = _plain(history.deleted[0]) if history.deleted else None
+                    new[field] = _plain(history.added[0]) if history.added else None
+                if new:
+                    rows.append(_record(action, obj, actor, now, old=old, new=new))
+    if not rows:
+        return
+    if mode == "sync":
+        session.connection().execute(insert(AuditLog.__table__), _serialize(rows, current_app.json.dumps))
+    else:
+        session.info.setdefault("_audit_pending", []).extend(rows)
+
+
+def _after_commit(session):
+    rows = session.info.pop("_audit_pending", None)
+    if rows:
+        _writer.enqueue(rows)
+
+
+def _after_rollback(session):
+    session.info.pop("_audit_pending", None)
+
+
+class AuditWriter:
+    """Cola en memoria + hilo que la vacía en lotes. Uno por proceso (el hilo se arranca al primer uso,
+    así los workers de gunicorn con preload no heredan un hilo del maestro que no existe tras el fork)."""
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = 500
+        self.interval = 1.0
+        self.max_queue = 50000
+        self.retries = 3
+        self.backoff = 0.5
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+
+    def enqueue(self, rows):
+        if self._pid != os.getpid():
+            self._reset()
+        with self._cond:
+            overflow = len(self._queue) + len(rows) - self.max_queue
+            if overflow > 0:
+                # BD caída o muy lenta: descartamos lo más antiguo antes que quedarnos sin memoria
+                for _ in range(min(overflow, len(self._queue))):
+                    self._queue.popleft()
+                self.dropped += overflow
+            self._queue.extend(rows)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _write(self, rows):
+        # Se serializa una vez: _serialize modifica las filas y los reintentos las reutilizan
+        rows = _serialize(rows, self.app.json.dumps)
+        for attempt in range(self.retries + 1):
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(AuditLog.__table__), rows)
+                self.written += len(rows)
+                return
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception("Lote de %d registros de auditoría fallido tras %d reintentos; "
+                                     "se guarda fila a fila", len(rows), self.retries)
+                else:
+                    logger.warning("Lote de %d registros de auditoría fallido (intento %d), se reintenta",
+                                   len(rows), attempt + 1, exc_info=True)
+                    time.sleep(self.backoff * 2 ** attempt)
+        self._write_rows(rows)
+
+    def _write_rows(self, rows):
+        """Una transacción por fila: solo se pierden las filas que fallan (p.ej. por una restricción)."""
+        with self.app.app_context():
+            try:
+                conn = db.engine.connect()
+            except Exception:
+                logger.exception("Sin conexión a la BD para guardar la auditoría")
+                for row in rows:
+                    self._drop(row)
+                return
+            with conn:
+                for row in rows:
+                    try:
+                        with conn.begin():
+                            conn.execute(insert(AuditLog.__table__), [row])
+                        self.written += 1
+                    except Exception:
+                        self._drop(row)
+
+    def _drop(self, row):
+        self.dropped += 1
+        logger.error("Registro de auditoría descartado: %s id=%s %s %s usuario=%s", row["table_name"],
+                     row["record_id"], row["action"], row["created_at"], row["user_id"])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._queue) < self.batch_size:
+                    self._cond.wait(self.interval)
+            rows = self._take()
+            while rows:
+                self._write(rows)
+                rows = self._take() if len(self._queue) >= self.batch_size else []
+
+    def flush(self):
+        """Escribe ya todo lo encolado (al salir del proceso, en benchmarks y comandos)."""
+        if self.app is None or self._pid != os.getpid():
+            return
+        rows = self._take()
+        while rows:
+            self._write(rows)
+            rows = self._take()
+
+    def stats(self):
+        return {"pending": len(self._queue), "written": self.written, "dropped": self.dropped}
+
+
+_writer = AuditWriter()
+
+
+def flush_audit():
+    _writer.flush()
+
+
+def audit_stats():
+    """Estado de la cola de auditoría de este worker."""
+    return _writer.stats()
+
+
+def init_audit(app):
+    """Registra la auditoría automática sobre db.session."""
+    app.config.setdefault("AUDIT_MODE", os.getenv("AUDIT_MODE", "async").lower())
+    app.config.setdefault("AUDIT_BATCH_SIZE", int(os.getenv("AUDIT_BATCH_SIZE", 500)))
+    app.config.setdefault("AUDIT_FLUSH_INTERVAL", float(os.getenv("AUDIT_FLUSH_INTERVAL", 1.0)))
+    app.config.setdefault("AUDIT_WRITE_RETRIES", int(os.getenv("AUDIT_WRITE_RETRIES", 3)))
+    app.config.setdefault("AUDIT_RETRY_BACKOFF", float(os.getenv("AUDIT_RETRY_BACKOFF", 0.5)))
+    if app.config["AUDIT_MODE"] not in ("async", "sync", "off"):
+        raise ValueError(f"AUDIT_MODE desconocido: {app.config['AUDIT_MODE']} (opciones: async, sync, off)")
+
+    _writer.app = app
+    _writer.batch_size = app.config["AUDIT_BATCH_SIZE"]
+    _writer.interval = app.config["AUDIT_FLUSH_INTERVAL"]
+    _writer.retries = app.config["AUDIT_WRITE_RETRIES"]
+    _writer.backoff = app.config["AUDIT_RETRY_BACKOFF"]
+    if not event.contains(db.session, "after_flush", _collect):
+        event.listen(db.session, "after_flush", _collect)
+        event.listen(db.session, "after_commit", _after_commit)
+        event.listen(db.session, "after_rollback", _after_rollback)
+        atexit.register(flush_audit)
@@ -0,0 +1,279 @@
+import gzip
+import os
+import re
+from datetime import date, datetime
+import click
+from flask import current_app
+from sqlalchemy import Column, Index, MetaData, PrimaryKeyConstraint, Table, func, inspect, insert, select, text
+from app.extensions import db
+from app.models.audit_logs import AuditLog
+
+# ALMACENAMIENTO DE audit_logs POR MESES
+# Postgres (tras la migración 85135ec61f52): audit_logs es una tabla particionada por RANGE(created_at) con una
+#   partición por mes (audit_logs_pAAAAMM) y audit_logs_default para lo que no encaje. Las consultas por fecha
+#   solo tocan las particiones del rango y borrar un mes es un DROP de su partición.
+# SQLite y demás (o Postgres sin la migración): audit_logs es la tabla "caliente" del mes en curso y
+#   `flask audit-partitions` rota los meses cerrados a tablas audit_logs_pAAAAMM con los mismos índices.
+# En ambos casos `flask audit-retention` exporta los meses antiguos a audit_logs_pAAAAMM.jsonl.gz y los elimina.
+
+PARTITION_RE = re.compile(r"^audit_logs_p(\d{4})(\d{2})$")
+DEFAULT_PARTITION = "audit_logs_default"
+
+_metadata = MetaData()
+_tables = {}
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_month(day, n=1):
+    month = day.month - 1 + n
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"audit_logs_p{month:%Y%m}"
+
+
+def partition_month(name):
+    match = PARTITION_RE.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def month_bounds(month):
+    # created_at se guarda sin zona (UTC)
+    return datetime(month.year, month.month, 1), datetime.combine(add_month(month), datetime.min.time())
+
+
+def partition_table(name):
+    """Table de SQLAlchemy para una partición o tabla rotada: mismas columnas que audit_logs, PK (id, created_at)
+    como en Postgres (los id no se reasignan al mover filas)."""
+    table = _tables.get(name)
+    if table is None:
+        source = AuditLog.__table__
+        table = Table(name, _metadata, *(Column(c.name, c.type, nullable=c.nullable) for c in source.columns),
+                      PrimaryKeyConstraint("id", "created_at"))
+        Index(f"ix_{name}_record", table.c.table_name, table.c.record_id, table.c.created_at)
+        Index(f"ix_{name}_user", table.c.user_id, table.c.created_at)
+        Index(f"ix_{name}_created_at", table.c.created_at)
+        _tables[name] = table
+    return table
+
+
+def is_native(conn):
+    """True si audit_logs es una tabla particionada de Postgres."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('audit_logs')")).scalar() == "p"
+
+
+def _native_partitions(conn):
+    return conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'audit_logs'::regclass ORDER BY c.relname"
+    )).scalars().all()
+
+
+def _rotated_tables(conn):
+    return sorted(name for name in inspect(conn).get_table_names() if PARTITION_RE.match(name))
+
+
+def audit_tables(conn, since=None, until=None):
+    """Tablas a consultar para un rango de created_at. Con particionado nativo basta la tabla padre
+    (Postgres descarta solo las particiones fuera del rango); con rotación, la caliente + los meses que solapan,
+    del más reciente al más antiguo."""
+    if is_native(conn):
+        return [AuditLog.__table__]
+    tables = [AuditLog.__table__]
+    for name in reversed(_rotated_tables(conn)):
+        start, end = month_bounds(partition_month(name))
+        if (since is None or end > since) and (until is None or start < until):
+            tables.append(partition_table(name))
+    return tables
+
+
+def list_partitions():
+    """Particiones (o tablas rotadas) con su mes y nº de filas aproximado en Postgres / exacto en el resto."""
+    with db.engine.connect() as conn:
+        if is_native(conn):
+            stats = dict(conn.execute(text(
+                "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'audit_logs'::regclass"
+            )).all())
+            names = sorted(stats)
+            mode = "native"
+        else:
+            names = ["audit_logs"] + _rotated_tables(conn)
+            stats = {name: conn.execute(select(func.count()).select_from(
+                AuditLog.__table__ if name == "audit_logs" else partition_table(name))).scalar() for name in names}
+            mode = "rotation"
+    partitions = []
+    for name in names:
+        month = partition_month(name)
+        # reltuples es -1 en particiones que aún no se han analizado
+        partitions.append({"name": name, "month": month.isoformat() if month else None, "rows": max(int(stats[name]), 0)})
+    return {"mode": mode, "partitions": partitions}
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Postgres: crea las particiones del mes actual y los `months_ahead` siguientes (y las de los meses que
+    hayan caído en audit_logs_default). Rotación: mueve los meses cerrados de audit_logs a sus tablas.
+    Devuelve los nombres de las particiones creadas o rellenadas."""
+    current = month_start(today or date.today())
+    with db.engine.begin() as conn:
+        if is_native(conn):
+            return _ensure_native(conn, current, months_ahead)
+        return _rotate(conn, current)
+
+
+def _ensure_native(conn, current, months_ahead):
+    existing = set(_native_partitions(conn))
+    months = {add_month(current, n) for n in range(months_ahead + 1)}
+    if DEFAULT_PARTITION in existing:
+        months.update(row.date() for row in conn.execute(text(
+            f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}")).scalars())
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        start, end = month_bounds(month)
+        ddl = f"CREATE TABLE {name} PARTITION OF audit_logs FOR VALUES FROM ('{start}') TO ('{end}')"
+        stranded = DEFAULT_PARTITION in existing and conn.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+        ), {"start": start, "end": end}).scalar()
+        if stranded:
+            # Postgres no deja crear la partición si la default ya tiene filas de ese rango: se saca la default,
+            # se crea la partición, se mueven las filas y se vuelve a enganchar (todo en la misma transacción)
+            conn.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {DEFAULT_PARTITION}"))
+            conn.execute(text(ddl))
+            conn.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            ), {"start": start, "end": end})
+            conn.execute(text(f"ALTER TABLE audit_logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+        else:
+            conn.execute(text(ddl))
+        created.append(name)
+    return created
+
+
+def _rotate(conn, current):
+    hot = AuditLog.__table__
+    cutoff = month_bounds(current)[0]
+    oldest = conn.execute(select(func.min(hot.c.created_at)).where(hot.c.created_at < cutoff)).scalar()
+    if oldest is None:
+        return []
+    existing = set(_rotated_tables(conn))
+    rotated = []
+    month = month_start(oldest)
+    while month < current:
+        start, end = month_bounds(month)
+        in_range = (hot.c.created_at >= start) & (hot.c.created_at < end)
+        if conn.execute(select(hot.c.id).where(in_range).limit(1)).first():
+            table = partition_table(partition_name(month))
+            if table.name not in existing:
+                table.create(conn)
+            conn.execute(insert(table).from_select([c.name for c in hot.columns], select(*hot.columns).where(in_range)))
+            conn.execute(hot.delete().where(in_range))
+            rotated.append(table.name)
+        month = add_month(month)
+    return rotated
+
+
+def _archive(conn, table, where, path, dumps):
+    """Vuelca las filas a JSONL comprimido (tal cual están en la tabla). Se escribe a un .tmp y se renombra:
+    un archivo .jsonl.gz siempre está completo."""
+    tmp = f"{path}.tmp"
+    count = 0
+    result = conn.execution_options(stream_results=True, yield_per=5000).execute(
+        select(table).where(*where).order_by(table.c.created_at, table.c.id))
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        for row in result:
+            fh.write(dumps(dict(row._mapping)))
+            fh.write("\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def archive_partitions(before, archive_dir, dry_run=False):
+    """Exporta y elimina los meses anteriores a `before` (primer día de mes). Devuelve [(partición, filas, archivo)]."""
+    os.makedirs(archive_dir, exist_ok=True)
+    dumps = current_app.json.dumps
+    before = month_start(before)
+    done = []
+    with db.engine.begin() as conn:
+        native = is_native(conn)
+        if not native and not dry_run:
+            # Los meses cerrados que sigan en la tabla caliente también cuentan
+            _rotate(conn, month_start(date.today()))
+        names = _native_partitions(conn) if native else _rotated_tables(conn)
+    for name in names:
+        month = partition_month(name)
+        if month is None or month >= before:
+            continue
+        path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+        if dry_run:
+            done.append((name, None, path))
+            continue
+        # Una transacción por mes: si falla a mitad, lo ya archivado y borrado queda hecho
+        with db.engine.begin() as conn:
+            table = partition_table(name)
+            rows = _archive(conn, table, (), path, dumps)
+            if native:
+                conn.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+        done.append((name, rows, path))
+
+    if native and not dry_run:
+        # Filas viejas que acabaron en la default (no debería haber si se ejecuta audit-partitions)
+        with db.engine.begin() as conn:
+            if DEFAULT_PARTITION in _native_partitions(conn):
+                table = partition_table(DEFAULT_PARTITION)
+                where = (table.c.created_at < month_bounds(before)[0],)
+                if conn.execute(select(table.c.id).where(*where).limit(1)).first():
+                    path = os.path.join(archive_dir, f"{DEFAULT_PARTITION}_{before:%Y%m}.jsonl.gz")
+                    rows = _archive(conn, table, where, path, dumps)
+                    conn.execute(table.delete().where(*where))
+                    done.append((DEFAULT_PARTITION, rows, path))
+    return done
+
+
+def init_audit_storage(app):
+    """Config de retención y comandos `flask audit-partitions` / `flask audit-retention`."""
+    app.config.setdefault("AUDIT_RETENTION_MONTHS", int(os.getenv("AUDIT_RETENTION_MONTHS", 24)))
+    app.config.setdefault("AUDIT_ARCHIVE_DIR", os.getenv("AUDIT_ARCHIVE_DIR", os.path.join(app.instance_path, "audit_archive")))
+    app.config.setdefault("AUDIT_PARTITIONS_AHEAD", int(os.getenv("AUDIT_PARTITIONS_AHEAD", 3)))
+
+    @app.cli.command("audit-partitions")
+    @click.option("--months-ahead", type=click.IntRange(min=0), default=None,
+                  help="Meses futuros con partición ya creada (por defecto AUDIT_PARTITIONS_AHEAD).")
+    def audit_partitions(months_ahead):
+        """Crea las particiones mensuales de audit_logs (Postgres) o rota los meses cerrados (SQLite)."""
+        ahead = app.config["AUDIT_PARTITIONS_AHEAD"] if months_ahead is None else months_ahead
+        changed = ensure_partitions(ahead)
+        click.echo(f"Particiones creadas/rotadas: {', '.join(changed) if changed else 'ninguna'}")
+        info = list_partitions()
+        click.echo(f"Modo {info['mode']}:")
+        for part in info["partitions"]:
+            click.echo(f"  {part['name']:<24}{part['rows']:>12}")
+
+    @app.cli.command("audit-retention")
+    @click.option("--months", type=click.IntRange(min=1), default=None,
+                  help="Meses que se conservan además del actual (por defecto AUDIT_RETENTION_MONTHS).")
+    @click.option("--archive-dir", type=click.Path(file_okay=False), default=None,
+                  help="Carpeta de los .jsonl.gz (por defecto AUDIT_ARCHIVE_DIR).")
+    @click.option("--dry-run", is_flag=True, help="Solo lista lo que se archivaría.")
+    def audit_retention(months, archive_dir, dry_run):
+        """Exporta a JSONL comprimido los meses de audit_logs fuera de la retención y los elimina."""
+        keep = app.config["AUDIT_RETENTION_MONTHS"] if months is None else months
+        before = add_month(month_start(date.today()), -keep)
+        folder = archive_dir or app.config["AUDIT_ARCHIVE_DIR"]
+        click.echo(f"Archivando audit_logs anterior a {before} en {folder}{' (dry run)' if dry_run else ''}")
+        done = archive_partitions(before, folder, dry_run=dry_run)
+        for name, rows, path in done:
+            click.echo(f"  {name}: {'-' if rows is None else rows} filas -> {path}")
+        if not done:
+            click.echo("  Nada que archivar")
@@ -0,0 +1,205 @@
+import itertools
+import os
+import zlib
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+# brotli es opcional: si no está instalado solo negociamos gzip
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# COMPRESIÓN DE RESPUESTAS (WSGI)
+# Respuestas como /sessions/schedule o los reportes detallados son JSON grandes y muy repetitivos.
+# Este middleware envuelve app.wsgi_app y comprime con brotli o gzip según Accept-Encoding, solo por encima
+# de un umbral de tamaño. Las respuestas en streaming (sin Content-Length) se comprimen fragmento a fragmento y
+# salen en cuanto llegan (sin esperar al umbral: NDJSON y CSV lentos no deben quedarse retenidos).
+# Los Server-Sent Events no se comprimen: cada evento tiene que llegar al navegador en el momento.
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        # wbits=31 -> cabecera y checksum gzip
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class CompressionMiddleware:
+    """Comprime respuestas con brotli (si está instalado) o gzip.
+    Args:
+        wsgi_app: aplicación WSGI a envolver
+        min_size: bytes mínimos para comprimir (por debajo no compensa el coste de CPU)
+        gzip_level: nivel zlib 1-9
+        brotli_quality: calidad brotli 0-11 (4-5 es un buen equilibrio para contenido dinámico)"""
+
+    def __init__(self, wsgi_app, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _negotiate(self, environ):
+        if environ.get("REQUEST_METHOD") == "HEAD" or "HTTP_RANGE" in environ:
+            return None
+        accept = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and accept.quality("br") > 0:
+            return "br"
+        if accept.quality("gzip") > 0:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def _compressible(self, status, headers):
+        """Si la respuesta admite compresión (sin mirar el tamaño ni lo que acepta el cliente)."""
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if "Content-Encoding" in headers:
+            return False
+        if "no-transform" in headers.get("Cache-Control", ""):
+            return False
+        mimetype = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        return mimetype in COMPRESSIBLE_MIMETYPES
+
+    def _should_compress(self, status, headers):
+        if not self._compressible(status, headers):
+            return False
+        length = headers.get("Content-Length", type=int)
+        return length is None or length >= self.min_size
+
+    @staticmethod
+    def _add_vary(headers):
+        # La respuesta depende de Accept-Encoding aunque esta vez salga sin comprimir: las caches deben saberlo
+        vary = headers.get("Vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower() and vary.strip() != "*":
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+
+    def __call__(self, environ, start_response):
+        encoding = self._negotiate(environ)
+        if encoding is None:
+            def start_uncompressed(status, header_list, exc_info=None):
+                headers = Headers(header_list)
+                if self._compressible(status, headers):
+                    self._add_vary(headers)
+                    header_list = headers.to_wsgi_list()
+                return start_response(status, header_list, exc_info)
+
+            return self.wsgi_app(environ, start_uncompressed)
+
+        state = {}
+
+        def capture(status, headers, exc_info=None):
+            state["start"] = (status, headers, exc_info)
+            # write() heredado de WSGI: lo acumulamos como primeros fragmentos del cuerpo
+            return state.setdefault("written", []).append
+
+        app_iter = self.wsgi_app(environ, capture)
+        body = app_iter
+        if "start" not in state:
+            # La aplicación retrasa start_response hasta el primer fragmento
+            iterator = iter(app_iter)
+            first = next(iterator, b"")
+            body = itertools.chain([first], iterator)
+
+        written = state.get("written")
+        if written:
+            body = itertools.chain(written, body)
+
+        status, header_list, exc_info = state["start"]
+        headers = Headers(header_list)
+        if not self._should_compress(status, headers):
+            if self._compressible(status, headers):
+                # Por debajo del umbral
+                self._add_vary(headers)
+                header_list = headers.to_wsgi_list()
+            start_response(status, header_list, exc_info)
+            if body is app_iter:
+                return app_iter
+            return ClosingIterator(body, getattr(app_iter, "close", None))
+
+        return ClosingIterator(
+            self._compressed(body, status, headers, exc_info, encoding, start_response),
+            getattr(app_iter, "close", None),
+        )
+
+    def _compressed(self, chunks, status, headers, exc_info, encoding, start_response):
+        # Sin Content-Length (streaming) se comprime desde el primer fragmento: esperar al umbral retrasaría
+        # cada stream lento hasta acumular min_size bytes
+        streaming = "Content-Length" not in headers
+        compressor = self._compressor(encoding)
+        headers.remove("Content-Length")
+        headers["Content-Encoding"] = encoding
+        self._add_vary(headers)
+        # El cuerpo comprimido es otra representación: el ETag fuerte pasa a débil
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        start_response(status, headers.to_wsgi_list(), exc_info)
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            data = compressor.compress(chunk)
+            if streaming:
+                # En streaming enviamos cada fragmento en cuanto llega (NDJSON, CSV, SSE...)
+                data += compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+def init_compression(app):
+    """Registra el middleware de compresión sobre app.wsgi_app con la configuración de la app."""
+    app.config.setdefault("COMPRESSION_ENABLED", os.getenv("COMPRESSION_ENABLED", "true").lower() == "true")
+    app.config.setdefault("COMPRESSION_MIN_SIZE", int(os.getenv("COMPRESSION_MIN_SIZE", 1024)))
+    app.config.setdefault("COMPRESSION_GZIP_LEVEL", int(os.getenv("COMPRESSION_GZIP_LEVEL", 6)))
+    app.config.setdefault("COMPRESSION_BROTLI_QUALITY", int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4)))
+
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config["COMPRESSION_MIN_SIZE"],
+        gzip_level=app.config["COMPRESSION_GZIP_LEVEL"],
+        brotli_quality=app.config["COMPRESSION_BROTLI_QUALITY"],
+    )
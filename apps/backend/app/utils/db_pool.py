@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# POOL DE CONEXIONES SEGÚN EL DESPLIEGUE
+# Cada worker de gunicorn tiene su propio engine y su propio pool. El total de conexiones contra
+# PostgreSQL es aprox. workers x (pool_size + max_overflow), así que el pool se dimensiona según
+# cuántas peticiones atiende a la vez cada worker:
+#   sync       gunicorn -k sync (1 petición por worker)
+#   threaded   gunicorn -k gthread --threads N (N peticiones por worker)
+#   pgbouncer  detrás de PgBouncer en modo transacción (PgBouncer hace el pooling real)
+# Se elige con DB_POOL_PROFILE; SQLALCHEMY_ENGINE_OPTIONS en Config sigue teniendo prioridad.
+
+
+def _pool_presets(threads):
+    common = {
+        "pool_pre_ping": True,   # detecta conexiones cortadas por el servidor/firewall
+        "pool_recycle": 1800,
+        "pool_use_lifo": True,   # reutiliza las conexiones calientes y deja caducar las sobrantes
+        "pool_timeout": 10,      # mejor un error claro que una petición colgada 30s
+    }
+    return {
+        "sync": dict(common, pool_size=2, max_overflow=2),
+        "threaded": dict(common, pool_size=threads, max_overflow=max(2, threads // 2)),
+        # PgBouncer no soporta prepared statements en modo transacción (psycopg 3 los usa a partir de
+        # la 5ª ejecución) ni parámetros de arranque como statement_timeout: se usa SET LOCAL por transacción
+        "pgbouncer": dict(
+            common, pool_size=threads, max_overflow=0, pool_recycle=300,
+            connect_args={"prepare_threshold": None},
+        ),
+    }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto esperan las peticiones para obtener una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = {"acquired": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0, "timeouts": 0, "checked_out_max": 0}
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+            with self._stats_lock:
+                self.wait_stats["checked_out_max"] = max(self.wait_stats["checked_out_max"], self.checkedout())
+            return conn
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                self.wait_stats["acquired"] += 1
+                self.wait_stats["wait_total_ms"] += waited
+                self.wait_stats["wait_max_ms"] = max(self.wait_stats["wait_max_ms"], waited)
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservamos los contadores
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def pool_stats(engine):
+    """Estado actual del pool del engine (por worker)."""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_s=pool.timeout(),
+        )
+    wait = getattr(pool, "wait_stats", None)
+    if wait is not None:
+        stats.update(
+            acquired=wait["acquired"],
+            checked_out_max=wait["checked_out_max"],
+            timeouts=wait["timeouts"],
+            wait_total_ms=round(wait["wait_total_ms"], 3),
+            wait_avg_ms=round(wait["wait_total_ms"] / wait["acquired"], 3) if wait["acquired"] else 0.0,
+            wait_max_ms=round(wait["wait_max_ms"], 3),
+        )
+    return stats
+
+
+def statement_timeout(ms):
+    """Cambia el statement_timeout solo para este endpoint (p.ej. reportes pesados).
+    SET LOCAL se hace al empezar la transacción y la sesión abre una sola por petición: tiene que ir justo debajo
+    de @route, antes que requires_role y compañía (que ya consultan la BD). Uso:
+        @bp.route("/reports/export")
+        @statement_timeout(60000)
+        @requires_coordinator_or_admin"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.statement_timeout_ms = ms
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+@event.listens_for(Engine, "begin")
+def _set_statement_timeout(conn):
+    # Solo dentro de una petición: las migraciones y comandos CLI no tienen límite
+    if conn.dialect.name != "postgresql" or not has_request_context():
+        return
+    timeout = g.get("statement_timeout_ms", current_app.config.get("DB_STATEMENT_TIMEOUT_MS"))
+    if timeout:
+        # SET LOCAL dura lo que la transacción: compatible con PgBouncer en modo transacción
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def init_db_pool(app):
+    """Aplica el perfil de pool a SQLALCHEMY_ENGINE_OPTIONS. Llamar antes de db.init_app."""
+    app.config.setdefault("DB_POOL_PROFILE", os.getenv("DB_POOL_PROFILE", "sync"))
+    app.config.setdefault("DB_POOL_THREADS", int(os.getenv("DB_POOL_THREADS", os.getenv("GUNICORN_THREADS", 8))))
+    app.config.setdefault("DB_STATEMENT_TIMEOUT_MS", int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000)))
+
+    # SQLite en memoria usa un pool especial (una conexión por hilo): no aplicamos perfiles
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if uri in ("sqlite://", "sqlite:///") or ":memory:" in uri:
+        return
+
+    presets = _pool_presets(app.config["DB_POOL_THREADS"])
+    profile = app.config["DB_POOL_PROFILE"]
+    if profile not in presets:
+        raise ValueError(f"DB_POOL_PROFILE desconocido: {profile} (opciones: {', '.join(presets)})")
+
+    options = dict(presets[profile], poolclass=InstrumentedQueuePool)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
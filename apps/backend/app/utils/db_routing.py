@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from functools import wraps
+import click
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+# LECTURAS EN LA RÉPLICA
+# Con DATABASE_REPLICA_URL las peticiones de solo lectura (GET/HEAD, o vistas con @use_replica) hacen sus SELECT
+# contra la réplica; las escrituras, los SELECT ... FOR UPDATE y todo lo que venga después de escribir en la misma
+# petición van al primario. Tras una petición que escribe, la respuesta lleva la cookie sentya_db_primary y ese
+# cliente lee del primario durante DB_REPLICA_STICKY_SECONDS: ve sus propios cambios aunque la réplica vaya con
+# retraso. Los GET que escriben se marcan con @use_primary (leer datos atrasados antes de escribir es peligroso).
+# Fuera de una petición (CLI, hilo de auditoría) todo va al primario.
+
+REPLICA_BIND = "replica"
+STICKY_COOKIE = "sentya_db_primary"
+
+
+class RoutingSession(Session):
+    """Session de Flask-SQLAlchemy que elige primario o réplica según la petición en curso."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get("db_route") == "replica":
+            if self._flushing or not getattr(clause, "is_select", False) or \
+                    getattr(clause, "_for_update_arg", None) is not None:
+                # Escritura (flush, DML, session.connection()): a partir de aquí toda la petición usa el primario
+                g.db_route = "primary"
+                g.db_wrote = True
+            elif not g.get("db_wrote"):
+                return self._db.engines[REPLICA_BIND]
+        elif bind is None and has_request_context() and (self._flushing or getattr(clause, "is_dml", False)):
+            g.db_wrote = True
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_primary(f):
+    """GET que escribe (o que necesita leer lo último): sus consultas van al primario."""
+    f._db_route = "primary"
+    return f
+
+
+def use_replica(f):
+    """Vista de solo lectura que no es GET (p.ej. una búsqueda por POST): sus lecturas van a la réplica."""
+    f._db_route = "replica"
+    return f
+
+
+def primary_bind():
+    """bind_arguments para forzar el primario en una consulta concreta (comprobaciones de seguridad)."""
+    from app.extensions import db
+    return {"bind": db.engine}
+
+
+def sticky_to_primary():
+    """True si el cliente escribió hace menos de DB_REPLICA_STICKY_SECONDS (cookie sentya_db_primary vigente)."""
+    return request.cookies.get(STICKY_COOKIE, type=float, default=0.0) > time.time()
+
+
+def _route_request(app):
+    if sticky_to_primary():
+        return "primary"
+    view = app.view_functions.get(request.endpoint)
+    route = getattr(view, "_db_route", None)
+    if route is None:
+        route = "replica" if request.method in ("GET", "HEAD") else "primary"
+    return route
+
+
+def init_db_routing(app):
+    """Añade la réplica a SQLALCHEMY_BINDS y registra el enrutado por petición. Llamar antes de db.init_app."""
+    app.config.setdefault("SQLALCHEMY_DATABASE_REPLICA_URI", os.getenv("DATABASE_REPLICA_URL") or None)
+    app.config.setdefault("DB_REPLICA_STICKY_SECONDS", int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5)))
+    _register_lag_command(app)
+    replica_uri = app.config["SQLALCHEMY_DATABASE_REPLICA_URI"]
+    if not replica_uri:
+        return
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds[REPLICA_BIND] = replica_uri
+    app.config["SQLALCHEMY_BINDS"] = binds
+    sticky = app.config["DB_REPLICA_STICKY_SECONDS"]
+
+    @app.before_request
+    def _choose_database():
+        g.db_route = _route_request(app)
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get("db_wrote") and sticky > 0:
+            response.set_cookie(STICKY_COOKIE, f"{time.time() + sticky:.3f}", max_age=sticky,
+                                httponly=True, samesite="Lax")
+        response.headers["X-DB-Route"] = g.get("db_route", "primary")
+        return response
+
+
+def _sqlite_path(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return url.database
+
+
+def _copy(source, target):
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _register_lag_command(app):
+    @app.cli.command("replica-lag")
+    @click.option("--lag", default=2.0, show_default=True, type=float, help="Segundos de retraso de la réplica.")
+    @click.option("--interval", default=0.5, show_default=True, type=float, help="Cada cuánto se copia el primario.")
+    @click.option("--once", is_flag=True, help="Copia el primario a la réplica una vez y termina.")
+    def replica_lag(lag, interval, once):
+        """Simula una réplica con retraso copiando la BD SQLite primaria a DATABASE_REPLICA_URL.
+        Con Postgres usar una réplica real (recovery_min_apply_delay para simular el retraso)."""
+        primary = _sqlite_path(app.config["SQLALCHEMY_DATABASE_URI"])
+        replica = _sqlite_path(app.config["SQLALCHEMY_DATABASE_REPLICA_URI"] or "")
+        if not primary or not replica:
+            raise click.ClickException("replica-lag solo funciona con DATABASE_URL y DATABASE_REPLICA_URL en SQLite (ficheros)")
+        if once:
+            _copy(primary, replica)
+            click.echo(f"Réplica actualizada: {replica}")
+            return
+
+        # Instantáneas del primario en una carpeta temporal; se aplican a la réplica cuando tienen `lag` segundos
+        folder = tempfile.mkdtemp(prefix="sentya_replica_")
+        snapshots = deque()
+        click.echo(f"Replicando {primary} -> {replica} con {lag}s de retraso (Ctrl+C para parar)")
+        taken = 0
+        try:
+            while True:
+                now = time.monotonic()
+                snapshot = os.path.join(folder, f"{taken}.db")
+                _copy(primary, snapshot)
+                snapshots.append((now, snapshot))
+                taken += 1
+                ready = None
+                while snapshots and snapshots[0][0] <= now - lag:
+                    if ready:
+                        os.remove(ready)
+                    ready = snapshots.popleft()[1]
+                if ready:
+                    _copy(ready, replica)
+                    os.remove(ready)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for _, snapshot in snapshots:
+                os.remove(snapshot)
+            os.rmdir(folder)
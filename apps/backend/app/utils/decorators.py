@@ -1,7 +1,10 @@
 from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from flask import current_app, jsonify
 from app.models.user import SystemUser, UserRole
+from app.utils.token_versions import token_versions
+from app.utils.db_routing import primary_bind
+from app.extensions import db
 from app.exceptions import NotFoundError, ForbiddenError, UnauthorizedError
 
 
@@ -18,6 +21,8 @@ def requires_role(*allowed_roles):
         ForbiddenError: Usuario sin permisos o inactivo"""
 #Usamos el requires role como ultima defensa para evitar que alguien cambie el rol y haga en resumidas cuentas
 #desastre en la aplicacion con rol de coordinador o administrador 
+    allowed_values = {role.value for role in allowed_roles}
+
     def decorator(f):
         @wraps(f)
         @jwt_required()
@@ -28,8 +33,20 @@ def requires_role(*allowed_roles):
                 
             except (ValueError, TypeError):
                 raise UnauthorizedError("Token de autenticación inválido") 
-                # Buscar usuario en la base de datos
-            user = SystemUser.query.get(user_id)
+
+            # Camino rápido: si la versión del token ("tv") es la vigente, el rol del token es el de la BD
+            # (cambiar rol/estado/contraseña sube la versión). Si no coincide o no está, comprobamos en la BD.
+            if current_app.config["AUTH_CLAIMS_FAST_PATH"]:
+                claims = get_jwt()
+                version = claims.get("tv")
+                if version is not None and version == token_versions.current(user_id):
+                    if claims.get("role") not in allowed_values:
+                        raise ForbiddenError("No tienes permisos para realizar esta acción")
+                    return f(*args, **kwargs)
+
+            # Buscar usuario en la base de datos
+            # Del primario aunque la petición lea de la réplica (un cambio de rol no puede llegar tarde)
+            user = db.session.get(SystemUser, user_id, bind_arguments=primary_bind())
                 
                 # Verificar que el usuario existe y está activo
             if not user:
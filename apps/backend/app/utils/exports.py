@@ -0,0 +1,110 @@
+import csv
+import importlib.util
+import io
+import re
+import tempfile
+import unicodedata
+from datetime import datetime
+from flask import current_app, stream_with_context
+from app.exceptions import BadRequestError
+
+# openpyxl es opcional (sin él solo se exporta CSV) y arrastra PIL: se importa al generar el primer XLSX,
+# no al arrancar cada worker
+XLSX_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+
+# EXPORTACIONES CSV / XLSX EN STREAMING
+# Las filas llegan de un generador (consultas con yield_per en app/services) y se escriben según llegan:
+#   - CSV: se envía en trozos de ~EXPORT_CHUNK_BYTES mientras se leen las filas.
+#   - XLSX: openpyxl en modo write_only escribe cada fila a disco (memoria constante); al terminar el libro se
+#     comprime en un fichero temporal que se envía por trozos y se borra.
+# Un año de asistencias de un CSS no pasa nunca entero por memoria.
+
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Excel en español usa ";" como separador de listas; el BOM hace que abra el fichero como UTF-8 (tildes, ñ)
+CSV_DELIMITER = ";"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Texto que Excel/LibreOffice interpretan como fórmula al abrir el fichero (inyección CSV): nombres, talleres y
+# observaciones los escribe cualquier usuario
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# Sube cuando cambia cómo se escriben los ficheros: forma parte de la clave de los informes en caché
+# (app/services/report_jobs_service.py) para no servir ficheros generados con el formato anterior
+EXPORT_FORMAT_VERSION = 2
+
+
+def export_format(value):
+    """Valida ?format= antes de empezar a enviar (luego ya no se puede responder con un error JSON)."""
+    fmt = (value or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise BadRequestError(f"Formato de exportación no soportado: {fmt} (csv, xlsx)")
+    if fmt == "xlsx" and not XLSX_AVAILABLE:
+        raise BadRequestError("La exportación XLSX no está disponible en este servidor (falta openpyxl); usa format=csv")
+    return fmt
+
+
+def export_filename(*parts):
+    """asistencia_Informatica_basica_2026-01-01: ASCII sin espacios ni separadores de ruta (cabecera HTTP)."""
+    text = "_".join(str(part) for part in parts if part not in (None, ""))
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", text).strip("_")
+
+
+def _safe_cell(value):
+    """Texto que empieza como una fórmula: se antepone ' para que la hoja lo muestre tal cual."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_chunks(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=CSV_DELIMITER)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_safe_cell(value) for value in row])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx_value(value):
+    # Excel no admite fechas con zona horaria
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return _safe_cell(value)
+
+
+def _xlsx_chunks(sheet_title, header, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_xlsx_value(value) for value in row])
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(EXPORT_CHUNK_BYTES):
+            yield chunk
+
+
+def export_mimetype(fmt):
+    return XLSX_MIMETYPE if fmt == "xlsx" else "text/csv"
+
+
+def export_chunks(fmt, sheet_title, header, rows):
+    """Generador de bytes del fichero (también lo usan los informes en segundo plano para escribirlo a disco)."""
+    if fmt == "xlsx":
+        return _xlsx_chunks(sheet_title, header, rows)
+    return _csv_chunks(header, rows)
+
+
+def export_response(fmt, filename, chunks):
+    """Respuesta de descarga en streaming con los bytes de export_chunks()."""
+    response = current_app.response_class(stream_with_context(chunks), mimetype=export_mimetype(fmt))
+    response.headers.set("Content-Disposition", "attachment", filename=f"{filename}.{fmt}")
+    return response
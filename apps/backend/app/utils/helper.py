@@ -1,12 +1,14 @@
-import qrcode, io, base64
+import io, base64
 from functools import wraps
-from flask_jwt_extended import JWTManager,create_access_token,get_jwt,jwt_required
+from flask_jwt_extended import create_access_token
 from app.models.user import SystemUser
 from app.exceptions import ValidationError
 import re
 
 def build_qr_data_uri(otpauth_uri):
         """Generador de codigo QR para frontend"""
+        # qrcode arrastra PIL: lo importamos solo cuando alguien configura 2FA (no al arrancar cada worker)
+        import qrcode
         qr = qrcode.QRCode(
             version= 1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -25,7 +27,9 @@ def build_qr_data_uri(otpauth_uri):
         return f"data:image/png;base64,{img_base64}"                #
     
 def issue_tokens_for_user(user: SystemUser):
-    claims = {"role": user.rol.value, "email": user.email}
+    # tv: versión del token, requires_role confía en "role" (y la caché de respuestas en "css") mientras coincida
+    # con la de la BD
+    claims = {"role": user.rol.value, "email": user.email, "css": user.css_id, "tv": user.token_version}
     access_token = create_access_token(identity=str(user.id), additional_claims=claims)
     return access_token
 
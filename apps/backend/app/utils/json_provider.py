@@ -0,0 +1,79 @@
+import dataclasses
+import enum
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from time import perf_counter
+from uuid import UUID
+from flask.json.provider import DefaultJSONProvider
+from app.utils.request_timing import record_serialization
+
+# orjson es opcional: si está instalado lo usamos para todas las respuestas (jsonify, request.get_json),
+# si no, caemos al json de la librería estándar con las mismas reglas de serialización.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _default(o):
+    """Tipos que el encoder no soporta de forma nativa.
+    Con orjson solo llegan aquí Decimal y similares; con json stdlib también fechas, enums y dataclasses."""
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if isinstance(o, (Decimal, UUID)):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class SentyaJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask respaldado por orjson cuando está disponible.
+    Serializa datetime/date/time en ISO 8601, enums (UserRole, WorkshopStatus...) por su valor y dataclasses,
+    así los serializers pueden devolver los valores crudos sin formatearlos a mano."""
+
+    # Orden de claves tal cual lo construye el serializer (ordenarlas cuesta tiempo y no lo usa el frontend)
+    sort_keys = False
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # Si alguien pide opciones propias de json.dumps (indent, separators...) respetamos la API estándar
+        if orjson is None or kwargs:
+            kwargs.setdefault("default", _default)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode("utf-8")
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serializa directamente a bytes (evita el decode/encode intermedio en las respuestas)."""
+        if orjson is None:
+            if indent:
+                return json.dumps(obj, default=_default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys, indent=2).encode("utf-8")
+            return json.dumps(obj, default=_default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys, separators=(",", ":")).encode("utf-8")
+        return orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        started = perf_counter()
+        body = self.dumps_bytes(obj, indent=indent)
+        record_serialization(perf_counter() - started)
+        return self._app.response_class(body, mimetype=self.mimetype)
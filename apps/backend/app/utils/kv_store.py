@@ -0,0 +1,237 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# redis es opcional: solo hace falta con RATE_LIMIT_STORAGE/RESPONSE_CACHE_STORAGE=redis://...
+try:
+    import redis
+except ImportError:  # pragma: no cover - depende del entorno
+    redis = None
+
+# CONTADORES CON CADUCIDAD COMPARTIDOS ENTRE WORKERS
+# Interfaz mínima tipo Redis que usa el rate limiter: incr(key, ttl) = INCR + EXPIRE si la clave es nueva,
+# mget(keys) = MGET y delete(key) = DEL; la caché de respuestas usa además get/set (GET / SET EX) con bytes.
+# window_hit(rules) es la comprobación + incremento del rate limiter en un solo paso atómico entre workers
+# (transacción BEGIN IMMEDIATE en SQLite, script Lua en Redis): leer, decidir e incrementar por separado deja
+# pasar de más cuando llegan varios intentos a la vez.
+# Backends (por URL):
+#   memory://                  diccionario del proceso: cada worker cuenta por su cuenta (desarrollo, un worker)
+#   sqlite:////ruta/fichero.db fichero SQLite en WAL: todos los workers de la máquina ven los mismos contadores
+#   redis://host:6379/0        Redis real (varias máquinas)
+
+
+class MemoryStore:
+    """Sustituto local de Redis en memoria del proceso."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def _incr(self, key, ttl, now):
+        value, expires_at = self._data.get(key, (0, 0.0))
+        if expires_at <= now:
+            value, expires_at = 0, now + ttl
+        value += 1
+        self._data[key] = (value, expires_at)
+        if now >= self._next_sweep:
+            # Limpieza de claves caducadas cada minuto (no hay un hilo que las borre)
+            self._data = {k: v for k, v in self._data.items() if v[1] > now}
+            self._next_sweep = now + 60
+        return value
+
+    def _value(self, key, now):
+        entry = self._data.get(key)
+        return entry[0] if entry and entry[1] > now else None
+
+    def incr(self, key, ttl):
+        with self._lock:
+            return self._incr(key, ttl, time.time())
+
+    def window_hit(self, rules):
+        now = time.time()
+        with self._lock:
+            values = [(self._value(previous, now), self._value(current, now)) for previous, current, *_ in rules]
+            allowed = _window_allows(rules, values)
+            if allowed:
+                for _, current, _, _, ttl in rules:
+                    self._incr(current, ttl, now)
+        return allowed, values
+
+    def mget(self, keys):
+        now = time.time()
+        with self._lock:
+            found = [self._data.get(key) for key in keys]
+        return [entry[0] if entry and entry[1] > now else None for entry in found]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        return entry[0] if entry and entry[1] > time.time() else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+
+
+class SQLiteStore:
+    """Contadores en un fichero SQLite compartido por los workers. Una conexión por hilo y proceso
+    (las conexiones sqlite3 no se pueden heredar con fork ni compartir entre hilos)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Son contadores efímeros: no merece la pena esperar al fsync
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value INTEGER NOT NULL, "
+                         "expires_at REAL NOT NULL) WITHOUT ROWID")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv_blobs (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                         "expires_at REAL NOT NULL) WITHOUT ROWID")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _incr(conn, key, ttl, now):
+        return conn.execute(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, 1, ?) ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN expires_at <= ? THEN 1 ELSE value + 1 END, "
+            "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END RETURNING value",
+            (key, now + ttl, now, now),
+        ).fetchone()[0]
+
+    @staticmethod
+    def _mget(conn, keys, now):
+        placeholders = ",".join("?" * len(keys))
+        rows = dict(conn.execute(
+            f"SELECT key, value FROM kv WHERE key IN ({placeholders}) AND expires_at > ?", (*keys, now)
+        ).fetchall())
+        return [rows.get(key) for key in keys]
+
+    def incr(self, key, ttl):
+        now = time.time()
+        conn = self._conn()
+        value = self._incr(conn, key, ttl, now)
+        if random.random() < 0.001:
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+        return value
+
+    def mget(self, keys):
+        return self._mget(self._conn(), keys, time.time())
+
+    def window_hit(self, rules):
+        now = time.time()
+        conn = self._conn()
+        # IMMEDIATE toma el bloqueo de escritura al empezar: otro worker espera (timeout=5) y lee ya nuestro +1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            flat = self._mget(conn, [key for previous, current, *_ in rules for key in (previous, current)], now)
+            values = list(zip(flat[::2], flat[1::2]))
+            allowed = _window_allows(rules, values)
+            if allowed:
+                for _, current, _, _, ttl in rules:
+                    self._incr(conn, current, ttl, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, values
+
+    def delete(self, key):
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.execute("DELETE FROM kv_blobs WHERE key = ?", (key,))
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM kv_blobs WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO kv_blobs (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl))
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM kv_blobs WHERE expires_at <= ?", (now,))
+
+
+class RedisStore:
+    # KEYS: anterior1, actual1, anterior2, actual2...  ARGV: peso1, límite1, ttl1, peso2, ...
+    # Redis ejecuta el script entero sin intercalar otros comandos
+    WINDOW_HIT = """
+    local values = redis.call('MGET', unpack(KEYS))
+    local allowed = 1
+    for i = 1, #KEYS / 2 do
+        local previous = tonumber(values[2 * i - 1]) or 0
+        local current = tonumber(values[2 * i]) or 0
+        if previous * tonumber(ARGV[3 * i - 2]) + current >= tonumber(ARGV[3 * i - 1]) then
+            allowed = 0
+        end
+    end
+    if allowed == 1 then
+        for i = 1, #KEYS / 2 do
+            redis.call('INCR', KEYS[2 * i])
+            redis.call('EXPIRE', KEYS[2 * i], ARGV[3 * i], 'NX')
+        end
+    end
+    return {allowed, values}
+    """
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError(f"{url} es Redis pero el paquete redis no está instalado")
+        self._client = redis.Redis.from_url(url)
+        self._window_hit = self._client.register_script(self.WINDOW_HIT)
+
+    def incr(self, key, ttl):
+        pipe = self._client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, int(ttl), nx=True)
+        return pipe.execute()[0]
+
+    def mget(self, keys):
+        return [int(value) if value is not None else None for value in self._client.mget(keys)]
+
+    def window_hit(self, rules):
+        keys = [key for previous, current, *_ in rules for key in (previous, current)]
+        args = [arg for _, _, limit, weight, ttl in rules for arg in (repr(weight), limit, int(ttl))]
+        allowed, flat = self._window_hit(keys=keys, args=args)
+        flat = [int(value) if value is not None else None for value in flat]
+        return bool(allowed), list(zip(flat[::2], flat[1::2]))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, value, ttl):
+        self._client.set(key, value, ex=max(int(ttl), 1))
+
+
+def _window_allows(rules, values):
+    """rules: [(clave anterior, clave actual, límite, peso de la anterior, ttl)]; values: [(anterior, actual)]."""
+    return all((previous or 0) * weight + (current or 0) < limit
+               for (_, _, limit, weight, _), (previous, current) in zip(rules, values))
+
+
+def create_store(url):
+    """Backend a partir de su URL (memory://, sqlite:////ruta.db, redis://...)."""
+    if url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    raise ValueError(f"Almacén de contadores desconocido: {url} (memory://, sqlite:///..., redis://...)")
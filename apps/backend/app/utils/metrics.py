@@ -0,0 +1,151 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from flask import Response, abort, current_app, g, request
+
+# prometheus_client es opcional: sin él las funciones de este módulo no hacen nada y /metrics no existe
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - depende del entorno
+    multiprocess = None
+    Counter = None
+
+# MÉTRICAS PROMETHEUS
+# Con varios workers de gunicorn cada proceso escribe sus valores en PROMETHEUS_MULTIPROC_DIR
+# (lo configura gunicorn.conf.py) y /metrics los agrega todos, atienda el worker que atienda el scrape.
+# Las etiquetas son blueprint/endpoint (no la URL) para no disparar la cardinalidad.
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if Counter is not None:
+    REQUESTS = Counter(
+        "sentya_http_requests_total", "Peticiones HTTP atendidas",
+        ["blueprint", "endpoint", "method", "status"],
+    )
+    LATENCY = Histogram(
+        "sentya_http_request_duration_seconds", "Duración de las peticiones HTTP",
+        ["blueprint", "endpoint", "method"], buckets=_LATENCY_BUCKETS,
+    )
+    POOL_CHECKED_OUT = Gauge("sentya_db_pool_checked_out", "Conexiones del pool en uso", multiprocess_mode="livesum")
+    POOL_SIZE = Gauge("sentya_db_pool_size", "Tamaño configurado del pool", multiprocess_mode="livesum")
+    POOL_OVERFLOW = Gauge("sentya_db_pool_overflow", "Conexiones abiertas por encima de pool_size", multiprocess_mode="livesum")
+    POOL_WAIT = Gauge("sentya_db_pool_wait_seconds_sum", "Tiempo total esperando una conexión (desde el arranque del worker)", multiprocess_mode="livesum")
+    POOL_TIMEOUTS = Gauge("sentya_db_pool_timeouts", "Esperas de conexión que agotaron pool_timeout", multiprocess_mode="livesum")
+    EMAILS_IN_FLIGHT = Gauge("sentya_email_in_flight", "Emails enviándose ahora mismo (SMTP)", multiprocess_mode="livesum")
+    EMAILS = Counter("sentya_emails_total", "Emails enviados", ["kind", "result"])
+    LOGINS = Counter("sentya_logins_total", "Intentos de login", ["result"])
+    RATE_LIMITED = Counter("sentya_rate_limited_total", "Peticiones rechazadas por el rate limiter (429)", ["rule"])
+    BCRYPT = Histogram(
+        "sentya_bcrypt_seconds", "Tiempo de bcrypt (hash y verificación)", ["operation"],
+        buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+    )
+
+
+def record_login(result):
+    """result: success, invalid_credentials, inactive, 2fa_required, 2fa_setup_required, 2fa_invalid"""
+    if Counter is not None:
+        LOGINS.labels(result=result).inc()
+
+
+def record_rate_limited(rule):
+    """rule: ruta o patrón de RATE_LIMITS que ha rechazado la petición"""
+    if Counter is not None:
+        RATE_LIMITED.labels(rule=rule).inc()
+
+
+@contextmanager
+def time_bcrypt(operation):
+    if Counter is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        BCRYPT.labels(operation=operation).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_email(kind):
+    """Envuelve un envío SMTP: emails en curso + resultado."""
+    if Counter is None:
+        yield
+        return
+    EMAILS_IN_FLIGHT.inc()
+    try:
+        yield
+    except Exception:
+        EMAILS.labels(kind=kind, result="error").inc()
+        raise
+    else:
+        EMAILS.labels(kind=kind, result="sent").inc()
+    finally:
+        EMAILS_IN_FLIGHT.dec()
+
+
+def _update_pool_gauges():
+    from app.extensions import db
+    from app.utils.db_pool import pool_stats
+
+    stats = pool_stats(db.engine)
+    POOL_CHECKED_OUT.set(stats.get("checked_out", 0))
+    POOL_SIZE.set(stats.get("size", 0))
+    POOL_OVERFLOW.set(stats.get("overflow", 0))
+    if "acquired" in stats:
+        POOL_WAIT.set(stats["wait_total_ms"] / 1000)
+        POOL_TIMEOUTS.set(stats["timeouts"])
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def init_metrics(app):
+    """Registra la instrumentación de peticiones y el endpoint /metrics."""
+    app.config.setdefault("METRICS_ENABLED", os.getenv("METRICS_ENABLED", "true").lower() == "true")
+    # /metrics exige "Authorization: Bearer <METRICS_TOKEN>". Sin token responde 403, salvo METRICS_PUBLIC=true
+    # (solo si el proxy ya restringe /metrics a la red interna)
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN"))
+    app.config.setdefault("METRICS_PUBLIC", os.getenv("METRICS_PUBLIC", "false").lower() == "true")
+
+    if not app.config["METRICS_ENABLED"]:
+        return
+    if Counter is None:
+        app.logger.warning("prometheus_client no está instalado: /metrics desactivado")
+        return
+    if not app.config["METRICS_TOKEN"] and not app.config["METRICS_PUBLIC"]:
+        app.logger.warning("METRICS_TOKEN no definido: /metrics responde 403 (METRICS_PUBLIC=true para abrirlo)")
+
+    @app.before_request
+    def _start_metrics():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_metrics(response):
+        started = g.pop("_metrics_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        blueprint = request.blueprint or "app"
+        endpoint = request.endpoint or "not_found"
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        _update_pool_gauges()
+        return response
+
+    @app.route("/metrics", endpoint="metrics")
+    def metrics():
+        token = current_app.config["METRICS_TOKEN"]
+        if token:
+            if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+                abort(401)
+        elif not current_app.config["METRICS_PUBLIC"]:
+            abort(403)
+        _update_pool_gauges()
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
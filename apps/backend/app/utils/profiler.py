@@ -0,0 +1,232 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.models.user import SystemUser, UserRole
+
+# PROFILER BAJO DEMANDA (solo administradores)
+# Un administrador añade la cabecera "X-Profile: cprofile" (o "sample") a cualquier petición y esta se
+# ejecuta bajo cProfile o bajo un profiler por muestreo. El resultado se guarda en PROFILE_DIR y se
+# descarga desde /diagnostics/profiles/<id>:
+#   cprofile -> .prof (pstats, snakeviz, `python -m pstats`)
+#   sample   -> .speedscope.json (https://www.speedscope.app)
+# Sin la cabecera el coste es una comprobación de cabecera por petición.
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_KINDS = ("cprofile", "sample")
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+_EXTENSIONS = {"cprofile": ".prof", "sample": ".speedscope.json"}
+
+
+class SamplingProfiler:
+    """Muestrea la pila de un hilo cada `interval` segundos desde un hilo aparte.
+    Mucho menos intrusivo que cProfile en peticiones con muchas llamadas pequeñas."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self._frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _frame_id(self, code, lineno):
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            stack.reverse()  # speedscope: de la raíz a la hoja
+            self.samples.append(stack)
+            self.weights.append((now - last) * 1000)
+            last = now
+
+    def to_speedscope(self, name):
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.duration * 1000, 3),
+                "samples": self.samples,
+                "weights": [round(w, 3) for w in self.weights],
+            }],
+            "name": name,
+            "exporter": "sentya",
+        }
+
+
+def _is_admin():
+    """Valida el JWT de la petición y que el usuario sea un administrador activo."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return False
+    if identity is None:
+        return False
+    user = SystemUser.query.get(int(identity))
+    return bool(user and user.is_active and user.rol == UserRole.ADMINISTRATOR)
+
+
+def _profile_dir():
+    return current_app.config["PROFILE_DIR"]
+
+
+def _prune(directory, keep):
+    # Los ids empiezan por la fecha: ordenarlos es ordenarlos por antigüedad
+    ids = sorted(name[:-5] for name in os.listdir(directory) if _PROFILE_ID.match(name[:-5]) and name.endswith(".json"))
+    for profile_id in ids[:-keep]:
+        for extension in (".json", *_EXTENSIONS.values()):
+            path = os.path.join(directory, profile_id + extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _start_profile():
+    kind = request.headers.get(PROFILE_HEADER)
+    if not kind:
+        return
+    kind = "cprofile" if kind.lower() in ("1", "true", "cprofile") else kind.lower()
+    # Una petición con la cabecera pero sin permisos se atiende normalmente, sin perfilar
+    if kind not in PROFILE_KINDS or not _is_admin():
+        return
+
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        interval = current_app.config["PROFILE_SAMPLE_INTERVAL_MS"] / 1000
+        profiler = SamplingProfiler(threading.get_ident(), interval)
+        profiler.start()
+    g._profile = (kind, profiler, time.perf_counter())
+
+
+def _finish_profile(response):
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return response
+    kind, profiler, started = profile
+    duration_ms = (time.perf_counter() - started) * 1000
+    if kind == "cprofile":
+        profiler.disable()
+    else:
+        profiler.stop()
+
+    profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    directory = _profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, profile_id + _EXTENSIONS[kind])
+    tmp_path = f"{path}.tmp"
+    name = f"{request.method} {request.path} ({response.status_code}, {duration_ms:.0f} ms)"
+    if kind == "cprofile":
+        profiler.dump_stats(tmp_path)
+    else:
+        with open(tmp_path, "wb") as f:
+            f.write(current_app.json.dumps_bytes(profiler.to_speedscope(name)))
+    os.replace(tmp_path, path)
+
+    # Metadatos para el listado (se guardan junto al perfil)
+    with open(os.path.join(directory, profile_id + ".json"), "wb") as f:
+        f.write(current_app.json.dumps_bytes({
+            "id": profile_id, "kind": kind, "method": request.method, "path": request.path,
+            "endpoint": request.endpoint, "status": response.status_code,
+            "duration_ms": round(duration_ms, 2), "created_at": datetime.now(timezone.utc),
+        }))
+    _prune(directory, current_app.config["PROFILE_MAX_FILES"])
+
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _discard_profile(exc):
+    # Si la petición terminó sin pasar por after_request no dejamos el profiler activo en el hilo
+    profile = g.pop("_profile", None)
+    if profile is not None:
+        kind, profiler, _ = profile
+        if kind == "cprofile":
+            profiler.disable()
+        else:
+            profiler.stop()
+
+
+def list_profiles():
+    """Perfiles guardados, del más reciente al más antiguo."""
+    directory = _profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith(".json") and not name.endswith(".speedscope.json"):
+            with open(os.path.join(directory, name), "rb") as f:
+                profiles.append(current_app.json.loads(f.read()))
+    profiles.sort(key=lambda item: item["id"], reverse=True)
+    return profiles
+
+
+def profile_path(profile_id):
+    """Ruta y tipo del perfil `profile_id` (None si no existe o el id no es válido)."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for kind, extension in _EXTENSIONS.items():
+        path = os.path.join(_profile_dir(), profile_id + extension)
+        if os.path.exists(path):
+            return path, kind
+    return None
+
+
+def profile_summary(path, limit=40, sort="cumulative"):
+    """Resumen en texto de un .prof (las funciones con más tiempo)."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def init_profiler(app):
+    """Registra el profiler bajo demanda (cabecera X-Profile de un administrador)."""
+    app.config.setdefault("PROFILER_ENABLED", os.getenv("PROFILER_ENABLED", "true").lower() == "true")
+    app.config.setdefault("PROFILE_DIR", os.getenv("PROFILE_DIR", os.path.join(app.instance_path, "profiles")))
+    app.config.setdefault("PROFILE_MAX_FILES", int(os.getenv("PROFILE_MAX_FILES", 50)))
+    app.config.setdefault("PROFILE_SAMPLE_INTERVAL_MS", float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 2)))
+
+    if not app.config["PROFILER_ENABLED"]:
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_discard_profile)
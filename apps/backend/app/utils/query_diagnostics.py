@@ -0,0 +1,242 @@
+import glob
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# DETECTOR DE CONSULTAS LENTAS Y N+1 (modo diagnóstico, QUERY_DIAGNOSTICS_ENABLED=true)
+# Registra en un JSONL rotativo por proceso (query_diagnostics.<pid>.jsonl: los workers de gunicorn no comparten
+# fichero ni se pisan al rotar):
+#   - slow_query: cada consulta que supera SLOW_QUERY_MS, con la forma de sus parámetros (tipos, nunca
+#     valores: hay DNIs, emails...) y la función de la app que la lanzó
+#   - n_plus_one: consultas idénticas repetidas N_PLUS_ONE_THRESHOLD veces o más en una misma petición
+#     (p.ej. una consulta de asistencias por cada usuario en get_workshop_detailed_report)
+# GET /diagnostics/queries lee los ficheros de todos los procesos y resume los peores casos por tiempo total.
+
+logger = logging.getLogger("app.query_diagnostics")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Middlewares que envuelven toda la petición: nunca son el origen de una consulta
+_SKIP_FILES = {os.path.abspath(__file__), os.path.join(_APP_DIR, "utils", "compression.py")}
+_WHITESPACE = re.compile(r"\s+")
+MAX_STATEMENT_LENGTH = 1000
+
+
+def _normalize(statement):
+    return _WHITESPACE.sub(" ", statement).strip()[:MAX_STATEMENT_LENGTH]
+
+
+def _params_shape(parameters, executemany):
+    """Tipos de los parámetros sin sus valores."""
+    if executemany and parameters:
+        return {"executemany": len(parameters), "row": _params_shape(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _caller():
+    """Primera función de la app (fuera de este módulo) en la pila: ruta, servicio o serializer."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename not in _SKIP_FILES:
+            module = os.path.relpath(filename, os.path.dirname(_APP_DIR))
+            return f"{module}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _route():
+    if not has_request_context():
+        return None
+    return request.url_rule.rule if request.url_rule else request.path
+
+
+def _process_log(path, pid):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid}{ext}"
+
+
+def _process_logs(path):
+    """Ficheros (y copias rotadas) de todos los procesos, vivos o no."""
+    root, ext = os.path.splitext(path)
+    pattern = f"{glob.escape(root)}.[0-9]*{ext}"
+    return glob.glob(pattern) + glob.glob(pattern + ".[0-9]*")
+
+
+def _prune_logs(path, max_age):
+    """Borra los ficheros de procesos que ya no existen sin escrituras en max_age segundos."""
+    root, ext = os.path.splitext(path)
+    limit = time.time() - max_age
+    for file_path in _process_logs(path):
+        pid = os.path.basename(file_path)[len(os.path.basename(root)) + 1:].split(".")[0]
+        try:
+            os.kill(int(pid), 0)
+            continue
+        except ProcessLookupError:
+            pass
+        except (OSError, ValueError):
+            continue
+        try:
+            if os.path.getmtime(file_path) < limit:
+                os.remove(file_path)
+        except OSError:
+            pass
+
+
+_handler_pid = None
+
+
+def _open_log(app):
+    """Abre el fichero de este proceso. Se hace al primer registro y no en init: con preload_app la app se
+    crea en el maestro y los workers heredarían su fichero."""
+    global _handler_pid
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    path = app.config["QUERY_DIAGNOSTICS_LOG"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _prune_logs(path, app.config["QUERY_DIAGNOSTICS_KEEP_DAYS"] * 86400)
+    handler = RotatingFileHandler(
+        _process_log(path, os.getpid()), maxBytes=app.config["QUERY_DIAGNOSTICS_MAX_BYTES"],
+        backupCount=app.config["QUERY_DIAGNOSTICS_BACKUPS"], encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _handler_pid = os.getpid()
+
+
+def _write(record):
+    if _handler_pid != os.getpid():
+        _open_log(current_app)
+    logger.info(current_app.json.dumps(record))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_diag_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["_diag_started"].pop()) * 1000
+    if not has_request_context():
+        return
+    config = current_app.config
+    if not config["QUERY_DIAGNOSTICS_ENABLED"]:
+        return
+
+    normalized = _normalize(statement)
+    seen = g.get("_diag_statements")
+    if seen is None:
+        seen = g._diag_statements = {}
+    entry = seen.get(normalized)
+    if entry is None:
+        # La pila solo se recorre la primera vez que aparece cada consulta en la petición
+        entry = seen[normalized] = {"count": 0, "total_ms": 0.0, "caller": _caller()}
+    entry["count"] += 1
+    entry["total_ms"] += elapsed_ms
+
+    if elapsed_ms >= config["SLOW_QUERY_MS"]:
+        _write({
+            "type": "slow_query",
+            "ts": time.time(),
+            "route": _route(),
+            "method": request.method,
+            "statement": normalized,
+            "params_shape": _params_shape(parameters, executemany),
+            "duration_ms": round(elapsed_ms, 2),
+            "caller": entry["caller"] if entry["count"] == 1 else _caller(),
+        })
+
+
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("_diag_started"):
+        context.connection.info["_diag_started"].pop()
+
+
+def _report_repeated_statements(response):
+    seen = g.pop("_diag_statements", None)
+    if not seen:
+        return response
+    threshold = current_app.config["N_PLUS_ONE_THRESHOLD"]
+    for statement, entry in seen.items():
+        if entry["count"] >= threshold:
+            _write({
+                "type": "n_plus_one",
+                "ts": time.time(),
+                "route": _route(),
+                "method": request.method,
+                "statement": statement,
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 2),
+                "caller": entry["caller"],
+            })
+    return response
+
+
+def load_offenders(limit=20, kind=None):
+    """Agrupa los JSONL de todos los procesos (y sus copias rotadas) por tipo + consulta + ruta y ordena por
+    tiempo total."""
+    paths = _process_logs(current_app.config["QUERY_DIAGNOSTICS_LOG"])
+    groups = defaultdict(lambda: {"occurrences": 0, "total_ms": 0.0, "max_ms": 0.0, "max_count": 0})
+
+    for file_path in paths:
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            continue  # rotado o borrado entre el glob y el open
+        with f:
+            for line in f:
+                try:
+                    record = current_app.json.loads(line)
+                except ValueError:
+                    continue  # línea a medio escribir
+                if kind and record.get("type") != kind:
+                    continue
+                key = (record["type"], record["statement"], record.get("route"))
+                group = groups[key]
+                duration = record.get("duration_ms", record.get("total_ms", 0.0))
+                group["occurrences"] += 1
+                group["total_ms"] += duration
+                group["max_ms"] = max(group["max_ms"], duration)
+                group["max_count"] = max(group["max_count"], record.get("count", 1))
+                group["caller"] = record.get("caller")
+
+    offenders = [
+        {"type": key[0], "statement": key[1], "route": key[2], **values, "total_ms": round(values["total_ms"], 2)}
+        for key, values in groups.items()
+    ]
+    offenders.sort(key=lambda item: item["total_ms"], reverse=True)
+    return offenders[:limit]
+
+
+def init_query_diagnostics(app):
+    """Activa el detector si QUERY_DIAGNOSTICS_ENABLED (desactivado por defecto: recorre la pila)."""
+    app.config.setdefault("QUERY_DIAGNOSTICS_ENABLED", os.getenv("QUERY_DIAGNOSTICS_ENABLED", "false").lower() == "true")
+    app.config.setdefault("SLOW_QUERY_MS", float(os.getenv("SLOW_QUERY_MS", 100)))
+    app.config.setdefault("N_PLUS_ONE_THRESHOLD", int(os.getenv("N_PLUS_ONE_THRESHOLD", 5)))
+    app.config.setdefault("QUERY_DIAGNOSTICS_LOG", os.getenv(
+        "QUERY_DIAGNOSTICS_LOG", os.path.join(app.instance_path, "logs", "query_diagnostics.jsonl")))
+    app.config.setdefault("QUERY_DIAGNOSTICS_MAX_BYTES", int(os.getenv("QUERY_DIAGNOSTICS_MAX_BYTES", 10 * 1024 * 1024)))
+    app.config.setdefault("QUERY_DIAGNOSTICS_BACKUPS", int(os.getenv("QUERY_DIAGNOSTICS_BACKUPS", 5)))
+    # Ficheros de procesos ya terminados (reinicios, max_requests): se borran tras estos días sin escrituras
+    app.config.setdefault("QUERY_DIAGNOSTICS_KEEP_DAYS", float(os.getenv("QUERY_DIAGNOSTICS_KEEP_DAYS", 7)))
+
+    if not app.config["QUERY_DIAGNOSTICS_ENABLED"]:
+        return
+
+    if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+    app.after_request(_report_repeated_statements)
@@ -0,0 +1,151 @@
+import hashlib
+import math
+import os
+import tempfile
+import time
+from fnmatch import fnmatchcase
+from flask import current_app, request
+from app.exceptions import TooManyRequestsError
+from app.utils.kv_store import create_store
+from app.utils.metrics import record_rate_limited
+
+# LÍMITE DE INTENTOS EN LOGIN, 2FA Y RECUPERACIÓN DE CONTRASEÑA
+# El login hace un bcrypt (~0.3 s de CPU) por cada email/contraseña: una ráfaga de credential stuffing ocupa
+# todos los workers. Este before_request rechaza con 429 antes de tocar la BD o bcrypt cuando una IP o un email
+# superan su límite en una ventana deslizante (aproximada con el contador de la ventana actual y el de la anterior
+# ponderado por el tiempo que queda de ella: dos claves por regla, sin guardar cada intento).
+# Solo cuentan los intentos que pasan: mientras se rechaza, el atacante no alarga su propio bloqueo,
+# pero nunca pasa de `límite` intentos por ventana: comprobar e incrementar es un único paso atómico en el almacén
+# (kv_store.window_hit), también con muchos workers a la vez.
+
+# Ruta (admite comodines) -> reglas "ámbito:intentos/segundos". Ámbitos: ip, email (del cuerpo JSON).
+DEFAULT_RATE_LIMITS = {
+    "/auth/login": "ip:30/60, email:10/300",
+    "/user/login": "ip:30/60, email:10/300",
+    "/auth/forgot-password": "ip:5/300, email:3/3600",
+    "/auth/2fa/*": "ip:30/300, email:10/300",
+}
+
+
+def parse_rules(spec):
+    """"ip:30/60, email:10/300" -> [("ip", 30, 60), ("email", 10, 300)]"""
+    rules = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            scope, limit = part.split(":")
+            count, window = limit.split("/")
+            rules.append((scope.strip(), int(count), int(window)))
+        except ValueError:
+            raise ValueError(f"Regla de rate limit inválida: {part!r} (formato ámbito:intentos/segundos)")
+        if rules[-1][0] not in ("ip", "email"):
+            raise ValueError(f"Ámbito de rate limit desconocido: {rules[-1][0]} (ip, email)")
+    return rules
+
+
+class SlidingWindowLimiter:
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def _keys(identity, window, now):
+        bucket = int(now // window)
+        return f"rl:{identity}:{window}:{bucket - 1}", f"rl:{identity}:{window}:{bucket}", now - bucket * window
+
+    def hit(self, checks, now=None):
+        """checks: [(identidad, límite, ventana)]. Si alguna supera su límite devuelve los segundos que faltan
+        para poder reintentar (y no cuenta el intento); si no, cuenta el intento en todas y devuelve None."""
+        now = time.time() if now is None else now
+        rules, offsets = [], []
+        for identity, limit, window in checks:
+            previous, current, elapsed = self._keys(identity, window, now)
+            rules.append((previous, current, limit, (window - elapsed) / window, 2 * window))
+            offsets.append(elapsed)
+        allowed, values = self.store.window_hit(rules)
+        if allowed:
+            return None
+
+        retry_after = 0
+        for i, (_, limit, window) in enumerate(checks):
+            previous, current = values[i][0] or 0, values[i][1] or 0
+            elapsed = offsets[i]
+            if previous * (window - elapsed) / window + current < limit:
+                continue
+            # Momento en que la parte de la ventana anterior que aún cuenta deja sitio a un intento más
+            if current >= limit:
+                # La ventana actual pasa a ser la anterior en la siguiente
+                wait = window - elapsed + window * (1 - limit / current) + 1
+            else:
+                wait = max(window * (1 - (limit - current) / previous) - elapsed, 0) + 1
+            retry_after = max(retry_after, math.ceil(wait))
+        return max(retry_after, 1)
+
+
+def _client_ip():
+    header = current_app.config["RATE_LIMIT_IP_HEADER"]
+    if header:
+        # Detrás de nginx (X-Real-IP) remote_addr es la IP del proxy
+        forwarded = request.headers.get(header, "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.remote_addr or "unknown"
+
+
+def _rules_for(path, table):
+    """(ruta o patrón configurado, reglas). Las rutas de un mismo patrón comparten contadores."""
+    rules = table["exact"].get(path)
+    if rules is not None:
+        return path, rules
+    for pattern, pattern_rules in table["patterns"]:
+        if fnmatchcase(path, pattern):
+            return pattern, pattern_rules
+    return None, None
+
+
+def init_rate_limit(app):
+    """Configura el limitador y su before_request. RATE_LIMITS sustituye a DEFAULT_RATE_LIMITS."""
+    app.config.setdefault("RATE_LIMIT_ENABLED", os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true")
+    app.config.setdefault("RATE_LIMIT_STORAGE", os.getenv(
+        "RATE_LIMIT_STORAGE", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'sentya-ratelimit.db')}"))
+    app.config.setdefault("RATE_LIMIT_IP_HEADER", os.getenv("RATE_LIMIT_IP_HEADER") or None)
+    app.config.setdefault("RATE_LIMITS", DEFAULT_RATE_LIMITS)
+    if not app.config["RATE_LIMIT_ENABLED"]:
+        return
+
+    table = {"exact": {}, "patterns": []}
+    for path, spec in app.config["RATE_LIMITS"].items():
+        rules = parse_rules(spec)
+        if any(ch in path for ch in "*?["):
+            table["patterns"].append((path, rules))
+        else:
+            table["exact"][path] = rules
+    limiter = app.extensions["rate_limiter"] = SlidingWindowLimiter(create_store(app.config["RATE_LIMIT_STORAGE"]))
+
+    @app.before_request
+    def _check_rate_limit():
+        if request.method == "OPTIONS":
+            return None
+        name, rules = _rules_for(request.path, table)
+        if not rules:
+            return None
+        checks = []
+        for scope, limit, window in rules:
+            if scope == "ip":
+                identity = f"ip:{_client_ip()}"
+            else:
+                body = request.get_json(silent=True)
+                email = body.get("email") if isinstance(body, dict) else None
+                if not isinstance(email, str) or not email.strip():
+                    continue
+                # Hash: los emails no se quedan en claro en el almacén de contadores
+                identity = "email:" + hashlib.sha1(email.strip().lower().encode()).hexdigest()
+            checks.append((f"{name}:{identity}", limit, window))
+        if not checks:
+            return None
+        retry_after = limiter.hit(checks)
+        if retry_after is not None:
+            record_rate_limited(name)
+            raise TooManyRequestsError("Demasiados intentos. Inténtalo de nuevo más tarde.", retry_after=retry_after)
+        return None
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+import time
+from sqlalchemy import event, insert, select, update
+from flask import current_app, request
+from app.extensions import db
+from app.models.reference_versions import ReferenceVersion
+
+# CACHE DE DATOS DE REFERENCIA
+# Áreas temáticas, roles y centros CSS casi nunca cambian, pero el SPA los pide en casi todas las pantallas.
+# Cada worker de gunicorn guarda en memoria el JSON ya serializado junto con su ETag, y solo lo recarga
+# cuando el contador de la tabla reference_versions cambia (lo consultamos como mucho cada N segundos).
+
+
+class _CachedPayload:
+    __slots__ = ("version", "payload", "body", "etag")
+
+    def __init__(self, version, payload, body, etag):
+        self.version = version
+        self.payload = payload  # dict del loader (no modificar: se comparte entre peticiones)
+        self.body = body
+        self.etag = etag
+
+
+class ReferenceCache:
+    """Registro de loaders de datos de referencia con copia en memoria por proceso."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._version_keys = {}
+        self._entries = {}
+        self._versions = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("REFERENCE_CACHE_CHECK_SECONDS", int(os.getenv("REFERENCE_CACHE_CHECK_SECONDS", 10)))
+        app.config.setdefault("REFERENCE_CACHE_MAX_AGE", int(os.getenv("REFERENCE_CACHE_MAX_AGE", 60)))
+
+        # Tras un commit que incrementó algún contador forzamos la relectura en este worker
+        @event.listens_for(db.session, "after_commit")
+        def _reset_after_bump(session):
+            if session.info.pop("reference_bumped", False):
+                self._checked_at = 0.0
+
+    def loader(self, name, version_key=None, versioned=True):
+        """Decorador para registrar la función que construye el payload de `name`.
+        version_key: contador de reference_versions que invalida este payload (por defecto `name`).
+        versioned=False para datos que solo cambian con un despliegue (ej: roles del enum)."""
+        def decorator(f):
+            self._loaders[name] = f
+            if versioned:
+                self._version_keys[name] = version_key or name
+            return f
+        return decorator
+
+    def _current_versions(self):
+        interval = current_app.config["REFERENCE_CACHE_CHECK_SECONDS"]
+        now = time.monotonic()
+        if now - self._checked_at >= interval:
+            rows = db.session.execute(select(ReferenceVersion.name, ReferenceVersion.version)).all()
+            self._versions = {name: version for name, version in rows}
+            self._checked_at = now
+        return self._versions
+
+    def get(self, name):
+        version_key = self._version_keys.get(name)
+        version = self._current_versions().get(version_key, 0) if version_key else 0
+        entry = self._entries.get(name)
+        if entry is not None and entry.version == version:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.version != version:
+                payload = self._loaders[name]()
+                body = current_app.json.dumps(payload).encode("utf-8")
+                etag = f"{name}-{version}-{hashlib.sha1(body).hexdigest()[:16]}"
+                entry = _CachedPayload(version, payload, body, etag)
+                self._entries[name] = entry
+        return entry
+
+    def bump(self, name):
+        """Incrementa el contador de `name` dentro de la transacción actual.
+        Todos los workers recargarán sus copias tras el commit (como mucho en REFERENCE_CACHE_CHECK_SECONDS).
+        Si la fila no existe (BD creada con create_all, sin la migración que siembra los contadores) se crea."""
+        result = db.session.execute(
+            update(ReferenceVersion)
+            .where(ReferenceVersion.name == name)
+            .values(version=ReferenceVersion.version + 1, updated_at=db.func.now())
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(ReferenceVersion).values(name=name, version=1, updated_at=db.func.now()))
+        db.session.info["reference_bumped"] = True
+
+
+reference_cache = ReferenceCache()
+
+
+def reference_response(name):
+    """Respuesta JSON desde la cache con ETag fuerte, Cache-Control y soporte de If-None-Match (304)."""
+    entry = reference_cache.get(name)
+
+    # If-None-Match usa comparación débil (el middleware de compresión marca el ETag como W/)
+    if request.if_none_match.contains_weak(entry.etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry.body, mimetype="application/json")
+
+    response.set_etag(entry.etag)
+    # private: son datos detrás de autenticación, no deben guardarse en caches compartidas
+    response.headers["Cache-Control"] = f"private, max-age={current_app.config['REFERENCE_CACHE_MAX_AGE']}"
+    return response
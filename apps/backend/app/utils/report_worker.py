@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import signal
+import time
+import click
+
+# WORKER DE INFORMES EN SEGUNDO PLANO
+#   flask --app app.wsgi report-worker --processes 2
+# Lanza N procesos (fork de la app ya creada) que reclaman trabajos PENDING de report_jobs uno a uno y los generan
+# con app/services/report_jobs_service.run_job. Sin trabajos esperan REPORT_WORKER_POLL_SECONDS. SIGTERM/Ctrl+C:
+# cada proceso termina el informe en curso y sale. Con --once procesa lo pendiente y termina (cron, pruebas).
+# Cada REPORT_WORKER_CLEANUP_SECONDS el proceso 0 borra trabajos y ficheros caducados.
+
+REPORT_WORKER_POLL_SECONDS = 1.0
+REPORT_WORKER_CLEANUP_SECONDS = 3600
+
+
+def _work(app, index, once, stop):
+    from app.extensions import db
+    from app.services.report_jobs_service import claim_next_job, cleanup_report_jobs, run_job
+
+    poll = app.config["REPORT_WORKER_POLL_SECONDS"]
+    next_cleanup = time.monotonic() if index == 0 else None
+    with app.app_context():
+        # Igual que en gunicorn post_fork: las conexiones heredadas del padre no se comparten
+        db.engine.dispose(close=False)
+        while not stop.is_set():
+            if next_cleanup is not None and time.monotonic() >= next_cleanup:
+                jobs, files = cleanup_report_jobs()
+                if jobs or files:
+                    app.logger.info("report-worker: %s trabajos y %s ficheros caducados borrados", jobs, files)
+                next_cleanup = time.monotonic() + app.config["REPORT_WORKER_CLEANUP_SECONDS"]
+            try:
+                job_id = claim_next_job()
+            except Exception:
+                # BD caída o reiniciándose: se reintenta tras la espera
+                app.logger.exception("report-worker: no se pudo consultar report_jobs")
+                db.session.remove()
+                stop.wait(poll)
+                continue
+            if job_id is None:
+                if once:
+                    return
+                stop.wait(poll)
+                continue
+            started = time.perf_counter()
+            status = run_job(job_id)
+            db.session.remove()
+            app.logger.info("report-worker[%s]: trabajo %s %s en %.2fs", index, job_id, status.value,
+                            time.perf_counter() - started)
+
+
+def _child(app, index, once, stop):
+    # El padre reparte SIGTERM con stop; el hijo no debe morir a mitad de un informe por la señal del grupo
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _work(app, index, once, stop)
+
+
+def run_workers(app, processes, once=False):
+    """Arranca `processes` procesos de informes y espera a que terminen. Con 1 proceso trabaja en este mismo."""
+    context = multiprocessing.get_context("fork")
+    stop = context.Event()
+
+    def _shutdown(signum, frame):
+        click.echo("report-worker: terminando los informes en curso...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    if processes == 1:
+        _work(app, 0, once, stop)
+        return
+    children = [context.Process(target=_child, args=(app, index, once, stop), name=f"report-worker-{index}")
+                for index in range(processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def init_report_worker(app):
+    app.config.setdefault("REPORT_WORKER_PROCESSES", int(os.getenv("REPORT_WORKER_PROCESSES", 2)))
+    app.config.setdefault("REPORT_WORKER_POLL_SECONDS",
+                          float(os.getenv("REPORT_WORKER_POLL_SECONDS", REPORT_WORKER_POLL_SECONDS)))
+    app.config.setdefault("REPORT_WORKER_CLEANUP_SECONDS",
+                          int(os.getenv("REPORT_WORKER_CLEANUP_SECONDS", REPORT_WORKER_CLEANUP_SECONDS)))
+
+    @app.cli.command("report-worker")
+    @click.option("--processes", type=click.IntRange(min=1), default=None,
+                  help="Procesos en paralelo (por defecto REPORT_WORKER_PROCESSES).")
+    @click.option("--once", is_flag=True, help="Procesa los trabajos pendientes y termina.")
+    def report_worker_command(processes, once):
+        """Genera en segundo plano los informes pedidos con POST /attendance/reports/jobs."""
+        processes = processes or app.config["REPORT_WORKER_PROCESSES"]
+        click.echo(f"report-worker: {processes} proceso(s){' (once)' if once else ''}")
+        run_workers(app, processes, once)
+
+    @app.cli.command("report-jobs-cleanup")
+    @click.option("--hours", type=click.FloatRange(min=0), default=None,
+                  help="Retención (por defecto REPORT_JOBS_RETENTION_HOURS).")
+    def report_jobs_cleanup_command(hours):
+        """Borra trabajos terminados y ficheros de informes más antiguos que la retención."""
+        from app.services.report_jobs_service import cleanup_report_jobs
+
+        jobs, files = cleanup_report_jobs(hours)
+        click.echo(f"Borrados {jobs} trabajos y {files} ficheros")
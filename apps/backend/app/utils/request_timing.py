@@ -0,0 +1,134 @@
+import logging
+import os
+import sys
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# TIEMPOS POR PETICIÓN
+# Para cada petición contamos las consultas SQL y el tiempo en base de datos (eventos del cursor),
+# el tiempo de serializar el JSON (SentyaJSONProvider) y el total. Se devuelven en la cabecera
+# Server-Timing (visible en la pestaña Network del navegador) y en una línea de log JSON:
+#   {"method": "GET", "route": "/sessions/schedule", "status": 200, "total_ms": 84.1, "db_ms": 61.3, "queries": 14, ...}
+# El coste es un par de perf_counter() por consulta: se puede dejar activo en producción.
+
+logger = logging.getLogger("app.requests")
+
+
+class RequestTiming:
+    __slots__ = ("started", "db_ms", "queries", "serialize_ms")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_ms = 0.0
+        self.queries = 0
+        self.serialize_ms = 0.0
+
+
+def current_timing():
+    """RequestTiming de la petición en curso (None fuera de una petición o si está desactivado)."""
+    if not has_request_context():
+        return None
+    return g.get("_timing")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_query_started"].pop()
+    timing = current_timing()
+    if timing is not None:
+        timing.db_ms += (time.perf_counter() - started) * 1000
+        timing.queries += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Si la consulta falla no hay after_cursor_execute: descartamos su marca de inicio
+    if context.connection is not None and context.connection.info.get("_query_started"):
+        context.connection.info["_query_started"].pop()
+
+
+def record_serialization(seconds):
+    """Lo llama el proveedor JSON al serializar una respuesta."""
+    timing = current_timing()
+    if timing is not None:
+        timing.serialize_ms += seconds * 1000
+
+
+def init_request_timing(app):
+    """Registra la medición de tiempos por petición en la app."""
+    app.config.setdefault("REQUEST_TIMING_ENABLED", os.getenv("REQUEST_TIMING_ENABLED", "true").lower() == "true")
+    app.config.setdefault("REQUEST_TIMING_HEADER", os.getenv("REQUEST_TIMING_HEADER", "true").lower() == "true")
+    app.config.setdefault("REQUEST_TIMING_LOG", os.getenv("REQUEST_TIMING_LOG", "true").lower() == "true")
+    # Solo se registran en el log las peticiones más lentas que esto (0 = todas)
+    app.config.setdefault("REQUEST_TIMING_LOG_MIN_MS", float(os.getenv("REQUEST_TIMING_LOG_MIN_MS", 0)))
+
+    if not app.config["REQUEST_TIMING_ENABLED"]:
+        return
+
+    emit_header = app.config["REQUEST_TIMING_HEADER"]
+    emit_log = app.config["REQUEST_TIMING_LOG"]
+    log_min_ms = app.config["REQUEST_TIMING_LOG_MIN_MS"]
+
+    @app.before_request
+    def _start_timing():
+        g._timing = RequestTiming()
+
+    def _log(timing, entry):
+        total_ms = (time.perf_counter() - timing.started) * 1000
+        if total_ms >= log_min_ms:
+            logger.info(app.json.dumps({
+                **entry,
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(timing.db_ms, 2),
+                "queries": timing.queries,
+                "serialize_ms": round(timing.serialize_ms, 2),
+            }))
+
+    @app.after_request
+    def _finish_timing(response):
+        timing = g.pop("_timing", None)
+        if timing is None:
+            return response
+        total_ms = (time.perf_counter() - timing.started) * 1000
+
+        if emit_header:
+            response.headers["Server-Timing"] = (
+                f'db;dur={timing.db_ms:.1f};desc="{timing.queries} queries", '
+                f"serialize;dur={timing.serialize_ms:.1f}, total;dur={total_ms:.1f}"
+            )
+            response.headers["Timing-Allow-Origin"] = "*"
+
+        if emit_log:
+            entry = {
+                "method": request.method,
+                "route": request.url_rule.rule if request.url_rule else request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+            }
+            if g.get("response_cache"):
+                # hit/miss de @response_cache.cached (app/utils/response_cache.py)
+                entry["cache"] = g.response_cache
+            if response.is_streamed:
+                # Streaming (app/utils/streaming.py): las consultas y la serialización siguen contando hasta
+                # que se termina de enviar; el log se escribe al cerrar la respuesta
+                g._timing = timing
+                entry["streamed"] = True
+                response.call_on_close(lambda: _log(timing, entry))
+            else:
+                _log(timing, entry)
+        return response
+
+    # Sin handler propio los INFO se perderían (gunicorn no configura el logger raíz)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
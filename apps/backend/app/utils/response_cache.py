@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, make_response, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models.user import SystemUser
+from app.utils.db_routing import sticky_to_primary
+from app.utils.kv_store import create_store
+from app.utils.token_versions import token_versions
+
+# CACHÉ DE RESPUESTAS GET CON INVALIDACIÓN POR VERSIÓN
+# Las pantallas del SPA repiten las mismas lecturas (talleres, sesiones, asistencias...) sin escrituras entre
+# medias. Las vistas marcadas con @response_cache.cached("workshops", "sessions", ...) guardan el cuerpo ya
+# serializado con clave (endpoint, argumentos, rol, css_id[, usuario]) junto con las versiones de las tablas que
+# leen. Cada commit que toca una de esas tablas sube sus contadores (after_commit) y las entradas dejan de valer
+# al momento en todos los workers: los contadores viven en RESPONSE_CACHE_STORAGE (app/utils/kv_store.py; por
+# defecto un SQLite local compartido por los workers de la máquina, redis:// para varias máquinas).
+# Contadores por tabla y por taller:
+#   t:<tabla>  sube con cualquier escritura en la tabla         -> entradas globales (listados)
+#   w:<id>     sube con escrituras atribuibles al taller <id>   -> entradas de un taller (scope="workshop_id")
+#   u:<tabla>  sube con escrituras de la tabla sin taller claro -> también invalidan las entradas de un taller
+# Las entradas viven en un LRU por proceso (RESPONSE_CACHE_MAX_ENTRIES / _MAX_BYTES) y, con
+# RESPONSE_CACHE_SHARED=true, también en el almacén compartido para que las aproveche otro worker.
+
+TABLES = ("workshops", "sessions", "attendances", "workshop_users", "system_users", "css", "thematic_areas")
+# Columnas cuyo cambio no afecta a ninguna respuesta cacheada (el login actualiza last_login en cada acceso)
+IGNORED_COLUMNS = {"system_users": {"last_login", "updated_at"}}
+PREFIX = "rc:"
+
+
+class _Entry:
+    __slots__ = ("versions", "body", "mimetype", "etag", "expires_at")
+
+    def __init__(self, versions, body, mimetype, etag, expires_at):
+        self.versions = versions
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._store = None
+        self.hits = self.misses = 0
+
+    def init_app(self, app):
+        app.config.setdefault("RESPONSE_CACHE_ENABLED", os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true")
+        app.config.setdefault("RESPONSE_CACHE_STORAGE", os.getenv(
+            "RESPONSE_CACHE_STORAGE", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'sentya-response-cache.db')}"))
+        app.config.setdefault("RESPONSE_CACHE_SHARED", os.getenv("RESPONSE_CACHE_SHARED", "false").lower() == "true")
+        app.config.setdefault("RESPONSE_CACHE_TTL", int(os.getenv("RESPONSE_CACHE_TTL", 300)))
+        app.config.setdefault("RESPONSE_CACHE_MAX_ENTRIES", int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000)))
+        app.config.setdefault("RESPONSE_CACHE_MAX_BYTES", int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+        # Los contadores no deben caducar antes que las entradas (volverían a 1 y una entrada vieja valdría)
+        app.config.setdefault("RESPONSE_CACHE_COUNTER_TTL", 30 * 24 * 3600)
+        self._store = create_store(app.config["RESPONSE_CACHE_STORAGE"])
+        self._clear()
+        if not event.contains(db.session, "after_flush", _collect_changes):
+            event.listen(db.session, "after_flush", _collect_changes)
+            event.listen(db.session, "do_orm_execute", _collect_bulk_changes)
+            event.listen(db.session, "after_rollback", _discard_changes)
+            event.listen(db.session, "after_commit", self._bump_after_commit)
+
+    # --- invalidación ---
+
+    def _bump_after_commit(self, session):
+        counters = session.info.pop("response_cache_changes", None)
+        if not counters:
+            return
+        self._incr(counters)
+
+    def _incr(self, counters):
+        ttl = current_app.config["RESPONSE_CACHE_COUNTER_TTL"]
+        for counter in counters:
+            self._store.incr(PREFIX + counter, ttl)
+
+    def bump_tables(self, tables=TABLES):
+        """Invalida todas las entradas que leen `tables`. Para escrituras que no pasan por db.session (inserción
+        masiva con Core o COPY en seed-load), que no disparan after_commit."""
+        self._incr([f"{kind}:{table}" for table in tables for kind in ("t", "u")])
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- lectura / escritura de entradas ---
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+            return entry
+        if current_app.config["RESPONSE_CACHE_SHARED"]:
+            raw = self._store.get(PREFIX + "e:" + key)
+            if raw is not None:
+                # Cabecera JSON + cuerpo tal cual (nada de pickle: el almacén puede ser un Redis compartido)
+                meta, body = raw.split(b"\n", 1)
+                versions, mimetype, etag, expires_at = json.loads(meta)
+                entry = _Entry(tuple(versions), body, mimetype, etag, expires_at)
+                self._put_local(key, entry)
+                return entry
+        return None
+
+    def _put_local(self, key, entry):
+        config = current_app.config
+        if len(entry.body) > config["RESPONSE_CACHE_MAX_BYTES"] // 4:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > config["RESPONSE_CACHE_MAX_ENTRIES"] or self._bytes > config["RESPONSE_CACHE_MAX_BYTES"]:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def _put(self, key, entry):
+        self._put_local(key, entry)
+        if current_app.config["RESPONSE_CACHE_SHARED"]:
+            raw = json.dumps([entry.versions, entry.mimetype, entry.etag, entry.expires_at]).encode() + b"\n" + entry.body
+            self._store.set(PREFIX + "e:" + key, raw, current_app.config["RESPONSE_CACHE_TTL"])
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    # --- decorador ---
+
+    def cached(self, *tables, scope=None, per_user=False):
+        """Cachea la respuesta JSON 200 de una vista GET (debajo de jwt_required/requires_role).
+        tables:   tablas que lee la vista (TABLES); cualquier commit en ellas invalida la entrada.
+        scope:    argumento de la URL con el id de taller: solo la invalidan escrituras de ese taller
+                  (y las de las tablas que no se pueden atribuir a un taller).
+        per_user: True, o roles (UserRole) para los que la respuesta depende del usuario y no solo de rol y CSS.
+        Las respuestas en streaming no se cachean."""
+        unknown = set(tables) - set(TABLES)
+        if unknown:
+            raise ValueError(f"Tablas sin contador de versión: {', '.join(sorted(unknown))}")
+
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not current_app.config["RESPONSE_CACHE_ENABLED"] or request.method != "GET":
+                    return f(*args, **kwargs)
+                if sticky_to_primary():
+                    # El cliente acaba de escribir: ni entradas de otros ni guardar la suya, lee del primario
+                    return f(*args, **kwargs)
+                identity = _identity()
+                if identity is None:
+                    # Token antiguo o usuario inexistente/inactivo: la vista decide qué responder
+                    return f(*args, **kwargs)
+                user_id, role, css_id = identity
+                vary_user = per_user is True or (per_user and role in {r.value for r in per_user})
+                scope_id = kwargs.get(scope) if scope else None
+                key = _cache_key(request.endpoint, kwargs, role, css_id, user_id if vary_user else None)
+                if scope_id is not None:
+                    counters = [PREFIX + f"w:{scope_id}"] + [PREFIX + f"u:{t}" for t in tables]
+                else:
+                    counters = [PREFIX + f"t:{t}" for t in tables]
+                # Versiones ANTES de ejecutar la vista: si alguien escribe mientras tanto la entrada nace caducada
+                versions = tuple(self._store.mget(counters))
+
+                entry = self._get(key)
+                if entry is not None and entry.versions == versions and entry.expires_at > time.time():
+                    self.hits += 1
+                    g.response_cache = "hit"
+                    return _entry_response(entry)
+
+                self.misses += 1
+                g.response_cache = "miss"
+                if g.get("db_route") == "replica":
+                    # La réplica puede ir por detrás de `versions`: con sus datos la entrada guardaría un cuerpo
+                    # viejo como vigente hasta la próxima escritura. Los fallos leen del primario; los aciertos
+                    # ya no tocan la BD
+                    g.db_route = "primary"
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                entry = _Entry(versions, body, response.mimetype, hashlib.sha1(body).hexdigest()[:20],
+                               time.time() + current_app.config["RESPONSE_CACHE_TTL"])
+                self._put(key, entry)
+                response.set_etag(entry.etag)
+                response.headers["Cache-Control"] = "private, no-cache"
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
+
+
+def _identity():
+    """(user_id, rol, css_id) del token si su versión es la vigente (sin consulta); si no, de la BD."""
+    user_id = int(get_jwt_identity())
+    claims = get_jwt()
+    version = claims.get("tv")
+    if "css" in claims and version is not None and version == token_versions.current(user_id):
+        return user_id, claims.get("role"), claims["css"]
+    user = db.session.get(SystemUser, user_id)
+    if user is None or not user.is_active:
+        return None
+    return user_id, user.rol.value, user.css_id
+
+
+def _cache_key(endpoint, view_args, role, css_id, user_id):
+    query = sorted(request.args.items(multi=True))
+    raw = repr((endpoint, sorted(view_args.items()), query, role, css_id, user_id))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _entry_response(entry):
+    if request.if_none_match.contains_weak(entry.etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["X-Cache"] = "HIT"
+    return response
+
+
+def _workshop_of(session, obj, table):
+    """Taller al que pertenece una fila, sin consultas (None si no se sabe)."""
+    if table == "workshops":
+        return obj.id
+    if table in ("sessions", "workshop_users"):
+        return obj.workshop_id
+    if table == "attendances":
+        # La sesión suele estar ya cargada (tomar/editar asistencia la consulta antes)
+        from app.models.sessions import Session
+        parent = session.identity_map.get(identity_key(Session, obj.session_id))
+        return parent.workshop_id if parent is not None else None
+    return None
+
+
+def _changed(obj, table):
+    ignored = IGNORED_COLUMNS.get(table)
+    if not ignored:
+        return True
+    state = inspect(obj)
+    return any(attr.history.has_changes() for attr in state.attrs if attr.key not in ignored)
+
+
+def _collect_changes(session, flush_context):
+    """after_flush: apunta qué contadores subir cuando la transacción haga commit."""
+    changes = session.info.setdefault("response_cache_changes", set())
+    for objects, is_dirty in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            table = getattr(obj, "__tablename__", None)
+            if table not in TABLES or (is_dirty and not _changed(obj, table)):
+                continue
+            changes.add(f"t:{table}")
+            workshop_id = _workshop_of(session, obj, table)
+            changes.add(f"w:{workshop_id}" if workshop_id is not None else f"u:{table}")
+
+
+def _collect_bulk_changes(orm_execute_state):
+    """UPDATE/DELETE/INSERT masivos con session.execute(): la tabla entera, sin atribuir a un taller."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    table = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    if table in TABLES:
+        changes = orm_execute_state.session.info.setdefault("response_cache_changes", set())
+        changes.update((f"t:{table}", f"u:{table}"))
+
+
+def _discard_changes(session):
+    session.info.pop("response_cache_changes", None)
@@ -0,0 +1,313 @@
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+import click
+from sqlalchemy import func, select
+from app.extensions import db, bcrypt
+from app.models.css import Css
+from app.models.user import SystemUser, UserRole
+from app.models.thematic_areas import ThematicArea
+from app.models.workshops import Workshop, WorkshopStatus
+from app.models.sessions import Session
+from app.models.workshop_users import WorkshopUser
+from app.models.attendance import Attendance
+from app.utils.reference_cache import reference_cache
+from app.utils.response_cache import response_cache
+from app.utils.token_versions import COUNTER as TOKEN_VERSIONS_COUNTER
+
+# DATOS SINTÉTICOS PARA PRUEBAS DE CARGA
+#   flask --app app.wsgi seed-load --scale 10 --seed 42
+# Genera centros CSS, personal, clientes (DNI con letra válida, móviles españoles), talleres con
+# week_days, sus sesiones, inscripciones + lista de espera y asistencias de las sesiones pasadas.
+# Mismo --seed y mismo --anchor-date => mismos datos (los ids dependen de lo que ya haya en la BD).
+# Inserción masiva con Core (COPY en PostgreSQL con psycopg 3): --scale 350 son ~1.1M de asistencias (~20s en
+# SQLite). Como no pasa por db.session, al terminar se suben a mano los contadores de las cachés (referencia,
+# versiones de token y caché de respuestas) para que los workers en marcha no sigan sirviendo datos de antes.
+# Los usuarios de personal comparten la contraseña --password (un solo hash bcrypt para todos).
+
+LOAD_EMAIL_DOMAIN = "loadtest.sentya.local"
+BATCH_SIZE = 20000
+
+# Por unidad de --scale
+CSS_PER_SCALE = 2
+CLIENTS_PER_SCALE = 200
+WORKSHOPS_PER_SCALE = 10
+STAFF_PER_CSS = {UserRole.COORDINATOR: 1, UserRole.PROFESSIONAL: 4, UserRole.CSS_TECHNICIAN: 2}
+
+DNI_LETTERS = "TRWAGMYFPDXBNJZSQVHLCKE"
+WEEK_DAYS = ["L", "M", "X", "J", "V", "S", "D"]  # mismo orden que date.weekday()
+FIRST_NAMES = ["María", "Carmen", "Ana", "Isabel", "Dolores", "Pilar", "Josefa", "Rosario", "Antonio", "Manuel",
+               "José", "Francisco", "Juan", "David", "Javier", "Rafael", "Lucía", "Laura", "Elena", "Miguel"]
+LAST_NAMES = ["García", "Rodríguez", "González", "Fernández", "López", "Martínez", "Sánchez", "Pérez", "Gómez",
+              "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero", "Navarro"]
+WORKSHOP_TOPICS = ["Memoria", "Yoga", "Informática básica", "Costura", "Baile", "Cocina saludable", "Pilates",
+                   "Lectura", "Teatro", "Manualidades", "Inglés", "Huerto urbano"]
+DISTRICTS = ["Triana", "Macarena", "Nervión", "Cerro", "Amate", "Bellavista", "Torreblanca", "Los Remedios"]
+TIME_SLOTS = [(dtime(9, 0), dtime(10, 30)), (dtime(10, 30), dtime(12, 0)), (dtime(12, 0), dtime(13, 30)),
+              (dtime(16, 0), dtime(17, 30)), (dtime(17, 30), dtime(19, 0))]
+
+
+def dni_with_letter(number):
+    return f"{number:08d}{DNI_LETTERS[number % 23]}"
+
+
+def spanish_mobile(rng):
+    # Formato normalizado de validate_international_phone: +34 + 9 dígitos empezando por 6 o 7
+    return f"+34{rng.choice('67')}{rng.randrange(10 ** 8):08d}"
+
+
+class _Ids:
+    """Ids explícitos a partir del máximo actual de cada tabla (así las FKs se conocen sin RETURNING)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.next = {}
+
+    def take(self, model, count):
+        table = model.__table__
+        if table.name not in self.next:
+            current = self.conn.execute(select(func.max(table.c.id))).scalar() or 0
+            self.next[table.name] = current + 1
+        first = self.next[table.name]
+        self.next[table.name] += count
+        return range(first, first + count)
+
+
+def _bulk_insert(conn, model, columns, rows):
+    """Inserta `rows` (iterable de tuplas en el orden de `columns`) por lotes. Devuelve cuántas filas."""
+    table = model.__table__
+    total = 0
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg":
+        # COPY es un orden de magnitud más rápido que INSERT ... VALUES con psycopg 3 (postgresql+psycopg://).
+        # psycopg2 (postgresql:// con SQLAlchemy 2.0) no tiene cursor.copy: usa los INSERT por lotes de abajo
+        cursor = conn.connection.dbapi_connection.cursor()
+        with cursor.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                total += 1
+        cursor.close()
+        return total
+
+    statement = table.insert()
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(columns, row)))
+        if len(batch) >= BATCH_SIZE:
+            conn.execute(statement, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(statement, batch)
+        total += len(batch)
+    return total
+
+
+def _reset_sequences(conn, models):
+    if conn.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__table__.name
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        )
+
+
+def _session_dates(start, end, week_days):
+    days = {WEEK_DAYS.index(day) for day in week_days.split(",")}
+    current = start
+    while current <= end:
+        if current.weekday() in days:
+            yield current
+        current += timedelta(days=1)
+
+
+def generate(scale, seed, anchor, password, echo=click.echo):
+    """Genera el dataset dentro de una transacción. Devuelve {tabla: filas insertadas}."""
+    rng = random.Random(seed)
+    created = datetime.combine(anchor, dtime(8, 0))
+    counts = {}
+
+    def timed(model, columns, rows):
+        started = time.perf_counter()
+        inserted = _bulk_insert(conn, model, columns, rows)
+        elapsed = time.perf_counter() - started
+        counts[model.__tablename__] = inserted
+        echo(f"  {model.__tablename__:<16} {inserted:>9} filas  {elapsed:6.2f}s  ({inserted / max(elapsed, 1e-9):,.0f} filas/s)")
+
+    with db.engine.begin() as conn:
+        marker = f"%.s{seed}@{LOAD_EMAIL_DOMAIN}"
+        if conn.execute(select(SystemUser.id).where(SystemUser.email.like(marker)).limit(1)).first():
+            raise click.ClickException(f"Ya hay datos de carga con --seed {seed}: usa otra semilla")
+        ids = _Ids(conn)
+
+        # Áreas temáticas: las existentes (migración seed_thematic_area) o unas mínimas
+        area_ids = list(conn.execute(select(ThematicArea.id).where(ThematicArea.active.is_(True))).scalars())
+        if not area_ids:
+            area_ids = list(ids.take(ThematicArea, 4))
+            timed(ThematicArea, ["id", "name", "active", "created_at"],
+                  ((area_id, f"Área {area_id}", True, created) for area_id in area_ids))
+
+        # Centros CSS
+        css_ids = list(ids.take(Css, CSS_PER_SCALE * scale))
+        timed(Css, ["id", "name", "code", "address", "phone", "is_active", "created_at", "updated_at"], (
+            (css_id, f"Carga {rng.choice(DISTRICTS)} {n + 1}", f"LT{css_id:07d}",
+             f"Calle {rng.choice(LAST_NAMES)} {rng.randint(1, 120)}", spanish_mobile(rng), True, created, created)
+            for n, css_id in enumerate(css_ids)
+        ))
+
+        # Personal (un solo hash: bcrypt cuesta ~0.25s por llamada)
+        password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        used_dnis = set(conn.execute(select(SystemUser.dni)).scalars())
+
+        def new_dni():
+            while True:
+                dni = dni_with_letter(rng.randrange(10 ** 7, 10 ** 8))
+                if dni not in used_dnis:
+                    used_dnis.add(dni)
+                    return dni
+
+        def person(user_id, role, css_id, email, password_value):
+            birth = anchor - timedelta(days=rng.randint(18 * 365, 90 * 365))
+            age = (anchor - birth).days // 365
+            return (user_id, email, rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    password_value, False, new_dni(), str(age), spanish_mobile(rng), birth, role.name, css_id,
+                    True, created, created)
+
+        user_columns = ["id", "email", "name", "last_name", "password", "two_factor_enabled", "dni", "age", "phone",
+                        "birth_date", "rol", "css_id", "is_active", "created_at", "updated_at"]
+        staff = []
+        professionals_by_css = {}
+        for css_id in css_ids:
+            for role, count in STAFF_PER_CSS.items():
+                for user_id in ids.take(SystemUser, count):
+                    email = f"{role.value}{user_id}.s{seed}@{LOAD_EMAIL_DOMAIN}"
+                    staff.append(person(user_id, role, css_id, email, password_hash))
+                    if role == UserRole.PROFESSIONAL:
+                        professionals_by_css.setdefault(css_id, []).append(user_id)
+        timed(SystemUser, user_columns, staff)
+        staff_total = counts.pop(SystemUser.__tablename__)
+
+        # Clientes (sin email ni contraseña, como los que da de alta el personal)
+        client_ids = list(ids.take(SystemUser, CLIENTS_PER_SCALE * scale))
+        client_css = {client_id: rng.choice(css_ids) for client_id in client_ids}
+        timed(SystemUser, user_columns, (
+            person(client_id, UserRole.CLIENT, client_css[client_id], None, None) for client_id in client_ids
+        ))
+        counts[SystemUser.__tablename__] += staff_total
+        clients_by_css = {}
+        for client_id, css_id in client_css.items():
+            clients_by_css.setdefault(css_id, []).append(client_id)
+
+        # Talleres: trimestres que empiezan en los últimos 6 meses
+        workshops = []
+        for workshop_id in ids.take(Workshop, WORKSHOPS_PER_SCALE * scale):
+            css_id = rng.choice(css_ids)
+            start_date = anchor - timedelta(days=rng.randint(0, 180))
+            end_date = start_date + timedelta(weeks=rng.choice((8, 12, 16)))
+            start_time, end_time = rng.choice(TIME_SLOTS)
+            week_days = ",".join(sorted(rng.sample(WEEK_DAYS[:5], rng.randint(1, 3)), key=WEEK_DAYS.index))
+            status = WorkshopStatus.FINISHED if end_date < anchor else WorkshopStatus.ACTIVE
+            workshops.append({
+                "id": workshop_id, "css_id": css_id, "professional_id": rng.choice(professionals_by_css[css_id]),
+                "max_capacity": rng.randint(12, 30), "start_time": start_time, "end_time": end_time,
+                "week_days": week_days, "start_date": start_date, "end_date": end_date, "status": status,
+            })
+
+        # Inscripciones: hasta llenar (casi siempre) el aforo y, si se llena, algunos en lista de espera
+        enrollments = []
+        enrolled_by_workshop = {}
+        for workshop in workshops:
+            pool = clients_by_css.get(workshop["css_id"]) or client_ids
+            wanted = rng.randint(workshop["max_capacity"] // 2, workshop["max_capacity"] + 6)
+            chosen = rng.sample(pool, min(wanted, len(pool)))
+            enrolled = chosen[:workshop["max_capacity"]]
+            waitlist = chosen[workshop["max_capacity"]:]
+            workshop["current_capacity"] = len(enrolled)
+            enrolled_by_workshop[workshop["id"]] = enrolled
+            assigned_at = datetime.combine(workshop["start_date"], dtime(9, 0)) - timedelta(days=7)
+            for user_id in enrolled:
+                enrollments.append((user_id, workshop["id"], workshop["professional_id"], None, assigned_at))
+            for position, user_id in enumerate(waitlist, start=1):
+                enrollments.append((user_id, workshop["id"], workshop["professional_id"], position, assigned_at))
+
+        timed(Workshop, ["id", "name", "description", "thematic_area_id", "css_id", "professional_id",
+                         "max_capacity", "current_capacity", "start_time", "end_time", "week_days", "start_date",
+                         "end_date", "location", "session_duration", "status", "created_at", "updated_at",
+                         "created_by"], (
+            (w["id"], f"{rng.choice(WORKSHOP_TOPICS)} {w['id']}", None, rng.choice(area_ids), w["css_id"],
+             w["professional_id"], w["max_capacity"], w["current_capacity"], w["start_time"], w["end_time"],
+             w["week_days"], w["start_date"], w["end_date"], f"Sala {rng.randint(1, 6)}", 90, w["status"].name,
+             created, created, w["professional_id"])
+            for w in workshops
+        ))
+
+        enrollment_ids = ids.take(WorkshopUser, len(enrollments))
+        timed(WorkshopUser, ["id", "user_id", "assigned_by", "workshop_id", "waitlist_position", "assignment_date",
+                             "unassignment_date", "created_at", "created_by"], (
+            (enrollment_id, user_id, assigned_by, workshop_id, position, assigned_at, assigned_at, assigned_at,
+             assigned_by)
+            for enrollment_id, (user_id, workshop_id, assigned_by, position, assigned_at)
+            in zip(enrollment_ids, enrollments)
+        ))
+
+        # Sesiones según week_days; las pasadas quedan completadas y con asistencia
+        sessions = []
+        for workshop in workshops:
+            for session_date in _session_dates(workshop["start_date"], workshop["end_date"], workshop["week_days"]):
+                sessions.append((workshop, session_date))
+        session_ids = ids.take(Session, len(sessions))
+        timed(Session, ["id", "workshop_id", "date", "start_time", "end_time", "topic", "professional_id", "status",
+                        "created_at", "updated_at"], (
+            (session_id, w["id"], session_date, w["start_time"], w["end_time"], f"Sesión {n + 1}",
+             w["professional_id"], "completed" if session_date < anchor else "scheduled", created, created)
+            for n, (session_id, (w, session_date)) in enumerate(zip(session_ids, sessions))
+        ))
+
+        # Asistencias: se generan al vuelo (no caben cómodas en memoria a escala grande)
+        past = [(session_id, w, session_date) for session_id, (w, session_date) in zip(session_ids, sessions)
+                if session_date < anchor]
+        attendance_total = sum(len(enrolled_by_workshop[w["id"]]) for _, w, _ in past)
+        attendance_ids = iter(ids.take(Attendance, attendance_total))
+        random_value = rng.random
+
+        def attendance_rows():
+            for session_id, w, session_date in past:
+                recorded_at = datetime.combine(session_date, w["end_time"])
+                recorder = w["professional_id"]
+                for user_id in enrolled_by_workshop[w["id"]]:
+                    yield (next(attendance_ids), session_id, user_id, random_value() < 0.82, recorder, recorded_at)
+
+        timed(Attendance, ["id", "session_id", "user_id", "present", "recorded_by", "recorded_at"], attendance_rows())
+        _reset_sequences(conn, [ThematicArea, Css, SystemUser, Workshop, WorkshopUser, Session, Attendance])
+    _invalidate_caches()
+    return counts
+
+
+def _invalidate_caches():
+    """Lo que harían los eventos de db.session con estas escrituras: /css/active, /thematic-areas/, el mapa de
+    versiones de token y las respuestas cacheadas de todas las tablas."""
+    for name in ("css", "thematic_areas", TOKEN_VERSIONS_COUNTER):
+        reference_cache.bump(name)
+    db.session.commit()
+    response_cache.bump_tables()
+
+
+def init_seed_commands(app):
+    """Registra `flask seed-load`."""
+
+    @app.cli.command("seed-load")
+    @click.option("--scale", default=1, show_default=True, type=click.IntRange(min=1),
+                  help="Multiplicador del volumen (350 = ~1.1M de asistencias).")
+    @click.option("--seed", default=1, show_default=True, type=int, help="Semilla: mismos datos para la misma semilla.")
+    @click.option("--anchor-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Fecha 'hoy' de los datos (por defecto hoy). Fíjala para que sean reproducibles.")
+    @click.option("--password", default="LoadTest123!", show_default=True,
+                  help="Contraseña de los usuarios de personal generados.")
+    def seed_load(scale, seed, anchor_date, password):
+        """Genera datos sintéticos para pruebas de carga."""
+        anchor = anchor_date.date() if anchor_date else date.today()
+        click.echo(f"Generando datos de carga (scale={scale}, seed={seed}, anchor={anchor}) ...")
+        started = time.perf_counter()
+        counts = generate(scale, seed, anchor, password)
+        click.echo(f"Listo en {time.perf_counter() - started:.1f}s: {sum(counts.values())} filas. "
+                   f"Personal: <rol><id>.s{seed}@{LOAD_EMAIL_DOMAIN} / {password}")
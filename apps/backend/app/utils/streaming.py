@@ -0,0 +1,119 @@
+from time import perf_counter
+from flask import current_app, request, stream_with_context
+from app.utils.request_timing import record_serialization
+
+# RESPUESTAS JSON EN STREAMING
+# jsonify necesita la respuesta entera en memoria (la lista de dicts y el JSON ya codificado). Para listados que
+# pueden tener decenas de miles de filas (calendario de un año, exportar usuarios, historiales) stream_json codifica
+# elemento a elemento a medida que llegan del cursor (los iter_* de app/services usan yield_per) y va enviando
+# trozos de ~STREAM_CHUNK_BYTES: la memoria no crece con el número de filas.
+# En el objeto de respuesta:
+#   - un iterador/generador se envía como array, elemento a elemento
+#   - un callable se llama justo cuando le toca (p.ej. estadísticas que se cuentan mientras se envían las filas)
+#   - el resto se codifica entero con el proveedor JSON de la app (mismas reglas que jsonify)
+# Con ?format=ndjson o Accept: application/x-ndjson se envía solo la lista principal, un objeto JSON por línea.
+# El streaming empieza después de los after_request: las cabeceras (Server-Timing) no incluyen las consultas
+# que se hacen durante el envío; la línea de log de request_timing sí.
+
+STREAM_CHUNK_BYTES = 64 * 1024
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_ndjson():
+    """True si el cliente pide NDJSON (?format=ndjson o Accept: application/x-ndjson)."""
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _is_stream(value):
+    return hasattr(value, "__next__")
+
+
+class _Encoder:
+    """Codifica valores con el proveedor JSON de la app y agrupa la salida en trozos."""
+
+    def __init__(self):
+        self._dumps = current_app.json.dumps_bytes
+        self._parts = []
+        self._size = 0
+        self.serialize_s = 0.0
+
+    def write(self, data):
+        self._parts.append(data)
+        self._size += len(data)
+
+    def encode(self, value):
+        started = perf_counter()
+        data = self._dumps(value)
+        self.serialize_s += perf_counter() - started
+        self.write(data)
+
+    def ready(self):
+        return self._size >= STREAM_CHUNK_BYTES
+
+    def take(self):
+        chunk = b"".join(self._parts)
+        self._parts, self._size = [], 0
+        return chunk
+
+
+def _encode_json(value, out):
+    """Genera trozos listos para enviar mientras escribe `value` en `out`."""
+    if callable(value) and not _is_stream(value):
+        value = value()
+    if isinstance(value, dict):
+        out.write(b"{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                out.write(b",")
+            out.encode(str(key))
+            out.write(b":")
+            yield from _encode_json(item, out)
+        out.write(b"}")
+    elif _is_stream(value):
+        out.write(b"[")
+        for i, item in enumerate(value):
+            if i:
+                out.write(b",")
+            out.encode(item)
+            if out.ready():
+                yield out.take()
+        out.write(b"]")
+    else:
+        out.encode(value)
+    if out.ready():
+        yield out.take()
+
+
+def _json_chunks(body):
+    out = _Encoder()
+    try:
+        yield from _encode_json(body, out)
+        yield out.take()
+    finally:
+        record_serialization(out.serialize_s)
+
+
+def _ndjson_chunks(items):
+    out = _Encoder()
+    try:
+        for item in items:
+            out.encode(item)
+            out.write(b"\n")
+            if out.ready():
+                yield out.take()
+        yield out.take()
+    finally:
+        record_serialization(out.serialize_s)
+
+
+def stream_json(body, status=200, ndjson_items=None):
+    """Respuesta JSON en streaming. `body` es el objeto de respuesta (ver arriba); `ndjson_items` el iterador
+    que se envía si el cliente pide NDJSON (si es None se responde siempre JSON)."""
+    if ndjson_items is not None and wants_ndjson():
+        chunks, mimetype = _ndjson_chunks(ndjson_items), NDJSON_MIMETYPE
+    else:
+        chunks, mimetype = _json_chunks(body), "application/json"
+    # stream_with_context: el generador sigue teniendo la petición (y la sesión de BD) mientras se envía
+    return current_app.response_class(stream_with_context(chunks), status=status, mimetype=mimetype)
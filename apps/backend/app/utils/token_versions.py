@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import event, inspect, insert, select, update
+from app.extensions import db
+from app.models.reference_versions import ReferenceVersion
+from app.models.user import SystemUser
+from app.utils.db_routing import primary_bind
+
+# VERSIONES DE TOKEN (comprobación de roles sin ir a la BD)
+# Cada JWT lleva el rol ("role"), el CSS ("css") y la token_version del usuario ("tv") al emitirse. Cambiar el rol,
+# el estado, la contraseña o el CSS incrementa token_version, así que mientras "tv" coincida con la versión actual
+# el rol y el CSS del token siguen siendo válidos. Cada worker guarda en memoria {user_id: token_version} de los usuarios activos y solo
+# la recarga cuando cambia el contador "system_users" de reference_versions (lo mira como mucho cada
+# TOKEN_VERSION_CHECK_SECONDS). En el worker que hace el cambio se recarga al momento; en los demás un rol
+# retirado puede seguir valiendo hasta TOKEN_VERSION_CHECK_SECONDS.
+
+COUNTER = "system_users"
+# Campos que invalidan los tokens emitidos (css_id: claim "css" que usa app/utils/response_cache.py)
+TOKEN_FIELDS = ("rol", "is_active", "password", "css_id")
+
+
+class TokenVersionMap:
+    def __init__(self):
+        self._versions = {}
+        self._counter = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("AUTH_CLAIMS_FAST_PATH", os.getenv("AUTH_CLAIMS_FAST_PATH", "true").lower() == "true")
+        app.config.setdefault("TOKEN_VERSION_CHECK_SECONDS", float(os.getenv("TOKEN_VERSION_CHECK_SECONDS", 5)))
+        if not event.contains(db.session, "before_flush", _bump_changed):
+            event.listen(db.session, "before_flush", _bump_changed)
+            event.listen(db.session, "after_commit", self._reset_after_bump)
+
+    def _reset_after_bump(self, session):
+        if session.info.pop("token_versions_bumped", False):
+            self._checked_at = 0.0
+            self._counter = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < current_app.config["TOKEN_VERSION_CHECK_SECONDS"]:
+            return
+        with self._lock:
+            if now - self._checked_at < current_app.config["TOKEN_VERSION_CHECK_SECONDS"]:
+                return
+            # Sin fila = nunca se ha incrementado (BD creada con create_all / seed-load)
+            # Siempre del primario: con la réplica atrasada un rol retirado seguiría valiendo
+            counter = db.session.execute(
+                select(ReferenceVersion.version).where(ReferenceVersion.name == COUNTER), bind_arguments=primary_bind()
+            ).scalar() or 0
+            if counter != self._counter:
+                rows = db.session.execute(
+                    select(SystemUser.id, SystemUser.token_version).where(SystemUser.is_active.is_(True)),
+                    bind_arguments=primary_bind(),
+                ).all()
+                self._versions = dict(rows)
+                self._counter = counter
+            self._checked_at = now
+
+    def current(self, user_id):
+        """token_version vigente de un usuario activo, o None si no está en el mapa (inactivo, borrado o nuevo)."""
+        self._refresh()
+        return self._versions.get(user_id)
+
+    def stats(self):
+        return {"users": len(self._versions), "counter": self._counter}
+
+
+token_versions = TokenVersionMap()
+
+
+def _bump_changed(session, flush_context, instances):
+    """before_flush: sube token_version de los usuarios con cambios de rol/estado/contraseña y el contador global
+    (también con altas y bajas, para que los workers recarguen el mapa)."""
+    bumped = False
+    for obj in session.dirty:
+        if not isinstance(obj, SystemUser):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in TOKEN_FIELDS):
+            # Expresión SQL: dos cambios simultáneos no se pisan el incremento
+            obj.token_version = SystemUser.token_version + 1
+            bumped = True
+    if not bumped:
+        bumped = any(isinstance(obj, SystemUser) for obj in session.new) or \
+                 any(isinstance(obj, SystemUser) for obj in session.deleted)
+    if not bumped:
+        return
+
+    conn = session.connection()
+    table = ReferenceVersion.__table__
+    now = datetime.now(timezone.utc)
+    result = conn.execute(
+        update(table).where(table.c.name == COUNTER).values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(table).values(name=COUNTER, version=1, updated_at=now))
+    session.info["token_versions_bumped"] = True
@@ -0,0 +1,6 @@
+from app.main import create_app
+
+# Punto de entrada WSGI para gunicorn (ver gunicorn.conf.py):
+#   gunicorn -c gunicorn.conf.py app.wsgi:app
+# Con preload_app la app se crea una vez en el proceso maestro y los workers la comparten (copy-on-write).
+app = create_app(with_migrations=False)
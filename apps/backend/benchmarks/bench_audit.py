@@ -0,0 +1,107 @@
+"""Latencia de las rutas auditadas con la auditoría desactivada, síncrona y asíncrona (AUDIT_MODE).
+
+Para cada modo crea una BD SQLite temporal con `seed-load`, y mide con el cliente de pruebas de Flask:
+  - admin_change_role   PUT /auth/admin/users/<id>/role (alterna professional <-> css_technician)
+  - update_attendance   PUT /attendance/session/<id> corrigiendo toda la lista de una sesión (un registro por alumno)
+Al final vacía la cola y comprueba que hay en audit_logs un registro por cambio.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_audit --iterations 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+MODES = ("off", "sync", "async")
+
+
+def _setup(mode, folder):
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.attendance import Attendance
+    from app.models.user import SystemUser, UserRole
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, f'audit_{mode}.db')}",
+        "AUDIT_MODE": mode,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+        generate(2, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+        admin = SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first()
+        admin.rol = UserRole.ADMINISTRATOR
+        db.session.commit()
+        target = SystemUser.query.filter_by(rol=UserRole.PROFESSIONAL).order_by(SystemUser.id).first()
+        session_id, enrolled = db.session.execute(
+            select(Attendance.session_id, func.count()).group_by(Attendance.session_id)
+            .order_by(func.count().desc(), Attendance.session_id).limit(1)
+        ).one()
+        attendance = db.session.execute(
+            select(Attendance.user_id, Attendance.present).where(Attendance.session_id == session_id)).all()
+        headers = {"Authorization": f"Bearer {issue_tokens_for_user(admin)}"}
+    return app, headers, target.id, session_id, attendance
+
+
+def _measure(client, build, iterations):
+    latencies = []
+    for i in range(iterations + 5):
+        method, url, body = build(i)
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers=build.headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise SystemExit(f"{url}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+        if i >= 5:
+            latencies.append(elapsed)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    from app.extensions import db
+    from app.models.audit_logs import AuditLog
+    from app.utils.audit import flush_audit
+
+    folder = tempfile.mkdtemp(prefix="sentya_audit_")
+    print(f"{'modo':<8}{'endpoint':<20}{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in MODES:
+        app, headers, target_id, session_id, attendance = _setup(mode, folder)
+        user_ids = [user_id for user_id, _ in attendance]
+        client = app.test_client()
+
+        def change_role(i):
+            return "PUT", f"/auth/admin/users/{target_id}/role", {"role": "css_technician" if i % 2 == 0 else "professional"}
+
+        def update_attendance(i):
+            body = {"attendances": [{"user_id": u, "present": (i + n) % 2 == 0} for n, u in enumerate(user_ids)]}
+            return "PUT", f"/attendance/session/{session_id}", body
+
+        change_role.headers = update_attendance.headers = headers
+        for name, build in (("admin_change_role", change_role), ("update_attendance", update_attendance)):
+            p50, p95 = _measure(client, build, args.iterations)
+            print(f"{mode:<8}{name:<20}{p50:>9.2f}{p95:>9.2f}")
+
+        flush_audit()
+        with app.app_context():
+            rows = db.session.query(AuditLog).count()
+        # Solo se audita lo que cambia: en la primera corrección no cambian los que ya tenían ese valor
+        unchanged = sum(1 for n, (_, present) in enumerate(attendance) if present == (n % 2 == 0))
+        # (+1: el cambio de rol del administrador en _setup)
+        expected = 0 if mode == "off" else (args.iterations + 5) * (1 + len(user_ids)) - unchanged + 1
+        print(f"{mode:<8}audit_logs: {rows} registros (esperados {expected}){'' if rows == expected else '  <- NO CUADRA'}")
+
+
+if __name__ == "__main__":
+    main()
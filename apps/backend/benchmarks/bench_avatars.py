@@ -0,0 +1,80 @@
+"""Benchmark de /uploads/avatars/<filename>: throughput de 1.000 peticiones antes/después.
+
+  - antes: send_from_directory recalculando la carpeta en cada petición, sin Cache-Control
+  - después: avatar_response (carpeta en config, ETag + caché inmutable)
+  - después + 304: el navegador revalida con If-None-Match y no se reenvía el cuerpo
+  - después + X-Accel-Redirect: el worker solo devuelve cabeceras, nginx envía el fichero
+
+No mide la caché del navegador (con immutable la mayoría de peticiones ni llegan al servidor).
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_avatars --requests 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+from flask import Flask, request, send_from_directory
+from app.services.avatar_service import avatar_filename_for, avatar_response, init_avatar_serving, thumbnail_filename
+
+DIGEST = "0" * 64
+
+
+def _make_app(folder, mode):
+    app = Flask(__name__)
+    app.config["AVATAR_FOLDER"] = folder
+    if mode == "accel":
+        app.config["AVATAR_ACCEL_REDIRECT_PREFIX"] = "/_avatars"
+    init_avatar_serving(app)
+
+    if mode == "before":
+        @app.route("/uploads/avatars/<filename>")
+        def uploaded_avatar(filename):
+            upload_folder = os.path.join(folder, ".")
+            return send_from_directory(upload_folder, avatar_filename_for(filename, request.args.get("size", type=int)))
+    else:
+        @app.route("/uploads/avatars/<filename>")
+        def uploaded_avatar(filename):
+            return avatar_response(filename, request.args.get("size", type=int))
+    return app
+
+
+def _run(app, requests, conditional):
+    client = app.test_client()
+    url = f"/uploads/avatars/{DIGEST}.webp?size=128"
+    first = client.get(url)
+    headers = {"If-None-Match": first.headers["ETag"]} if conditional and first.headers.get("ETag") else {}
+    body_bytes = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        body_bytes += len(response.get_data())
+    elapsed = time.perf_counter() - started
+    return first, requests / elapsed, body_bytes / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Miniatura de 128px de tamaño realista (~6KB)
+        with open(os.path.join(folder, thumbnail_filename(DIGEST, 128)), "wb") as f:
+            f.write(os.urandom(6 * 1024))
+
+        cases = [
+            ("antes", "before", False),
+            ("después", "after", False),
+            ("después + 304", "after", True),
+            ("después + X-Accel", "accel", False),
+        ]
+        print(f"{'caso':<20} {'req/s':>9} {'bytes/resp':>11}  cabeceras")
+        for label, mode, conditional in cases:
+            first, rps, avg_bytes = _run(_make_app(folder, mode), args.requests, conditional)
+            cache = first.headers.get("Cache-Control", "-")
+            print(f"{label:<20} {rps:>9.0f} {avg_bytes:>11.0f}  {first.status_code} Cache-Control: {cache}")
+
+
+if __name__ == "__main__":
+    main()
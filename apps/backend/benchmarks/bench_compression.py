@@ -0,0 +1,71 @@
+"""Benchmark del middleware de compresión: bytes en la red y coste de CPU por tamaño de respuesta.
+
+Genera JSON con la forma de /sessions/schedule (muy repetitivo) a distintos tamaños y lo pasa por
+CompressionMiddleware con gzip y brotli (si está instalado) a varios niveles.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_compression --repeat 50
+"""
+import argparse
+import json
+import time
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+from app.utils.compression import CompressionMiddleware, brotli
+
+SIZES = [512, 4 * 1024, 32 * 1024, 256 * 1024, 2 * 1024 * 1024]
+
+
+def _schedule_body(target_size):
+    session = {
+        "id": 0, "workshop_id": 3, "workshop_name": "Taller de Fisioterapia", "workshop_color": "#EBAA20",
+        "date": "2025-10-15", "day_of_week": "Wednesday", "start_time": "09:00", "end_time": "11:00",
+        "topic": "Ejercicios de movilidad", "status": "scheduled", "observations": None, "location": "Sala 2",
+    }
+    items = []
+    body = b""
+    while len(body) < target_size:
+        items.append(dict(session, id=len(items)))
+        body = json.dumps({"sessions": {"upcoming": items, "all": items}}).encode()
+    return body[:target_size] if target_size < 1024 else body
+
+
+def _run(body, encoding, repeat, **levels):
+    def wsgi_app(environ, start_response):
+        return Response(body, mimetype="application/json")(environ, start_response)
+
+    client = Client(CompressionMiddleware(wsgi_app, min_size=1024, **levels))
+    started = time.process_time()
+    for _ in range(repeat):
+        response = client.get("/", headers={"Accept-Encoding": encoding})
+        wire = len(response.get_data())
+    cpu_ms = (time.process_time() - started) / repeat * 1000
+    return wire, cpu_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    configs = [
+        ("identity", "identity", {}),
+        ("gzip-1", "gzip", {"gzip_level": 1}),
+        ("gzip-6", "gzip", {"gzip_level": 6}),
+        ("gzip-9", "gzip", {"gzip_level": 9}),
+    ]
+    if brotli is not None:
+        configs += [("br-4", "br", {"brotli_quality": 4}), ("br-6", "br", {"brotli_quality": 6})]
+    else:
+        print("brotli no instalado: solo gzip")
+
+    print(f"{'tamaño':>10} {'config':>9} {'en red':>10} {'ratio':>7} {'cpu ms':>8}")
+    for size in SIZES:
+        body = _schedule_body(size)
+        for label, encoding, levels in configs:
+            wire, cpu_ms = _run(body, encoding, args.repeat, **levels)
+            print(f"{len(body):>10} {label:>9} {wire:>10} {wire / len(body):>7.2f} {cpu_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""GET /dashboard frente a las peticiones que hacía el SPA por separado tras el login.
+
+Crea una BD SQLite temporal con `seed-load` y, para un usuario de cada rol, mide con el cliente de pruebas de Flask
+(mediana de --iterations, con la caché de respuestas desactivada para medir el trabajo real):
+  - separate   las peticiones de antes una tras otra (/user/me, talleres, sesiones, asistencias, áreas, CSS)
+  - dashboard  GET /dashboard con todas las secciones del rol
+  - fields     GET /dashboard pidiendo solo los campos que pinta el dashboard
+con el nº de peticiones, de consultas SQL y los bytes de respuesta. En el navegador cada petición de más es además
+un viaje de ida y vuelta (y su preflight CORS) que aquí no se ve.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_dashboard --scales 5,20 --iterations 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+SEPARATE = {
+    "professional": ["/user/me", "/workshops/my-workshops", "/sessions/schedule", "/attendance/my-workshops",
+                     "/thematic-areas/", "/css/active"],
+    "coordinator": ["/user/me", "/workshops/my-workshops", "/sessions/schedule", "/attendance/my-workshops",
+                    "/thematic-areas/", "/css/active"],
+    "client": ["/user/me", "/workshops/available", "/sessions/my-enrolled-sessions"],
+}
+FIELDS = {
+    "professional": "sections=me,sessions,attendance&fields[me]=id,name,last_name,rol,css_id,avatar_url"
+                    "&fields[sessions]=id,workshop_name,workshop_color,date,start_time,end_time,topic,status,location"
+                    "&fields[attendance]=session_id,workshop_name,date,attendance_rate",
+    "coordinator": "sections=me,workshops,css&fields[me]=id,name,last_name,rol,css_id,avatar_url"
+                   "&fields[workshops]=id,name,status,css_id,thematic_area_name,current_capacity,max_capacity"
+                   "&fields[css]=id,name",
+    "client": "fields[me]=id,name,last_name,rol,css_id,avatar_url"
+              "&fields[workshops]=id,name,thematic_area_name,start_time,end_time,week_days,available_spots"
+              "&fields[sessions]=id,workshop_name,date,start_time,end_time,status",
+}
+
+
+def _setup(scale, folder):
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.user import SystemUser, UserRole
+    from app.models.workshop_users import WorkshopUser
+    from app.models.workshops import Workshop
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, f'dashboard_{scale}.db')}",
+        "RATE_LIMIT_ENABLED": False,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+        "RESPONSE_CACHE_ENABLED": False,
+        "TOKEN_VERSION_CHECK_SECONDS": 3600,
+        "REFERENCE_CACHE_CHECK_SECONDS": 3600,
+    })
+    with app.app_context():
+        db.create_all()
+        generate(scale, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+        # El profesional con más talleres y un cliente inscrito: el peor caso de cada rol
+        professional_id = db.session.execute(
+            select(Workshop.professional_id).group_by(Workshop.professional_id)
+            .order_by(func.count().desc(), Workshop.professional_id).limit(1)
+        ).scalar()
+        client_id = db.session.execute(
+            select(WorkshopUser.user_id).where(WorkshopUser.waitlist_position.is_(None))
+            .group_by(WorkshopUser.user_id).order_by(func.count().desc(), WorkshopUser.user_id).limit(1)
+        ).scalar()
+        users = {
+            "professional": db.session.get(SystemUser, professional_id),
+            "coordinator": SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first(),
+            "client": db.session.get(SystemUser, client_id),
+        }
+        headers = {role: {"Authorization": f"Bearer {issue_tokens_for_user(user)}"} for role, user in users.items()}
+    return app, headers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="5,20")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    queries = [0]
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _count(*_):
+        queries[0] += 1
+
+    folder = tempfile.mkdtemp(prefix="sentya_dashboard_")
+    print(f"{'escala':<8}{'rol':<14}{'caso':<11}{'peticiones':>11}{'consultas':>11}{'ms':>9}{'KB':>9}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        app, headers = _setup(scale, folder)
+        client = app.test_client()
+        for role, urls in SEPARATE.items():
+            cases = [("separate", urls), ("dashboard", ["/dashboard"]), ("fields", [f"/dashboard?{FIELDS[role]}"])]
+            for name, case_urls in cases:
+                times, counts = [], []
+                for _ in range(args.iterations):
+                    queries[0] = size = 0
+                    started = time.perf_counter()
+                    for url in case_urls:
+                        response = client.get(url, headers=headers[role])
+                        assert response.status_code == 200, (url, response.status_code)
+                        size += len(response.data)
+                    times.append((time.perf_counter() - started) * 1000)
+                    counts.append(queries[0])
+                print(f"{scale:<8}{role:<14}{name:<11}{len(case_urls):>11}{int(statistics.median(counts)):>11}"
+                      f"{statistics.median(times):>9.1f}{size / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
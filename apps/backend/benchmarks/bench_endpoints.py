@@ -0,0 +1,327 @@
+"""Benchmark de los endpoints más usados a varias escalas de datos, comparado con una línea base versionada.
+
+Para cada escala genera el dataset con `seed-load` (misma semilla => mismos datos) en una BD nueva y mide,
+con el cliente de pruebas de Flask (sin red), al menos un endpoint de cada blueprint:
+  - latencia p50/p95/p99 (ms)
+  - consultas SQL por petición (de la línea de log de request_timing: cuenta también las de las respuestas
+    en streaming, que la cabecera Server-Timing no puede incluir)
+  - pico de memoria de Python durante una petición (tracemalloc, en una ejecución aparte)
+Los endpoints de escritura (take_attendance, enroll_user) usan una sesión / pareja cliente-taller distinta
+en cada iteración.
+
+Regresión (exit 1) respecto a benchmarks/endpoint_baseline.json:
+  - más consultas que en la línea base (es determinista: cualquier consulta de más es un N+1 nuevo)
+  - p50 o pico de memoria por encima de línea base x --tolerance (y por encima del margen de ruido)
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_endpoints                             # SQLite temporal, escalas 1,5,20
+    python -m benchmarks.bench_endpoints --scales 1,50 --iterations 50
+    python -m benchmarks.bench_endpoints --update-baseline           # reescribe la línea base
+    python -m benchmarks.bench_endpoints --database-url postgresql+psycopg://localhost/sentya_bench
+La BD de --database-url se BORRA (drop_all) antes de cada escala: usar una base de datos dedicada.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "endpoint_baseline.json")
+SEED = 1
+PASSWORD = "LoadTest123!"
+WARMUP = 2
+NOISE_FLOOR_MS = 2.0
+NOISE_FLOOR_KB = 64.0
+
+
+class _LastRequest(logging.Handler):
+    """Guarda la última línea de log de request_timing (se escribe al cerrar la respuesta)."""
+    entry = None
+
+    def emit(self, record):
+        _LastRequest.entry = json.loads(record.getMessage())
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1)]
+
+
+def _build_app(database_url):
+    from app.main import create_app
+
+    # El nº de consultas sale del log de request_timing; con un handler ya puesto no se añade el de stderr
+    logger = logging.getLogger("app.requests")
+    if not any(isinstance(handler, _LastRequest) for handler in logger.handlers):
+        logger.addHandler(_LastRequest())
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "REQUEST_TIMING_LOG": True,
+        "REQUEST_TIMING_LOG_MIN_MS": 0,
+        "QUERY_DIAGNOSTICS_ENABLED": False,
+        "PROFILER_ENABLED": False,
+        # La comprobación periódica del mapa de versiones de token (1 consulta cada pocos segundos por worker)
+        # caería en una iteración cualquiera y saldría en el máximo de consultas
+        "TOKEN_VERSION_CHECK_SECONDS": 3600,
+        "REFERENCE_CACHE_CHECK_SECONDS": 3600,  # ídem con la comprobación de versiones de la caché de referencia
+        # Se mide el coste de la vista: con la caché de respuestas las iteraciones repetidas serían aciertos
+        # (bench_response_cache mide los aciertos)
+        "RESPONSE_CACHE_ENABLED": False,
+        # Los logins repetidos del benchmark acabarían en 429
+        "RATE_LIMIT_ENABLED": False,
+    })
+
+
+def _prepare(app, scale, needed):
+    """Crea el dataset y devuelve lo que necesitan los casos (tokens, ids de talleres, sesiones...)."""
+    import pyotp
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.models.attendance import Attendance
+    from app.models.sessions import Session
+    from app.models.user import SystemUser, UserRole
+    from app.models.workshop_users import WorkshopUser
+    from app.models.workshops import Workshop, WorkshopStatus
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(scale, SEED, date.today(), PASSWORD, echo=lambda *_: None)
+
+        admin = SystemUser(
+            email="admin.bench@loadtest.sentya.local", name="Admin", last_name="Benchmark", dni="00000000T",
+            age="40", phone="+34600000000", birth_date=date(1985, 1, 1), rol=UserRole.ADMINISTRATOR,
+            password=SystemUser.query.filter(SystemUser.password.isnot(None)).first().password,
+        )
+        db.session.add(admin)
+
+        # El profesional con más talleres: el peor caso para /sessions/schedule y /attendance/my-workshops
+        professional_id = db.session.execute(
+            select(Workshop.professional_id).group_by(Workshop.professional_id)
+            .order_by(func.count().desc(), Workshop.professional_id).limit(1)
+        ).scalar()
+        professional = db.session.get(SystemUser, professional_id)
+        professional.two_factor_secret = pyotp.random_base32()
+        professional.two_factor_enabled = True
+        db.session.commit()
+
+        # Taller del profesional con más asistencias registradas (reportes)
+        workshop_id = db.session.execute(
+            select(Session.workshop_id).join(Attendance, Attendance.session_id == Session.id)
+            .join(Workshop, Workshop.id == Session.workshop_id).where(Workshop.professional_id == professional_id)
+            .group_by(Session.workshop_id).order_by(func.count().desc(), Session.workshop_id).limit(1)
+        ).scalar()
+        student_id = db.session.execute(
+            select(WorkshopUser.user_id).where(WorkshopUser.workshop_id == workshop_id,
+                                               WorkshopUser.waitlist_position.is_(None))
+            .order_by(WorkshopUser.user_id).limit(1)
+        ).scalar()
+
+        # Sesiones futuras (sin asistencia) con sus inscritos, para take_attendance
+        enrolled = {}
+        for wid, uid in db.session.execute(
+            select(WorkshopUser.workshop_id, WorkshopUser.user_id).where(WorkshopUser.waitlist_position.is_(None))
+        ):
+            enrolled.setdefault(wid, []).append(uid)
+        attendance_targets = []
+        for session_id, wid in db.session.execute(
+            select(Session.id, Session.workshop_id).where(Session.status == "scheduled").order_by(Session.date, Session.id)
+        ):
+            if enrolled.get(wid):
+                attendance_targets.append((session_id, enrolled[wid]))
+            if len(attendance_targets) >= needed:
+                break
+
+        # Parejas cliente-taller activo sin inscripción previa, para enroll_user
+        existing = set(db.session.execute(select(WorkshopUser.user_id, WorkshopUser.workshop_id)).all())
+        active_workshops = list(db.session.execute(
+            select(Workshop.id).where(Workshop.status == WorkshopStatus.ACTIVE).order_by(Workshop.id)).scalars())
+        clients = list(db.session.execute(
+            select(SystemUser.id).where(SystemUser.rol == UserRole.CLIENT).order_by(SystemUser.id)).scalars())
+        enroll_targets = []
+        for index, client_id in enumerate(clients):
+            wid = active_workshops[index % len(active_workshops)]
+            if (client_id, wid) not in existing:
+                enroll_targets.append((client_id, wid))
+            if len(enroll_targets) >= needed:
+                break
+
+        return {
+            "admin_headers": {"Authorization": f"Bearer {issue_tokens_for_user(admin)}"},
+            "professional_headers": {"Authorization": f"Bearer {issue_tokens_for_user(professional)}"},
+            "professional_email": professional.email,
+            "totp": pyotp.TOTP(professional.two_factor_secret),
+            "workshop_id": workshop_id,
+            "student_id": student_id,
+            "attendance_targets": attendance_targets,
+            "enroll_targets": enroll_targets,
+        }
+
+
+def _cases(ctx):
+    """(nombre, quién, función i -> (método, url, json), status esperado, máx. iteraciones)"""
+    admin, professional = ctx["admin_headers"], ctx["professional_headers"]
+    wid, uid = ctx["workshop_id"], ctx["student_id"]
+
+    def get(url):
+        return lambda i: ("GET", url, None)
+
+    def login(i):
+        body = {"email": ctx["professional_email"], "password": PASSWORD, "token_2fa": ctx["totp"].now()}
+        return "POST", "/auth/login", body
+
+    def take_attendance(i):
+        session_id, users = ctx["attendance_targets"][i]
+        body = {"attendances": [{"user_id": u, "present": n % 5 != 0} for n, u in enumerate(users)]}
+        return "POST", f"/attendance/session/{session_id}", body
+
+    def enroll(i):
+        user_id, workshop_id = ctx["enroll_targets"][i]
+        return "POST", "/workshop-users/enroll", {"user_id": user_id, "workshop_id": workshop_id}
+
+    return [
+        ("auth.login_2fa", None, login, 200, 5),  # bcrypt domina: pocas iteraciones
+        ("auth.admin_users_search", admin, get("/auth/admin/users?search=garc&page=1&per_page=20"), 200, None),
+        ("user.me", professional, get("/user/me"), 200, None),
+        ("workshops.list", admin, get("/workshops/"), 200, None),
+        ("sessions.schedule", professional, get("/sessions/schedule"), 200, None),
+        ("attendance.take", admin, take_attendance, 201, None),
+        ("workshop_users.enroll", admin, enroll, 201, None),
+        ("workshop_users.students", admin, get(f"/workshop-users/workshop/{wid}/students"), 200, None),
+        ("attendance.user_history", admin, get(f"/attendance/user/{uid}/workshop/{wid}"), 200, None),
+        ("attendance.workshop_report", admin, get(f"/attendance/workshop/{wid}/report"), 200, None),
+        ("attendance.detailed_report", admin, get(f"/attendance/reports/workshop/{wid}"), 200, None),
+        ("attendance.report_workshops", admin, get("/attendance/reports/workshops"), 200, None),
+        ("attendance.my_workshops", professional, get("/attendance/my-workshops"), 200, None),
+        ("thematic_areas.list", admin, get("/thematic-areas/"), 200, None),
+        ("css.active", admin, get("/css/active"), 200, None),
+        ("diagnostics.pool", admin, get("/diagnostics/pool"), 200, None),
+    ]
+
+
+def _request(client, headers, build, i):
+    method, url, body = build(i)
+    # buffered: lee y cierra la respuesta aquí (las de streaming se generan al leerlas)
+    return client.open(url, method=method, json=body, headers=headers or {}, buffered=True)
+
+
+def _run_case(client, headers, build, expected, iterations):
+    latencies, queries = [], []
+    for i in range(WARMUP + iterations):
+        _LastRequest.entry = None
+        started = time.perf_counter()
+        response = _request(client, headers, build, i)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != expected:
+            raise RuntimeError(f"{response.status_code} (esperado {expected}): {response.get_data(as_text=True)[:300]}")
+        if i >= WARMUP:
+            latencies.append(elapsed)
+            queries.append(_LastRequest.entry["queries"] if _LastRequest.entry else -1)
+
+    # Memoria en una petición extra: tracemalloc ralentiza mucho y no debe contar en la latencia
+    tracemalloc.start()
+    _request(client, headers, build, WARMUP + iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "queries": max(queries),
+        "peak_kb": round(peak / 1024, 1),
+        "iterations": iterations,
+    }
+
+
+def _compare(key, result, baseline, tolerance):
+    base = baseline.get(key)
+    if base is None:
+        return "nuevo"
+    problems = []
+    if result["queries"] > base["queries"]:
+        problems.append(f"consultas {base['queries']}->{result['queries']}")
+    if result["p50_ms"] > base["p50_ms"] * tolerance and result["p50_ms"] - base["p50_ms"] > NOISE_FLOOR_MS:
+        problems.append(f"p50 {base['p50_ms']}->{result['p50_ms']}ms")
+    if result["peak_kb"] > base["peak_kb"] * tolerance and result["peak_kb"] - base["peak_kb"] > NOISE_FLOOR_KB:
+        problems.append(f"memoria {base['peak_kb']}->{result['peak_kb']}KB")
+    return "REGRESIÓN: " + ", ".join(problems) if problems else "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1,5,20", help="Escalas de seed-load separadas por comas")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="BD dedicada (se borra). Por defecto un SQLite temporal por escala.")
+    parser.add_argument("--only", help="Solo los casos cuyo nombre contenga este texto")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results, regressions = {}, []
+    tmpdir = tempfile.mkdtemp(prefix="sentya_bench_")
+    for scale in [int(s) for s in args.scales.split(",")]:
+        url = args.database_url or f"sqlite:///{os.path.join(tmpdir, f'scale_{scale}.db')}"
+        app = _build_app(url)
+        started = time.perf_counter()
+        ctx = _prepare(app, scale, needed=WARMUP + args.iterations + 1)
+        print(f"\n== scale {scale} ({app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}, "
+              f"datos en {time.perf_counter() - started:.1f}s)")
+        print(f"{'endpoint':<30}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'peak KB':>10}  vs línea base")
+
+        for name, headers, build, expected, max_iterations in _cases(ctx):
+            if args.only and args.only not in name:
+                continue
+            # Un cliente por caso: la cookie del login tendría prioridad sobre la cabecera Authorization
+            client = app.test_client()
+            iterations = min(args.iterations, max_iterations or args.iterations)
+            key = f"{scale}/{name}"
+            try:
+                result = _run_case(client, headers, build, expected, iterations)
+            except (RuntimeError, IndexError) as error:
+                print(f"{name:<30} ERROR {error}")
+                regressions.append(key)
+                continue
+            results[key] = result
+            status = _compare(key, result, baseline, args.tolerance)
+            if status.startswith("REGRESIÓN"):
+                regressions.append(key)
+            print(f"{name:<30}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                  f"{result['queries']:>9}{result['peak_kb']:>10.1f}  {status}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "database": (args.database_url or "sqlite").split(":")[0],
+                "iterations": args.iterations,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regresiones: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
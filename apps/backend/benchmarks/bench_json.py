@@ -0,0 +1,116 @@
+"""Benchmark del proveedor JSON sobre los payloads más grandes de la API.
+
+Compara el camino anterior (serializers que formatean fechas con strftime/isoformat + json stdlib
+de Flask con sort_keys) con SentyaJSONProvider (valores crudos + orjson si está instalado).
+Mide tiempo de serialización y memoria asignada (tracemalloc) para:
+  - /sessions/schedule  (cada sesión aparece dos veces: por categoría y en "all")
+  - /auth/admin/users?per_page=500
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_json --sessions 5000 --users 500 --repeat 20
+"""
+import argparse
+import enum
+import time
+import tracemalloc
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import SentyaJSONProvider, orjson
+
+
+class _Role(enum.Enum):
+    CLIENT = "client"
+
+
+def _session_rows(n):
+    start = date(2025, 1, 6)
+    now = datetime(2025, 1, 1, 9, 30, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i, "workshop_id": i % 40, "workshop_name": f"Taller {i % 40}",
+            "date": start + timedelta(days=i // 10), "start_time": dtime(9, 0), "end_time": dtime(11, 0),
+            "topic": "Ejercicios de movilidad", "observations": None, "professional_id": 5,
+            "professional_name": "Ana García", "status": "scheduled",
+            "created_at": now, "updated_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def _user_rows(n):
+    now = datetime(2025, 1, 1, 9, 30, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i, "email": f"user{i}@sentya.es", "name": "Nombre", "last_name": "Apellido Apellido",
+            "dni": f"{i:08d}T", "phone": "+34612345678", "rol": _Role.CLIENT, "is_active": True,
+            "two_factor_enabled": True, "created_at": now, "last_login": now, "birth_date": date(1950, 5, 17),
+            "age": "74", "css_id": 3,
+            "css_info": {"id": 3, "name": "Casco Antiguo", "code": "CSS002", "address": "Pendiente de confirmar"},
+        }
+        for i in range(n)
+    ]
+
+
+def _preformat(row):
+    # Lo que hacían los serializers antes: formatear cada fecha/hora/enum en Python
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, datetime):
+            out[key] = value.isoformat()
+        elif isinstance(value, date):
+            out[key] = value.strftime('%Y-%m-%d')
+        elif isinstance(value, dtime):
+            out[key] = value.strftime('%H:%M')
+        elif isinstance(value, enum.Enum):
+            out[key] = value.value
+        else:
+            out[key] = value
+    return out
+
+
+def _schedule_payload(rows, preformat):
+    items = [_preformat(r) if preformat else dict(r, start_time=r["start_time"].strftime('%H:%M'), end_time=r["end_time"].strftime('%H:%M')) for r in rows]
+    return {"sessions": {"today": [], "upcoming": items, "past": [], "all": items}}
+
+
+def _users_payload(rows, preformat):
+    items = [_preformat(r) if preformat else r for r in rows]
+    return {"users": items, "pagination": {"page": 1, "per_page": len(items), "total": len(items), "pages": 1}}
+
+
+def _measure(label, build, encode, repeat):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for _ in range(repeat):
+        size = len(encode(build()))
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {elapsed:9.2f} ms/resp   pico {peak / 1024:9.0f} KiB   {size / 1024:8.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = SentyaJSONProvider(app)
+    print(f"orjson disponible: {orjson is not None}")
+
+    sessions = _session_rows(args.sessions)
+    users = _user_rows(args.users)
+
+    for name, rows, payload in (("/sessions/schedule", sessions, _schedule_payload), ("/auth/admin/users", users, _users_payload)):
+        print(f"{name} ({len(rows)} filas)")
+        _measure("antes (strftime + stdlib)", lambda: payload(rows, True), lambda obj: stdlib.dumps(obj).encode(), args.repeat)
+        _measure("después (crudo + provider)", lambda: payload(rows, False), fast.dumps_bytes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
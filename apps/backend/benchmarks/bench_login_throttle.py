@@ -0,0 +1,90 @@
+"""CPU consumida por un ataque de credential stuffing contra POST /auth/login, con y sin rate limiting.
+
+Crea una BD SQLite temporal con `seed-load` y lanza --requests intentos con contraseñas falsas contra emails reales
+del personal (cada uno cuesta un bcrypt) repartidos entre --ips IPs. Cada 20 intentos un usuario legítimo
+entra desde su propia IP. Modos:
+  off      sin limitador (como antes)
+  memory   limitador con contadores en memoria del proceso
+  sqlite   limitador con contadores en un fichero SQLite compartido (el de producción por defecto)
+Para cada modo muestra el tiempo de CPU del proceso, cuántos intentos llegaron a bcrypt y cuántos se rechazaron
+con 429, la latencia del rechazo y si el usuario legítimo pudo entrar siempre.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_login_throttle --requests 200 --ips 2 --emails 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+MODES = ("off", "memory", "sqlite")
+PASSWORD = "LoadTest123!"
+
+
+def _setup(mode, folder):
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.user import SystemUser, UserRole
+    from app.utils.seed_load import generate
+
+    storage = "memory://" if mode == "memory" else f"sqlite:///{os.path.join(folder, f'ratelimit_{mode}.db')}"
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, f'login_{mode}.db')}",
+        "RATE_LIMIT_ENABLED": mode != "off",
+        "RATE_LIMIT_STORAGE": storage,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+    })
+    with app.app_context():
+        db.create_all()
+        generate(1, 1, date.today(), PASSWORD, echo=lambda *_: None)
+        emails = [email for email, in db.session.query(SystemUser.email)
+                  .filter(SystemUser.rol != UserRole.CLIENT).order_by(SystemUser.id)]
+    return app, emails
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="Intentos del ataque por modo")
+    parser.add_argument("--ips", type=int, default=2, help="IPs desde las que ataca")
+    parser.add_argument("--emails", type=int, default=20, help="Cuentas reales atacadas")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="sentya_throttle_")
+    print(f"{args.requests} intentos desde {args.ips} IPs contra {args.emails} cuentas")
+    print(f"{'modo':<8}{'CPU s':>8}{'CPU ms/int':>12}{'bcrypt':>8}{'429':>6}{'p50 429 ms':>12}{'legítimo':>10}")
+    for mode in MODES:
+        app, emails = _setup(mode, folder)
+        legit, targets = emails[0], emails[1:args.emails + 1]
+        client = app.test_client()
+        statuses, rejected_ms, legit_ok = [], [], []
+
+        cpu_started = time.process_time()
+        for i in range(args.requests):
+            ip = f"203.0.113.{i % args.ips + 1}"
+            body = {"email": targets[i % len(targets)], "password": f"wrong-{i}"}
+            started = time.perf_counter()
+            response = client.post("/auth/login", json=body, environ_base={"REMOTE_ADDR": ip})
+            elapsed = (time.perf_counter() - started) * 1000
+            statuses.append(response.status_code)
+            if response.status_code == 429:
+                rejected_ms.append(elapsed)
+            if i % 20 == 0:
+                # Credenciales correctas: 401 con requires_2fa_setup (el personal generado no tiene 2FA) = ha entrado
+                response = client.post("/auth/login", json={"email": legit, "password": PASSWORD},
+                                       environ_base={"REMOTE_ADDR": "198.51.100.7"})
+                legit_ok.append(bool((response.get_json() or {}).get("requires_2fa_setup")))
+        cpu = time.process_time() - cpu_started
+
+        attempts = sum(1 for status in statuses if status != 429)
+        throttled = len(statuses) - attempts
+        p50 = f"{statistics.median(rejected_ms):.2f}" if rejected_ms else "-"
+        print(f"{mode:<8}{cpu:>8.1f}{cpu * 1000 / args.requests:>12.1f}{attempts:>8}{throttled:>6}{p50:>12}"
+              f"{sum(legit_ok):>6}/{len(legit_ok)}")
+
+
+if __name__ == "__main__":
+    main()
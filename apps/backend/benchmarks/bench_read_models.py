@@ -0,0 +1,139 @@
+"""CPU y memoria por 10k filas de los listados de solo lectura: objetos ORM + serialize() frente a los read models
+(columnas justas con JOIN y dicts construidos desde la tupla, app/services/*_service.py).
+
+Crea una BD SQLite temporal con `seed-load` y, para cada listado, construye la lista de dicts por los dos caminos
+en una sesión nueva (identity map vacío):
+  - workshops   GET /workshops/                Workshop.query.all() + serialize()
+  - sessions    GET /sessions/my-enrolled-...  Session.query...all() + serialize() (todas las sesiones)
+  - users       GET /auth/admin/users          paginate() + dict con user.css (una página de --per-page)
+Mide el tiempo de CPU (sin tracemalloc) y el pico de memoria (con tracemalloc) normalizados a 10k filas, las
+consultas lanzadas, y comprueba que los dos caminos devuelven exactamente el mismo JSON.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_read_models --scale 20 --per-page 2000 --repeat 3
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+
+def _orm_workshops():
+    from app.models.workshops import Workshop
+    return [w.serialize() for w in Workshop.query.all()]
+
+
+def _orm_sessions():
+    from app.models.sessions import Session
+    return [s.serialize() for s in Session.query.order_by(Session.id).all()]
+
+
+def _orm_users(per_page):
+    from app.models.user import SystemUser
+    users = SystemUser.query.order_by(SystemUser.created_at.desc()).paginate(page=1, per_page=per_page, error_out=False).items
+    return [
+        {
+            "id": user.id, "email": user.email, "name": user.name, "last_name": user.last_name, "dni": user.dni,
+            "phone": user.phone, "rol": user.rol, "is_active": user.is_active,
+            "two_factor_enabled": user.two_factor_enabled, "created_at": user.created_at,
+            "last_login": user.last_login, "birth_date": user.birth_date, "age": user.age, "css_id": user.css_id,
+            "css_info": {"id": user.css.id, "name": user.css.name, "code": user.css.code,
+                         "address": user.css.address} if user.css else None
+        }
+        for user in users
+    ]
+
+
+def _read_workshops():
+    from app.services.workshop_service import iter_workshops
+    return list(iter_workshops())
+
+
+def _read_sessions():
+    from app.services.session_service import iter_sessions
+    return list(iter_sessions())
+
+
+def _read_users(per_page):
+    from app.services.user_service import page_users
+    return page_users([], 1, per_page)[0]
+
+
+def _run(app, build, counter):
+    from app.extensions import db
+    with app.app_context():
+        db.session.remove()
+        before = counter[0]
+        rows = build()
+        queries = counter[0] - before
+        db.session.remove()
+    return rows, queries
+
+
+def _measure(app, build, counter, repeat):
+    """(filas, CPU s por ejecución, pico de memoria en bytes, consultas)"""
+    rows, queries = _run(app, build, counter)
+    cpu = []
+    for _ in range(repeat):
+        started = time.process_time()
+        _run(app, build, counter)
+        cpu.append(time.process_time() - started)
+    tracemalloc.start()
+    _run(app, build, counter)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, min(cpu), peak, queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=20, help="Escala de seed-load")
+    parser.add_argument("--per-page", type=int, default=2000, help="Usuarios por página en el listado de usuarios")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.extensions import db
+    from app.main import create_app
+    from app.utils.seed_load import generate
+
+    folder = tempfile.mkdtemp(prefix="sentya_readmodels_")
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, 'read_models.db')}",
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+    })
+    with app.app_context():
+        db.create_all()
+        generate(args.scale, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+
+    counter = [0]
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _count(*_):
+        counter[0] += 1
+
+    listings = [
+        ("workshops", _orm_workshops, _read_workshops),
+        ("sessions", _orm_sessions, _read_sessions),
+        ("users", lambda: _orm_users(args.per_page), lambda: _read_users(args.per_page)),
+    ]
+    print(f"{'listado':<11}{'camino':<8}{'filas':>7}{'consultas':>11}{'CPU ms/10k':>12}{'pico MB/10k':>13}")
+    for name, orm_build, read_build in listings:
+        results = {}
+        for label, build in (("orm", orm_build), ("read", read_build)):
+            rows, cpu, peak, queries = _measure(app, build, counter, args.repeat)
+            results[label] = rows
+            per_10k = 10000 / max(len(rows), 1)
+            print(f"{name:<11}{label:<8}{len(rows):>7}{queries:>11}{cpu * 1000 * per_10k:>12.1f}"
+                  f"{peak / 1e6 * per_10k:>13.1f}")
+        same = app.json.dumps(results["orm"]) == app.json.dumps(results["read"])
+        print(f"{'':<11}mismo JSON: {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Informes en segundo plano (app/services/report_jobs_service.py): coste de generar frente a servir de la caché.
+
+Para cada escala crea una BD SQLite temporal con `seed-load` y, como administrador, para el detalle de todas las
+asistencias y el resumen de un CSS (CSV y XLSX):
+  - export      GET /export sin caché (genera en streaming y guarda el fichero)
+  - job         POST /reports/jobs con datos nuevos + `report-worker --once` (1 proceso) hasta terminar
+  - job_cached  POST /reports/jobs repetido: el trabajo nace terminado con el fichero en caché
+  - export_hit  GET /export repetido: el fichero sale de disco
+  - version     la consulta de versión de datos que hacen todas las peticiones anteriores
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_report_jobs --scales 5,20
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+
+def _setup(scale, folder):
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.user import SystemUser, UserRole
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, f'report_jobs_{scale}.db')}",
+        "RATE_LIMIT_ENABLED": False,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+        "TOKEN_VERSION_CHECK_SECONDS": 3600,
+        "REPORT_JOBS_DIR": os.path.join(folder, f"report_jobs_{scale}"),
+        "REPORT_WORKER_POLL_SECONDS": 0.05,
+    })
+    with app.app_context():
+        db.create_all()
+        generate(scale, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+        admin = SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first()
+        admin.rol = UserRole.ADMINISTRATOR
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {issue_tokens_for_user(admin)}"}
+        css_id = admin.css_id
+    return app, headers, css_id
+
+
+def _touch_data(app):
+    """Cambia una asistencia: nueva versión de datos, la caché anterior deja de valer."""
+    from app.extensions import db
+    from app.models.attendance import Attendance
+
+    with app.app_context():
+        attendance = db.session.get(Attendance, 1)
+        attendance.recorded_at = datetime.now(timezone.utc)
+        db.session.commit()
+
+
+def _ms(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="5,20")
+    args = parser.parse_args()
+
+    from app.services.report_jobs_service import data_version
+    from app.utils.exports import XLSX_AVAILABLE
+    from app.utils.report_worker import run_workers
+
+    folder = tempfile.mkdtemp(prefix="sentya_report_jobs_")
+    print(f"{'escala':<8}{'informe':<22}{'filas':>8}{'export ms':>11}{'job ms':>9}{'cached ms':>11}"
+          f"{'hit ms':>9}{'version ms':>12}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        app, headers, css_id = _setup(scale, folder)
+        client = app.test_client()
+        cases = [
+            ("attendance_detail", {"from": "2000-01-01", "to": "2100-12-31"}, "/attendance/reports/export"),
+            ("css_summary", {"css_id": css_id, "from": "2000-01-01", "to": "2100-12-31"},
+             f"/attendance/reports/css/{css_id}/export"),
+        ]
+        formats = ("csv", "xlsx") if XLSX_AVAILABLE else ("csv",)
+        for report, params, url in cases:
+            query = "&".join(f"{key}={value}" for key, value in params.items() if key != "css_id" or "css/" not in url)
+            for fmt in formats:
+                _touch_data(app)
+                export_url = f"{url}?{query}&format={fmt}"
+                export_ms, response = _ms(lambda: client.get(export_url, headers=headers).data)
+
+                _touch_data(app)
+                body = {"report": report, "format": fmt, **params}
+
+                def job():
+                    created = client.post("/attendance/reports/jobs", json=body, headers=headers).json
+                    with app.app_context():
+                        run_workers(app, 1, once=True)
+                    return client.get(created["status_url"], headers=headers).json
+
+                job_ms, finished = _ms(job)
+                cached_ms, cached = _ms(lambda: client.post("/attendance/reports/jobs", json=body, headers=headers).json)
+                assert cached["cached"] and cached["status"] == "done", cached
+                hit_ms, _ = _ms(lambda: client.get(export_url, headers=headers).data)
+                with app.app_context():
+                    version_ms, _ = _ms(data_version)
+                print(f"{scale:<8}{f'{report} {fmt}':<22}{finished['rows']:>8}{export_ms:>11.0f}{job_ms:>9.0f}"
+                      f"{cached_ms:>11.1f}{hit_ms:>9.1f}{version_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Caché de respuestas GET (app/utils/response_cache.py): acierto frente a fallo y coste de la invalidación.
+
+Crea una BD SQLite temporal con `seed-load` y, para las vistas cacheadas más usadas tras el login, mide con el
+cliente de pruebas de Flask (mediana de --iterations peticiones):
+  - off     RESPONSE_CACHE_ENABLED=false (la vista tal cual)
+  - miss    petición sin entrada en la caché (vista + versiones + guardar la entrada)
+  - hit     petición repetida sin escrituras entre medias
+  - 304     petición repetida con If-None-Match
+con el nº de consultas SQL de cada caso. Después comprueba el alcance de la invalidación por taller: cambiar una
+sesión del taller A no debe invalidar el informe del taller B.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_response_cache --scale 5 --iterations 30
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+
+def _setup(scale, folder):
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.user import SystemUser, UserRole
+    from app.models.workshops import Workshop
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, 'response_cache.db')}",
+        "RESPONSE_CACHE_STORAGE": f"sqlite:///{os.path.join(folder, 'response_cache_kv.db')}",
+        "RATE_LIMIT_ENABLED": False,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+        "TOKEN_VERSION_CHECK_SECONDS": 3600,
+        "REFERENCE_CACHE_CHECK_SECONDS": 3600,
+    })
+    with app.app_context():
+        db.create_all()
+        generate(scale, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+        coordinator = SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first()
+        professional = SystemUser.query.filter_by(rol=UserRole.PROFESSIONAL).order_by(SystemUser.id).first()
+        workshops = [w.id for w in Workshop.query.filter_by(css_id=coordinator.css_id).order_by(Workshop.id).limit(2)]
+        headers = {
+            "coordinator": {"Authorization": f"Bearer {issue_tokens_for_user(coordinator)}"},
+            "professional": {"Authorization": f"Bearer {issue_tokens_for_user(professional)}"},
+        }
+    return app, headers, workshops
+
+
+def _touch_session(app, workshop_id):
+    """Commit en una sesión del taller: sube t:sessions y w:<taller>."""
+    from app.extensions import db
+    from app.models.sessions import Session
+
+    with app.app_context():
+        session = Session.query.filter_by(workshop_id=workshop_id).order_by(Session.id).first()
+        session.observations = f"bench {time.perf_counter()}"
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.utils.response_cache import response_cache
+
+    folder = tempfile.mkdtemp(prefix="sentya_response_cache_")
+    app, headers, (workshop_a, workshop_b) = _setup(args.scale, folder)
+    client = app.test_client()
+
+    queries = [0]
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _count(*_):
+        queries[0] += 1
+
+    def measure(url, who, before=None, extra=None):
+        times, counts = [], []
+        for _ in range(args.iterations):
+            if before:
+                before()
+            queries[0] = 0
+            started = time.perf_counter()
+            response = client.get(url, headers={**headers[who], **(extra or {})})
+            times.append((time.perf_counter() - started) * 1000)
+            counts.append(queries[0])
+            assert response.status_code in (200, 304), (url, response.status_code)
+        return statistics.median(times), int(statistics.median(counts)), response
+
+    cases = [
+        ("user.me", "professional", "/user/me"),
+        ("workshops.list", "coordinator", "/workshops/"),
+        ("workshops.my", "professional", "/workshops/my-workshops"),
+        ("sessions.workshop", "coordinator", f"/sessions/workshop/{workshop_a}"),
+        ("attendance.my", "professional", "/attendance/my-workshops"),
+        ("attendance.report", "coordinator", f"/attendance/workshop/{workshop_a}/report"),
+        ("reports.workshops", "coordinator", "/attendance/reports/workshops"),
+    ]
+    print(f"{'endpoint':<20}{'off ms':>8}{'q':>4}{'miss ms':>9}{'q':>4}{'hit ms':>8}{'q':>4}{'304 ms':>8}{'q':>4}")
+    for name, who, url in cases:
+        app.config["RESPONSE_CACHE_ENABLED"] = False
+        off_ms, off_q, _ = measure(url, who)
+        app.config["RESPONSE_CACHE_ENABLED"] = True
+        miss_ms, miss_q, _ = measure(url, who, before=response_cache._clear)
+        hit_ms, hit_q, response = measure(url, who)
+        assert response.headers.get("X-Cache") == "HIT", (url, response.headers.get("X-Cache"))
+        etag = {"If-None-Match": response.headers["ETag"]}
+        not_modified_ms, not_modified_q, _ = measure(url, who, extra=etag)
+        print(f"{name:<20}{off_ms:>8.2f}{off_q:>4}{miss_ms:>9.2f}{miss_q:>4}{hit_ms:>8.2f}{hit_q:>4}"
+              f"{not_modified_ms:>8.2f}{not_modified_q:>4}")
+
+    # Alcance: una escritura en el taller A no invalida el informe del taller B
+    who = "coordinator"
+    report_b = f"/attendance/workshop/{workshop_b}/report"
+    client.get(report_b, headers=headers[who])
+    _touch_session(app, workshop_a)
+    scoped = client.get(report_b, headers=headers[who]).headers.get("X-Cache")
+    _touch_session(app, workshop_b)
+    invalidated = client.get(report_b, headers=headers[who]).headers.get("X-Cache")
+    print(f"\ninforme taller B tras escribir en A: {scoped} (esperado HIT); tras escribir en B: {invalidated} "
+          f"(esperado MISS)")
+
+    print(f"estadísticas: {response_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
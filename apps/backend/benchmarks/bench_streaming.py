@@ -0,0 +1,116 @@
+"""Pico de memoria de los listados en streaming (app/utils/streaming.py) según crece el número de filas.
+
+Para cada escala crea una BD SQLite temporal con `seed-load` y pide, con el cliente de pruebas de Flask y leyendo la
+respuesta trozo a trozo sin acumularla (como haría gunicorn enviándola al socket):
+  - schedule    GET /sessions/schedule como administrador (todas las sesiones, cada una dos veces)
+  - users_all   GET /auth/admin/users?per_page=all
+  - users_nd    GET /auth/admin/users?per_page=all&format=ndjson
+  - detail_csv  GET /attendance/reports/export (todas las asistencias, CSV)
+  - detail_xlsx GET /attendance/reports/export?format=xlsx (openpyxl write_only; se omite sin openpyxl)
+Compara el pico de memoria de Python (tracemalloc) con el de construir la misma lista entera y pasarla a jsonify,
+que es lo que hacían antes estas rutas. Con streaming el pico debe quedarse plano aunque crezcan las filas.
+
+Uso (desde apps/backend):
+    python -m benchmarks.bench_streaming --scales 5,20,60
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+
+def _setup(scale, folder):
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.user import SystemUser, UserRole
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, f'streaming_{scale}.db')}",
+        "RATE_LIMIT_ENABLED": False,
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+        "AUDIT_MODE": "off",
+        "TOKEN_VERSION_CHECK_SECONDS": 3600,
+    })
+    with app.app_context():
+        db.create_all()
+        generate(scale, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+        admin = SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first()
+        admin.rol = UserRole.ADMINISTRATOR  # exportaciones de todos los CSS
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {issue_tokens_for_user(admin)}"}
+    return app, headers
+
+
+def _read(client, url, headers):
+    response = client.get(url, headers=headers, buffered=False)
+    sent = 0
+    for chunk in response.response:
+        sent += len(chunk)
+    response.close()
+    return sent
+
+
+def _streamed(client, url, headers):
+    """(bytes enviados, segundos, pico de memoria) leyendo la respuesta trozo a trozo.
+    El tiempo sale de una ejecución sin tracemalloc (lo ralentiza mucho)."""
+    started = time.perf_counter()
+    sent = _read(client, url, headers)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    _read(client, url, headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sent, elapsed, peak
+
+
+def _buffered(app, build):
+    """Pico de memoria de materializar la lista y codificarla entera (camino de jsonify)."""
+    with app.test_request_context():
+        tracemalloc.start()
+        rows = list(build())
+        body = app.json.dumps_bytes({"rows": rows})
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return len(rows), len(body), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="5,20,60")
+    args = parser.parse_args()
+
+    from app.services.attendance_service import attendance_detail
+    from app.services.session_service import iter_sessions
+    from app.services.user_service import iter_users
+    from app.utils.exports import XLSX_AVAILABLE
+
+    folder = tempfile.mkdtemp(prefix="sentya_streaming_")
+    print(f"{'escala':<8}{'listado':<11}{'filas':>8}{'MB enviados':>13}{'pico stream KB':>16}{'pico lista KB':>15}{'s':>7}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        app, headers = _setup(scale, folder)
+        client = app.test_client()
+        cases = [
+            ("schedule", "/sessions/schedule", iter_sessions),
+            ("users_all", "/auth/admin/users?per_page=all", lambda: iter_users([])),
+            ("users_nd", "/auth/admin/users?per_page=all&format=ndjson", lambda: iter_users([])),
+        ]
+        everything = "from=2000-01-01&to=2100-12-31"
+        detail = lambda: attendance_detail(date(2000, 1, 1), date(2100, 12, 31))[1]
+        cases.append(("detail_csv", f"/attendance/reports/export?{everything}", detail))
+        if XLSX_AVAILABLE:
+            cases.append(("detail_xlsx", f"/attendance/reports/export?{everything}&format=xlsx", detail))
+        for name, url, build in cases:
+            _read(client, url, headers)  # calentar (imports, caché de consultas)
+            sent, elapsed, peak = _streamed(client, url, headers)
+            rows, _, list_peak = _buffered(app, build)
+            print(f"{scale:<8}{name:<11}{rows:>8}{sent / 1e6:>13.2f}{peak / 1024:>16.0f}{list_peak / 1024:>15.0f}"
+                  f"{elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
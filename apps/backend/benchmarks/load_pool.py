@@ -0,0 +1,107 @@
+"""Prueba de carga del pool de conexiones: 4 workers x 8 hilos (gunicorn -k gthread -w 4 --threads 8).
+
+Cada proceso crea su propia app (como un worker sin --preload) con DB_POOL_PROFILE=threaded y lanza N hilos
+que hacen peticiones reales a través de Flask contra una ruta de prueba que ejecuta consultas típicas y
+mantiene la conexión ocupada `--hold-ms` (simula una consulta lenta). Al final cada worker informa de su pool:
+conexiones máximas en uso, tiempo de espera y timeouts. Si hay algún timeout el pool se agotó: exit 1.
+
+Uso (desde apps/backend; por defecto usa DATABASE_URL de la configuración):
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.load_pool --workers 4 --threads 8 --duration 20
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+
+
+def _worker(index, args, results):
+    os.environ["DB_POOL_PROFILE"] = args.profile
+    os.environ["DB_POOL_THREADS"] = str(args.threads)
+    from flask import jsonify
+    from sqlalchemy import text
+    from app.main import create_app
+    from app.extensions import db
+    from app.utils.db_pool import pool_stats
+
+    app = create_app()
+    with app.app_context():
+        engine = db.engine
+    is_postgres = engine.dialect.name == "postgresql"
+
+    @app.route("/_load")
+    def load_route():
+        db.session.execute(text("SELECT count(*) FROM system_users")).scalar()
+        db.session.execute(text("SELECT id, date, start_time FROM sessions ORDER BY date DESC LIMIT 50")).all()
+        if is_postgres:
+            db.session.execute(text("SELECT pg_sleep(:s)"), {"s": args.hold_ms / 1000})
+        else:
+            time.sleep(args.hold_ms / 1000)
+        return jsonify(ok=True)
+
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+
+    def run():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.get("/_load")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=run) for _ in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    results.put({
+        "worker": index,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50_ms": statistics.median(latencies) if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+        "pool": pool_stats(engine),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--hold-ms", type=float, default=20)
+    parser.add_argument("--profile", default="threaded", choices=["sync", "threaded", "pgbouncer"])
+    args = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker, args=(i, args, results)) for i in range(args.workers)]
+    for p in procs:
+        p.start()
+    rows = sorted((results.get() for _ in procs), key=lambda r: r["worker"])
+    for p in procs:
+        p.join()
+
+    print(f"perfil={args.profile} workers={args.workers} hilos={args.threads} hold={args.hold_ms}ms")
+    print(f"{'worker':>6} {'req':>7} {'err':>5} {'p50 ms':>8} {'p99 ms':>8} {'pool':>5} {'max uso':>8} {'espera max':>11} {'timeouts':>9}")
+    timeouts = 0
+    for r in rows:
+        pool = r["pool"]
+        timeouts += pool.get("timeouts", 0)
+        print(f"{r['worker']:>6} {r['requests']:>7} {r['errors']:>5} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{pool.get('size', '-'):>5} {pool.get('checked_out_max', '-'):>8} {pool.get('wait_max_ms', 0):>10.1f}ms {pool.get('timeouts', 0):>9}")
+    total = sum(r["requests"] for r in rows)
+    print(f"total {total} peticiones ({total / args.duration:.0f} req/s), conexiones máximas {args.workers} x "
+          f"{max(r['pool'].get('checked_out_max', 0) for r in rows)}")
+    if timeouts or any(r["errors"] for r in rows):
+        print("POOL AGOTADO: hubo timeouts o errores")
+        raise SystemExit(1)
+    print("OK: sin agotamiento del pool")
+
+
+if __name__ == "__main__":
+    main()
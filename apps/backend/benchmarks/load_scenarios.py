@@ -0,0 +1,275 @@
+"""Escenarios de carga con varios usuarios a la vez contra un gunicorn local (cliente HTTP asíncrono).
+
+Genera el dataset con `seed-load`, arranca gunicorn con gunicorn.conf.py sirviendo esa BD y emite los JWT
+con issue_tokens_for_user (sin pasar por el login con 2FA). Escenarios:
+  attendance  N profesionales a la vez (las 10:00): abren su horario, la lista de la sesión y pasan lista
+  available   N clientes consultan /workshops/available y sus talleres inscritos
+  reports     N coordinadores sacan el listado de reportes y el reporte detallado de varios talleres
+  mixed       los tres a la vez
+Para cada escenario muestra peticiones/s, % de errores y p50/p95/p99 por endpoint. Exit 1 si hay errores
+por encima de --max-error-rate.
+
+Requiere httpx (pipenv install --dev). Uso (desde apps/backend):
+    python -m benchmarks.load_scenarios --scale 15 --workers 4 --threads 4
+    python -m benchmarks.load_scenarios --scenarios attendance,mixed --professionals 40 --clients 500
+    python -m benchmarks.load_scenarios --database-url postgresql+psycopg://localhost/sentya_load
+Con SQLite las escrituras concurrentes se serializan (habrá esperas y algún "database is locked"): para cifras
+realistas usar una BD PostgreSQL dedicada (se BORRA antes de generar los datos).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date
+
+SEED = 1
+SCENARIOS = ("attendance", "available", "reports", "mixed")
+
+
+def server_app():
+    """App que sirve gunicorn durante la prueba: `benchmarks.load_scenarios:server_app()`."""
+    from app.main import create_app
+
+    return create_app(with_migrations=False, test_config={
+        "SQLALCHEMY_DATABASE_URI": os.environ["LOAD_DATABASE_URL"],
+        "REQUEST_TIMING_LOG": False,
+        "PROFILER_ENABLED": False,
+    })
+
+
+def _prepare(database_url, scale, args):
+    """Genera los datos y devuelve los usuarios virtuales de cada escenario: [(cabeceras, pasos)]."""
+    from sqlalchemy import select
+    from app.extensions import db
+    from app.main import create_app
+    from app.models.sessions import Session
+    from app.models.user import SystemUser, UserRole
+    from app.models.workshop_users import WorkshopUser
+    from app.models.workshops import Workshop
+    from app.utils.helper import issue_tokens_for_user
+    from app.utils.seed_load import generate
+
+    app = create_app(with_migrations=False, test_config={"SQLALCHEMY_DATABASE_URI": database_url})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(scale, SEED, date.today(), "LoadTest123!", echo=lambda *_: None)
+
+        def headers(user):
+            return {"Authorization": f"Bearer {issue_tokens_for_user(user)}"}
+
+        enrolled = defaultdict(list)
+        for wid, uid in db.session.execute(
+            select(WorkshopUser.workshop_id, WorkshopUser.user_id).where(WorkshopUser.waitlist_position.is_(None))
+        ):
+            enrolled[wid].append(uid)
+
+        # Profesionales: la primera sesión pendiente de uno de sus talleres
+        next_session = {}
+        for session_id, wid, professional_id in db.session.execute(
+            select(Session.id, Session.workshop_id, Workshop.professional_id)
+            .join(Workshop, Workshop.id == Session.workshop_id)
+            .where(Session.status == "scheduled").order_by(Session.date, Session.start_time, Session.id)
+        ):
+            if professional_id not in next_session and enrolled.get(wid):
+                next_session[professional_id] = (session_id, wid)
+        professionals = []
+        for professional_id, (session_id, wid) in list(next_session.items())[:args.professionals]:
+            attendances = [{"user_id": uid, "present": n % 6 != 0} for n, uid in enumerate(enrolled[wid])]
+            professionals.append((headers(db.session.get(SystemUser, professional_id)), [
+                ("sessions.schedule", "GET", "/sessions/schedule", None),
+                ("attendance.session", "GET", f"/attendance/session/{session_id}", None),
+                ("attendance.take", "POST", f"/attendance/session/{session_id}", {"attendances": attendances}),
+            ]))
+
+        clients = [
+            (headers(user), [
+                ("workshops.available", "GET", "/workshops/available", None),
+                ("workshop_users.my_enrolled", "GET", "/workshop-users/my-enrolled", None),
+            ])
+            for user in SystemUser.query.filter_by(rol=UserRole.CLIENT).order_by(SystemUser.id).limit(args.clients)
+        ]
+
+        coordinators = []
+        for user in SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).limit(args.coordinators):
+            workshop_ids = db.session.execute(
+                select(Workshop.id).where(Workshop.css_id == user.css_id).order_by(Workshop.id).limit(args.reports_per_coordinator)
+            ).scalars()
+            coordinators.append((headers(user), [("attendance.report_workshops", "GET", "/attendance/reports/workshops", None)] + [
+                ("attendance.detailed_report", "GET", f"/attendance/reports/workshop/{wid}", None) for wid in workshop_ids
+            ]))
+
+    if len(professionals) < args.professionals or len(coordinators) < args.coordinators or len(clients) < args.clients:
+        print(f"aviso: la escala {scale} solo da {len(professionals)} profesionales, {len(clients)} clientes y "
+              f"{len(coordinators)} coordinadores (sube --scale)")
+    return {"attendance": professionals, "available": clients, "reports": coordinators}
+
+
+class _Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.samples = defaultdict(str)
+
+    def record(self, name, elapsed_ms, error=None):
+        self.latencies[name].append(elapsed_ms)
+        if error:
+            self.errors[name] += 1
+            self.samples[name] = self.samples[name] or error
+
+
+async def _virtual_user(client, semaphore, user_headers, steps, stats):
+    import httpx
+
+    for name, method, url, body in steps:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, headers=user_headers)
+                error = None if response.status_code < 400 else f"HTTP {response.status_code}: {response.text[:120]}"
+            except httpx.HTTPError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            stats.record(name, (time.perf_counter() - started) * 1000, error)
+
+
+async def _run_scenario(base_url, users, concurrency):
+    import httpx
+
+    stats = _Stats()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        # Todos los usuarios llegan a la vez: es el pico que nos interesa (p.ej. las 10:00)
+        await asyncio.gather(*(_virtual_user(client, semaphore, h, steps, stats) for h, steps in users))
+        wall = time.perf_counter() - started
+    return stats, wall
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1)]
+
+
+def _report(scenario, stats, wall):
+    total = sum(len(v) for v in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"\n== {scenario}: {total} peticiones en {wall:.2f}s -> {total / wall:.1f} req/s, "
+          f"errores {errors} ({errors / max(total, 1):.1%})")
+    print(f"{'endpoint':<32}{'n':>6}{'err':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    summary = {"requests": total, "errors": errors, "wall_s": round(wall, 3), "rps": round(total / wall, 1), "endpoints": {}}
+    for name, latencies in stats.latencies.items():
+        row = {
+            "n": len(latencies), "errors": stats.errors[name],
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p95_ms": round(_percentile(latencies, 95), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+        }
+        summary["endpoints"][name] = row
+        print(f"{name:<32}{row['n']:>6}{row['errors']:>6}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+        if stats.samples[name]:
+            print(f"    ej. error: {stats.samples[name]}")
+    return summary
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_gunicorn(database_url, args):
+    import httpx
+
+    port = _free_port()
+    env = dict(
+        os.environ, LOAD_DATABASE_URL=database_url, PORT=str(port), GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads), GUNICORN_MAX_REQUESTS="0",
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="sentya-prom-"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "benchmarks.load_scenarios:server_app()"],
+        env=env, stdout=subprocess.DEVNULL, stderr=None if args.server_logs else subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(150):
+        if server.poll() is not None:
+            raise SystemExit("gunicorn terminó al arrancar (usa --server-logs para ver el error)")
+        try:
+            httpx.get(f"{base_url}/auth/roles", timeout=1)
+            return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("gunicorn no arrancó")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--scale", type=int, default=15, help="Escala de seed-load (15 = 120 profesionales, 3.000 clientes)")
+    parser.add_argument("--professionals", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--coordinators", type=int, default=10)
+    parser.add_argument("--reports-per-coordinator", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=100, help="Peticiones en vuelo como máximo")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--database-url", default=os.getenv("LOAD_DATABASE_URL"),
+                        help="BD dedicada (se borra). Por defecto un SQLite temporal.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="Guardar los resultados en este fichero")
+    parser.add_argument("--server-logs", action="store_true", help="Mostrar el stderr de gunicorn")
+    args = parser.parse_args()
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise SystemExit("Hace falta httpx: pipenv install --dev (o pip install httpx)")
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Escenarios desconocidos: {', '.join(sorted(unknown))} (opciones: {', '.join(SCENARIOS)})")
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sentya_load_'), 'load.db')}"
+    started = time.perf_counter()
+    users = _prepare(database_url, args.scale, args)
+    print(f"Datos (scale={args.scale}) generados en {time.perf_counter() - started:.1f}s en {database_url.split(':')[0]}")
+
+    server, base_url = _start_gunicorn(database_url, args)
+    print(f"gunicorn en {base_url}: {args.workers} workers x {args.threads} hilos, concurrencia {args.concurrency}")
+    results, failed = {}, False
+    try:
+        for scenario in scenarios:
+            if scenario == "mixed":
+                # Los profesionales ya pasaron lista en "attendance": en el mixto solo consultan
+                professionals = [(h, steps[:2]) for h, steps in users["attendance"]] if "attendance" in scenarios else users["attendance"]
+                scenario_users = professionals + users["available"] + users["reports"]
+            else:
+                scenario_users = users[scenario]
+            stats, wall = asyncio.run(_run_scenario(base_url, scenario_users, args.concurrency))
+            results[scenario] = _report(scenario, stats, wall)
+            failed |= results[scenario]["errors"] > results[scenario]["requests"] * args.max_error_rate
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scale": args.scale, "workers": args.workers, "threads": args.threads,
+                       "database": database_url.split(":")[0], "scenarios": results}, f, indent=2)
+    if failed:
+        print(f"\nError rate por encima de {args.max_error_rate:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
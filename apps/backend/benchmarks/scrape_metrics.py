@@ -0,0 +1,110 @@
+"""Scraper de prueba para /metrics con varios workers de gunicorn (hace de Prometheus local).
+
+Arranca gunicorn con gunicorn.conf.py (2 workers por defecto), lanza peticiones a /auth/roles y logins
+fallidos, y hace varios scrapes de /metrics. Como cada scrape lo atiende un worker cualquiera, los
+contadores solo cuadran si la agregación multiproceso funciona: comprueba que todos los scrapes
+devuelven exactamente las peticiones enviadas. Exit 1 si no cuadran.
+
+Uso (desde apps/backend):
+    python -m benchmarks.scrape_metrics --workers 2 --requests 200
+"""
+import argparse
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.read()
+
+
+def _sample(families, name, **labels):
+    total = 0.0
+    for family in families:
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                total += sample.value
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--scrapes", type=int, default=6)
+    args = parser.parse_args()
+
+    port = _free_port()
+    token = secrets.token_urlsafe(16)
+    env = dict(
+        os.environ, PORT=str(port), GUNICORN_WORKERS=str(args.workers), GUNICORN_THREADS="1",
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="sentya-prom-"), REQUEST_TIMING_LOG="false",
+        METRICS_TOKEN=token,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.wsgi:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                _request(f"{base}/auth/roles")
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise SystemExit("gunicorn no arrancó")
+
+        for _ in range(args.requests):
+            _request(f"{base}/auth/roles")
+        logins = max(1, args.requests // 20)
+        for _ in range(logins):
+            _request(f"{base}/auth/login", {"email": "nadie@sentya.es", "password": "x"})
+
+        expected_roles = args.requests + 1  # + la petición de espera al arranque
+        # Sin token /metrics no responde
+        status, _ = _request(f"{base}/metrics")
+        ok = status == 401
+        print(f"scrape sin token: HTTP {status} (esperado 401)")
+        for i in range(args.scrapes):
+            status, payload = _request(f"{base}/metrics", headers={"Authorization": f"Bearer {token}"})
+            families = list(text_string_to_metric_families(payload.decode()))
+            roles = _sample(families, "sentya_http_requests_total", endpoint="auth.list_roles", status="200")
+            failed = _sample(families, "sentya_logins_total", result="invalid_credentials")
+            latency = _sample(families, "sentya_http_request_duration_seconds_count", endpoint="auth.list_roles")
+            match = roles == expected_roles and failed == logins and latency == expected_roles
+            ok &= match and status == 200
+            print(f"scrape {i}: HTTP {status}  /auth/roles={roles:.0f}/{expected_roles}  "
+                  f"logins fallidos={failed:.0f}/{logins}  histograma={latency:.0f}  {'OK' if match else 'NO CUADRA'}")
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+
+    if not ok:
+        raise SystemExit(1)
+    print("OK: métricas agregadas correctamente entre workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""Comprobaciones de regresión de extremo a extremo sobre una BD SQLite temporal con `seed-load`.
+
+Cada comprobación llama a rutas reales con el cliente de pruebas de Flask (pasando por todos los middlewares WSGI)
+y termina con exit 1 si alguna falla:
+  - session_attendance   GET /attendance/session/<id> de una sesión con asistencia: 200 y lista completa
+  - report_events_gzip   el primer evento SSE de /attendance/reports/jobs/<id>/events llega al momento aunque el
+                         cliente acepte gzip (sin esperar a que se cierre la conexión)
+  - compression_stream   el middleware de compresión envía el primer fragmento de un stream lento al momento y
+                         marca con Vary: Accept-Encoding también las respuestas que no comprime
+  - rate_limit_parallel  16 procesos contra el mismo contador SQLite con límite 10: pasan exactamente 10
+  - response_cache_replica  con una réplica atrasada, un fallo de la caché de respuestas guarda los datos del
+                         primario (no los de la réplica) y con la cookie sentya_db_primary la caché no se usa
+  - audit_logs_replica   con réplica, GET /audit/logs lee de la réplica sin marcar la petición como escritura
+                         (ni cambio al primario ni cookie sentya_db_primary)
+  - audit_partial_batch  un lote de auditoría con una fila inválida guarda las demás y descarta solo esa
+  - audit_coverage       PUT /workshops/<id> con un cambio de estado y el borrado definitivo de un usuario
+                         (DELETE /auth/admin/users/<id>?force=true) dejan su registro en audit_logs, y los
+                         registros que hizo el usuario borrado conservan su user_id
+  - export_formula_escape  una observación "=..." sale en el CSV y el XLSX de /attendance/reports/export como
+                         texto ('=...), no como fórmula
+  - export_statement_timeout  todas las transacciones de /attendance/reports/export (también la del control de
+                         roles) empiezan ya con el statement_timeout de la ruta
+  - seed_load_invalidation  los datos de `seed-load` (inserción con Core, sin db.session) invalidan las
+                         respuestas cacheadas: /workshops/ deja de ser HIT y trae los talleres nuevos
+  - reference_bump_create_all  sin la fila del contador "css" en reference_versions (BD de create_all), mover un
+                         usuario de CSS la crea y GET /css/active deja de servir el conteo viejo
+  - query_diagnostics_processes  dos workers escriben cada uno su JSONL de diagnóstico y /diagnostics/queries
+                         los lee todos
+
+Uso (desde apps/backend):
+    python -m benchmarks.smoke_checks                 # todas
+    python -m benchmarks.smoke_checks session_attendance
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import traceback
+from datetime import date
+
+CHECKS = {}
+
+
+def check(f):
+    CHECKS[f.__name__] = f
+    return f
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class Env:
+    """App con datos sembrados y cabeceras de un administrador."""
+
+    def __init__(self, folder, **config):
+        from app.extensions import db
+        from app.main import create_app
+        from app.models.user import SystemUser, UserRole
+        from app.utils.helper import issue_tokens_for_user
+        from app.utils.seed_load import generate
+
+        self.folder = folder
+        self.app = create_app(with_migrations=False, test_config={
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, 'smoke.db')}",
+            "RESPONSE_CACHE_STORAGE": f"sqlite:///{os.path.join(folder, 'smoke_kv.db')}",
+            "RATE_LIMIT_ENABLED": False,
+            "REQUEST_TIMING_LOG": False,
+            "PROFILER_ENABLED": False,
+            "AUDIT_MODE": "off",
+            "REPORT_JOBS_DIR": os.path.join(folder, "report_jobs"),
+            **config,
+        })
+        with self.app.app_context():
+            # Solo el bind por defecto: una Env anterior con réplica deja su metadata "replica" en db
+            db.create_all(bind_key=None)
+            generate(1, 1, date.today(), "LoadTest123!", echo=lambda *_: None)
+            admin = SystemUser.query.filter_by(rol=UserRole.COORDINATOR).order_by(SystemUser.id).first()
+            admin.rol = UserRole.ADMINISTRATOR
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {issue_tokens_for_user(admin)}"}
+        self.client = self.app.test_client()
+
+
+@check
+def session_attendance(env):
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.models.attendance import Attendance
+
+    with env.app.app_context():
+        session_id, total = db.session.execute(
+            select(Attendance.session_id, func.count()).group_by(Attendance.session_id).limit(1)
+        ).one()
+    response = env.client.get(f"/attendance/session/{session_id}", headers=env.headers)
+    assert response.status_code == 200, (response.status_code, response.get_data(as_text=True)[:300])
+    body = response.get_json()
+    assert body["stats"]["total"] == total == len(body["attendances"]), body["stats"]
+
+
+@check
+def report_events_gzip(env):
+    created = env.client.post("/attendance/reports/jobs", headers=env.headers, json={
+        "report": "attendance_detail", "format": "csv", "from": "2000-01-01", "to": "2100-12-31"})
+    assert created.status_code == 202, (created.status_code, created.get_json())
+    url = f"/attendance/reports/jobs/{created.get_json()['id']}/events"
+
+    previous, env.app.config["REPORT_JOBS_SSE_SECONDS"] = env.app.config["REPORT_JOBS_SSE_SECONDS"], 3
+    try:
+        started = time.perf_counter()
+        response = env.client.get(url, headers={**env.headers, "Accept-Encoding": "gzip"}, buffered=False)
+        received = b""
+        for chunk in response.response:
+            received += chunk
+            if b"event: status" in received:
+                break
+        elapsed = time.perf_counter() - started
+        response.close()
+    finally:
+        env.app.config["REPORT_JOBS_SSE_SECONDS"] = previous
+    assert "Content-Encoding" not in response.headers, response.headers
+    assert b"event: status" in received and b'"pending"' in received, received[:300]
+    assert elapsed < 1.5, f"primer evento a los {elapsed:.2f}s"
+
+
+@check
+def compression_stream(env):
+    import zlib
+    from werkzeug.test import Client
+    from werkzeug.wrappers import Request, Response
+    from app.utils.compression import CompressionMiddleware
+
+    @Request.application
+    def app(request):
+        if request.path == "/small":
+            return Response(b'{"ok": true}', mimetype="application/json")
+
+        def slow():
+            yield b'{"id": 1}\n'
+            time.sleep(1)
+            yield b'{"id": 2}\n'
+        return Response(slow(), mimetype="application/x-ndjson")
+
+    client = Client(CompressionMiddleware(app, min_size=1024))
+    started = time.perf_counter()
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    chunks = iter(response.response)
+    decompressor = zlib.decompressobj(31)
+    first = decompressor.decompress(next(chunks))
+    elapsed = time.perf_counter() - started
+    rest = first + b"".join(decompressor.decompress(chunk) for chunk in chunks) + decompressor.flush()
+    response.close()
+    assert response.headers.get("Content-Encoding") == "gzip", response.headers
+    assert first == b'{"id": 1}\n' and elapsed < 0.5, (first, f"{elapsed:.2f}s")
+    assert rest == b'{"id": 1}\n{"id": 2}\n', rest
+
+    for headers in ({}, {"Accept-Encoding": "gzip"}):
+        response = client.get("/small", headers=headers)
+        assert "Content-Encoding" not in response.headers, response.headers
+        assert response.headers.get("Vary") == "Accept-Encoding", (headers, response.headers)
+
+
+def _rate_limit_worker(path, barrier, results):
+    from app.utils.kv_store import create_store
+    from app.utils.rate_limit import SlidingWindowLimiter
+
+    limiter = SlidingWindowLimiter(create_store(f"sqlite:///{path}"))
+    barrier.wait()
+    results.put(limiter.hit([("ip:203.0.113.9", 10, 60)]) is None)
+
+
+@check
+def rate_limit_parallel(env):
+    import multiprocessing
+
+    context = multiprocessing.get_context("fork")
+    path = os.path.join(env.folder, f"ratelimit_{time.time_ns()}.db")
+    barrier, results = context.Barrier(16), context.Queue()
+    processes = [context.Process(target=_rate_limit_worker, args=(path, barrier, results)) for _ in range(16)]
+    for process in processes:
+        process.start()
+    allowed = sum(results.get(timeout=30) for _ in processes)
+    for process in processes:
+        process.join()
+    assert allowed == 10, f"{allowed} intentos permitidos con límite 10"
+
+
+def _replica_env(env):
+    """Otra Env con DATABASE_REPLICA_URL: una copia SQLite del primario recién sembrado."""
+    from app.extensions import db
+    from app.utils.db_routing import _copy
+
+    folder = tempfile.mkdtemp(dir=env.folder)
+    replica = os.path.join(folder, "replica.db")
+    env = Env(folder, SQLALCHEMY_DATABASE_REPLICA_URI=f"sqlite:///{replica}")
+    with env.app.app_context():
+        _copy(db.engine.url.database, replica)
+    return env
+
+
+@check
+def response_cache_replica(env):
+    from app.extensions import db
+    from app.models.workshops import Workshop
+    from app.utils.db_routing import STICKY_COOKIE
+
+    env = _replica_env(env)
+    with env.app.app_context():
+        # Escritura que la réplica aún no tiene: sube t:workshops
+        workshop = Workshop.query.order_by(Workshop.id).first()
+        workshop.name = name = f"Taller {time.time_ns()}"
+        db.session.commit()
+
+    for expected in ("MISS", "HIT"):
+        response = env.client.get("/workshops/", headers=env.headers)
+        assert response.status_code == 200, response.status_code
+        assert response.headers.get("X-Cache") == expected, (expected, response.headers)
+        assert name in response.get_data(as_text=True), f"{expected}: cuerpo con los datos atrasados de la réplica"
+
+    env.client.set_cookie(STICKY_COOKIE, f"{time.time() + 60:.3f}")
+    response = env.client.get("/workshops/", headers=env.headers)
+    assert response.status_code == 200 and "X-Cache" not in response.headers, response.headers
+    assert response.headers.get("X-DB-Route") == "primary", response.headers
+
+
+@check
+def audit_logs_replica(env):
+    from app.utils.db_routing import STICKY_COOKIE
+
+    env = _replica_env(env)
+    response = env.client.get("/audit/logs?limit=5", headers=env.headers)
+    assert response.status_code == 200, (response.status_code, response.get_data(as_text=True)[:300])
+    assert response.headers.get("X-DB-Route") == "replica", response.headers
+    assert STICKY_COOKIE not in response.headers.get("Set-Cookie", ""), response.headers
+
+
+@check
+def audit_partial_batch(env):
+    from datetime import datetime, timezone
+    from sqlalchemy import func, select
+    from app.extensions import db
+    from app.models.audit_logs import AuditLog
+    from app.utils.audit import _COLUMNS, AuditWriter
+
+    now = datetime.now(timezone.utc)
+    rows = [{**dict.fromkeys(_COLUMNS), "table_name": "system_users", "record_id": i, "action": "UPDATE",
+             "new_data": {"rol": "client"}, "created_at": now} for i in range(5)]
+    rows[2]["record_id"] = None  # NOT NULL: falla el lote entero y después solo esta fila
+    writer = AuditWriter()
+    writer.app, writer.backoff = env.app, 0.01
+    logger, handler = logging.getLogger("app.audit"), _Capture()
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        with env.app.app_context():
+            before = db.session.scalar(select(func.count()).select_from(AuditLog))
+            writer._write(rows)
+            after = db.session.scalar(select(func.count()).select_from(AuditLog))
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    assert (writer.written, writer.dropped) == (4, 1), writer.stats()
+    assert after - before == 4, (before, after)
+    dropped = [m for m in handler.messages if m.startswith("Registro de auditoría descartado")]
+    assert len(dropped) == 1 and "system_users id=None UPDATE" in dropped[0], handler.messages
+
+
+def _audit_rows(env, table_name, record_id):
+    from sqlalchemy import select
+    from app.extensions import db
+    from app.models.audit_logs import AuditLog
+
+    with env.app.app_context():
+        return db.session.execute(
+            select(AuditLog.action, AuditLog.user_id, AuditLog.old_data, AuditLog.new_data)
+            .where(AuditLog.table_name == table_name, AuditLog.record_id == record_id).order_by(AuditLog.id)
+        ).all()
+
+
+@check
+def audit_coverage(env):
+    from flask_jwt_extended import decode_token
+    from app.extensions import db
+    from app.models.audit_logs import AuditLog
+    from app.models.user import SystemUser, UserRole
+    from app.models.workshops import Workshop, WorkshopStatus
+
+    with env.app.app_context():
+        workshop = Workshop.query.filter(Workshop.status != WorkshopStatus.PAUSED).order_by(Workshop.id).first()
+        workshop_id, status = workshop.id, workshop.status.value
+        # Usuario sin inscripciones ni asistencias: el borrado definitivo no arrastra nada más
+        user = SystemUser(name="Borrar", last_name="Smoke", dni=f"SMOKE{time.time_ns()}", age="30",
+                          phone="+34600000000", birth_date=date(1990, 1, 1), rol=UserRole.CLIENT)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        # Un cambio hecho por ese usuario: su registro tiene que seguir diciendo quién fue tras el borrado
+        db.session.add(AuditLog(table_name="smoke", record_id=user_id, action="UPDATE", user_id=user_id))
+        db.session.commit()
+        admin_id = int(decode_token(env.headers["Authorization"].split()[1])["sub"])
+    previous, env.app.config["AUDIT_MODE"] = env.app.config["AUDIT_MODE"], "sync"
+    try:
+        response = env.client.put(f"/workshops/{workshop_id}", headers=env.headers, json={"status": "paused"})
+        assert response.status_code == 200, (response.status_code, response.get_json())
+        response = env.client.delete(f"/auth/admin/users/{user_id}?force=true", headers=env.headers)
+        assert response.status_code == 200, (response.status_code, response.get_json())
+    finally:
+        env.app.config["AUDIT_MODE"] = previous
+    rows = _audit_rows(env, "workshops", workshop_id)
+    assert [row.action for row in rows] == ["UPDATE"], rows
+    assert '"paused"' in rows[0].new_data and f'"{status}"' in rows[0].old_data, rows
+    rows = _audit_rows(env, "system_users", user_id)
+    assert [(row.action, row.user_id) for row in rows] == [("DELETE", admin_id)], rows
+    assert '"client"' in rows[0].old_data, rows
+    rows = _audit_rows(env, "smoke", user_id)
+    assert [row.user_id for row in rows] == [user_id], rows
+
+
+@check
+def export_formula_escape(env):
+    import csv
+    import io
+    from app.extensions import db
+    from app.models.attendance import Attendance
+    from app.models.sessions import Session
+
+    with env.app.app_context():
+        attendance = Attendance.query.order_by(Attendance.id).first()
+        attendance.observations = "=1+2"
+        workshop_id = db.session.get(Session, attendance.session_id).workshop_id
+        db.session.commit()
+    url = f"/attendance/reports/export?from=2000-01-01&to=2100-12-31&workshop_id={workshop_id}"
+
+    response = env.client.get(url + "&format=csv", headers=env.headers)
+    assert response.status_code == 200, response.status_code
+    cells = [cell for row in csv.reader(io.StringIO(response.get_data(as_text=True)), delimiter=";") for cell in row]
+    assert "'=1+2" in cells and "=1+2" not in cells, [c for c in cells if "1+2" in c]
+
+    from openpyxl import load_workbook
+    response = env.client.get(url + "&format=xlsx", headers=env.headers)
+    assert response.status_code == 200, response.status_code
+    sheet = load_workbook(io.BytesIO(response.get_data())).active
+    values = [cell for row in sheet.iter_rows(values_only=True) for cell in row]
+    assert "'=1+2" in values and "=1+2" not in values, [v for v in values if isinstance(v, str) and "1+2" in v]
+
+
+@check
+def export_statement_timeout(env):
+    from flask import g
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.routes.attendance.attendance import EXPORT_STATEMENT_TIMEOUT_MS
+
+    # El hook "begin" de db_pool solo emite SET LOCAL en PostgreSQL: aquí se mira qué valor vería
+    seen = []
+
+    def record(conn):
+        seen.append(g.get("statement_timeout_ms"))
+
+    event.listen(Engine, "begin", record)
+    try:
+        response = env.client.get("/attendance/reports/export?from=2000-01-01&to=2100-12-31&format=csv",
+                                  headers=env.headers)
+        response.get_data()
+    finally:
+        event.remove(Engine, "begin", record)
+    assert response.status_code == 200, response.status_code
+    assert seen and set(seen) == {EXPORT_STATEMENT_TIMEOUT_MS}, seen
+
+
+@check
+def seed_load_invalidation(env):
+    from app.utils.seed_load import generate
+
+    for expected in ("MISS", "HIT"):
+        before = env.client.get("/workshops/", headers=env.headers)
+    assert before.headers.get("X-Cache") == "HIT", before.headers
+    with env.app.app_context():
+        counts = generate(1, time.time_ns() % 10 ** 6, date.today(), "LoadTest123!", echo=lambda *_: None)
+    after = env.client.get("/workshops/", headers=env.headers)
+    assert after.headers.get("X-Cache") == "MISS", after.headers
+    added = len(after.get_json()["workshops"]) - len(before.get_json()["workshops"])
+    assert added == counts["workshops"], (added, counts)
+
+
+@check
+def reference_bump_create_all(env):
+    from app.extensions import db
+    from app.models.reference_versions import ReferenceVersion
+    from app.models.user import SystemUser
+
+    with env.app.app_context():
+        db.session.execute(db.delete(ReferenceVersion).where(ReferenceVersion.name == "css"))
+        db.session.commit()
+        user = SystemUser.query.filter(SystemUser.css_id.isnot(None)).order_by(SystemUser.id.desc()).first()
+        user_id, old_css = user.id, user.css_id
+
+    def totals():
+        response = env.client.get("/css/active", headers=env.headers)
+        assert response.status_code == 200, response.status_code
+        return {c["id"]: c["total_users"] for c in response.get_json()["css_centers"]}
+
+    before = totals()
+    new_css = next(css_id for css_id in before if css_id != old_css)
+    response = env.client.put(f"/auth/admin/user/{user_id}/css", json={"css_id": new_css}, headers=env.headers)
+    assert response.status_code == 200, (response.status_code, response.get_data(as_text=True)[:300])
+    after = totals()
+    assert after[new_css] == before[new_css] + 1, (before, after)
+    with env.app.app_context():
+        assert db.session.get(ReferenceVersion, "css") is not None
+
+
+def _diagnostics_worker(env):
+    from app.extensions import db
+
+    with env.app.app_context():
+        db.engine.dispose(close=False)
+    response = env.client.get("/workshops/", headers=env.headers)
+    os._exit(0 if response.status_code == 200 else 1)
+
+
+@check
+def query_diagnostics_processes(env):
+    import multiprocessing
+
+    folder = tempfile.mkdtemp(dir=env.folder)
+    log = os.path.join(folder, "logs", "query_diagnostics.jsonl")
+    env = Env(folder, QUERY_DIAGNOSTICS_ENABLED=True, QUERY_DIAGNOSTICS_LOG=log, SLOW_QUERY_MS=0,
+              RESPONSE_CACHE_ENABLED=False)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_diagnostics_worker, args=(env,)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0, process.exitcode
+
+    files = sorted(os.listdir(os.path.dirname(log)))
+    expected = {f"query_diagnostics.{process.pid}.jsonl" for process in processes}
+    assert expected <= set(files), files
+    lines = 0
+    for name in expected:
+        with open(os.path.join(os.path.dirname(log), name), "rb") as f:
+            lines += sum(1 for _ in f)
+    response = env.client.get("/diagnostics/queries?limit=200", headers=env.headers)
+    assert response.status_code == 200, response.status_code
+    # La propia petición a /diagnostics/queries también deja registros (en el fichero de este proceso)
+    offenders = [o for o in response.get_json()["offenders"] if o["route"] == "/workshops/"]
+    assert lines and sum(o["occurrences"] for o in offenders) == lines, (lines, offenders[:3])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("checks", nargs="*", help=f"por defecto todas: {', '.join(CHECKS)}")
+    args = parser.parse_args()
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        parser.error(f"comprobaciones desconocidas: {', '.join(sorted(unknown))}")
+
+    env = Env(tempfile.mkdtemp(prefix="sentya_smoke_"))
+    failed = 0
+    for name in args.checks or CHECKS:
+        try:
+            CHECKS[name](env)
+            print(f"ok      {name}")
+        except Exception:
+            failed += 1
+            print(f"FALLO   {name}")
+            traceback.print_exc()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Tiempo de arranque de un worker (import de app.wsgi) comparado con un presupuesto versionado.
+
+Lanza `python -X importtime -c "import app.wsgi"` varias veces en procesos nuevos y mide:
+  - import_ms:      importar los módulos de app.main (sin crear la app)
+  - create_app_ms:  create_app(with_migrations=False), incluye importar blueprints y servicios
+  - módulos prohibidos: dependencias pesadas que solo deben cargarse bajo demanda (qrcode, PIL, alembic...)
+Muestra los módulos con más tiempo acumulado y termina con exit 1 si se supera benchmarks/startup_budget.json.
+
+Uso (desde apps/backend):
+    python -m benchmarks.startup_budget --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app.main import create_app
+imported = time.perf_counter()
+create_app(with_migrations=False)
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def _run_probe():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _top_imports(stderr, limit):
+    # Formato: "import time: self [us] | cumulative | imported package" (la sangría indica el nivel)
+    # Nos quedamos con los paquetes raíz (sqlalchemy, flask...) donde se importaron por primera vez
+    rows = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name or name.startswith("app."):
+            rows[name] = max(rows.get(name, 0), int(cumulative))
+    return sorted(((us, name) for name, us in rows.items()), reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+
+    samples, stderr = [], ""
+    for _ in range(args.runs):
+        sample, stderr = _run_probe()
+        samples.append(sample)
+
+    print("Paquetes y módulos de la app con más tiempo acumulado (última ejecución):")
+    for cumulative, name in _top_imports(stderr, args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    print(f"\nMediana de {args.runs} ejecuciones:")
+    for key in ("import_ms", "create_app_ms"):
+        value = statistics.median(s[key] for s in samples)
+        ok = value <= budget[key]
+        failed |= not ok
+        print(f"  {key:<14} {value:8.1f} ms  (presupuesto {budget[key]} ms) {'OK' if ok else 'SUPERADO'}")
+
+    loaded = set(samples[-1]["modules"])
+    forbidden = [m for m in budget["forbidden_modules"] if m in loaded]
+    if forbidden:
+        failed = True
+        print(f"  módulos cargados al arrancar que deberían ser perezosos: {', '.join(forbidden)}")
+    else:
+        print(f"  sin módulos prohibidos ({', '.join(budget['forbidden_modules'])})")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
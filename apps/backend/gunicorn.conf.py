@@ -0,0 +1,53 @@
+# Configuración de gunicorn para producción:
+#   gunicorn -c gunicorn.conf.py app.wsgi:app
+# Todo se puede ajustar por variables de entorno (GUNICORN_WORKERS, GUNICORN_THREADS, PORT...).
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3001')}"
+workers = int(os.getenv("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+# La app se importa una sola vez en el maestro y los workers la heredan con fork (copy-on-write):
+# arrancan en milisegundos y comparten la memoria de módulos, modelos y caches de solo lectura.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# El pool de conexiones se dimensiona según los hilos de cada worker (ver app/utils/db_pool.py)
+os.environ.setdefault("DB_POOL_PROFILE", "threaded" if threads > 1 else "sync")
+os.environ.setdefault("DB_POOL_THREADS", str(threads))
+
+# Métricas Prometheus compartidas entre workers (ver app/utils/metrics.py). Tiene que estar definido
+# antes de importar la app; se vacía al arrancar para no arrastrar contadores de la ejecución anterior.
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "sentya-prometheus"))
+shutil.rmtree(prometheus_dir, ignore_errors=True)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Con preload_app el maestro pudo abrir conexiones al crear la app; un socket compartido entre
+    # procesos corrompe el protocolo, así que cada worker empieza con un pool vacío
+    # server.app.wsgi() es la app que sirve gunicorn (app.wsgi:app o la que se pase en la línea de comandos).
+    # Todos los engines: el primario y los binds (réplica de lectura con DATABASE_REPLICA_URL)
+    from app.extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Los gauges "livesum" dejan de contar al worker que terminó (max_requests, reinicios...)
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,35 @@
+"""token_version
+
+Revision ID: 09b5499cb593
+Revises: 85135ec61f52
+Create Date: 2026-10-19 17:52:03.771904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timezone
+
+
+# revision identifiers, used by Alembic.
+revision = '09b5499cb593'
+down_revision = '85135ec61f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('system_users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='1', nullable=False))
+
+    # Contador global: cambia con cualquier token_version (y con altas/bajas de usuarios)
+    reference_versions = sa.table('reference_versions',
+        sa.column('name', sa.String), sa.column('version', sa.Integer), sa.column('updated_at', sa.DateTime))
+    op.bulk_insert(reference_versions, [
+        {'name': 'system_users', 'version': 1, 'updated_at': datetime.now(timezone.utc)},
+    ])
+
+
+def downgrade():
+    op.execute("DELETE FROM reference_versions WHERE name = 'system_users'")
+    with op.batch_alter_table('system_users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,37 @@
+"""reference_versions
+
+Revision ID: 34d72fd0bfdc
+Revises: f300296e101f
+Create Date: 2026-10-19 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timezone
+
+
+# revision identifiers, used by Alembic.
+revision = '34d72fd0bfdc'
+down_revision = 'f300296e101f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    reference_versions = op.create_table('reference_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Un contador por cada conjunto de datos de referencia cacheado
+    now = datetime.now(timezone.utc)
+    op.bulk_insert(reference_versions, [
+        {'name': 'thematic_areas', 'version': 1, 'updated_at': now},
+        {'name': 'css', 'version': 1, 'updated_at': now},
+    ])
+
+
+def downgrade():
+    op.drop_table('reference_versions')
@@ -0,0 +1,125 @@
+"""audit_logs_partitions
+
+Revision ID: 85135ec61f52
+Revises: 34d72fd0bfdc
+Create Date: 2026-10-19 16:40:12.518377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import date
+
+
+# revision identifiers, used by Alembic.
+revision = '85135ec61f52'
+down_revision = '34d72fd0bfdc'
+branch_labels = None
+depends_on = None
+
+# Particiones mensuales que se crean por delante del mes actual (luego las mantiene `flask audit-partitions`)
+MONTHS_AHEAD = 3
+
+COLUMNS = ("id, table_name, record_id, action, old_data, new_data, user_id, ip_address, user_agent, "
+           "created_at, role_assigned_by, role_assignment_date, two_factor_last_used")
+
+
+def _add_month(day, n=1):
+    month = day.month - 1 + n
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_indexes():
+    # "¿quién cambió el rol de este usuario?" -> (table_name, record_id); actividad de un usuario -> (user_id)
+    op.create_index('ix_audit_logs_record', 'audit_logs', ['table_name', 'record_id', 'created_at'])
+    op.create_index('ix_audit_logs_user', 'audit_logs', ['user_id', 'created_at'])
+    op.create_index('ix_audit_logs_created_at', 'audit_logs', ['created_at'])
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite y otros: sin particionado nativo, se rotan tablas mensuales con `flask audit-partitions`
+        _create_indexes()
+        return
+
+    # Postgres: audit_logs pasa a estar particionada por mes (RANGE sobre created_at).
+    # La PK tiene que incluir la clave de partición; la secuencia del id se reutiliza.
+    # user_id sin FK: la auditoría se conserva aunque se borre el usuario (ver c2d8e5a1f734)
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            table_name VARCHAR(50) NOT NULL,
+            record_id INTEGER NOT NULL,
+            action VARCHAR(20) NOT NULL,
+            old_data TEXT,
+            new_data TEXT,
+            user_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            role_assigned_by INTEGER,
+            role_assignment_date TIMESTAMP WITHOUT TIME ZONE,
+            two_factor_last_used TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    # Red de seguridad: lo que no cae en ninguna partición mensual (fechas raras, partición aún no creada)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+    month = date.today().replace(day=1)
+    if oldest is not None:
+        month = min(month, oldest.date().replace(day=1))
+    last = _add_month(date.today().replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(f"CREATE TABLE audit_logs_p{month:%Y%m} PARTITION OF audit_logs "
+                   f"FOR VALUES FROM ('{month}') TO ('{_add_month(month)}')")
+        month = _add_month(month)
+
+    # Índices sobre la tabla padre: Postgres los crea en cada partición (y en las futuras)
+    _create_indexes()
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_legacy")
+    op.execute("DROP TABLE audit_logs_legacy")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.drop_index('ix_audit_logs_created_at', table_name='audit_logs')
+        op.drop_index('ix_audit_logs_user', table_name='audit_logs')
+        op.drop_index('ix_audit_logs_record', table_name='audit_logs')
+        return
+
+    # Vuelta a una tabla normal con todo lo que quede en las particiones (las archivadas ya no están)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("ALTER INDEX ix_audit_logs_record RENAME TO ix_audit_logs_partitioned_record")
+    op.execute("ALTER INDEX ix_audit_logs_user RENAME TO ix_audit_logs_partitioned_user")
+    op.execute("ALTER INDEX ix_audit_logs_created_at RENAME TO ix_audit_logs_partitioned_created_at")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            table_name VARCHAR(50) NOT NULL,
+            record_id INTEGER NOT NULL,
+            action VARCHAR(20) NOT NULL,
+            old_data TEXT,
+            new_data TEXT,
+            user_id INTEGER REFERENCES system_users (id),
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            role_assigned_by INTEGER,
+            role_assignment_date TIMESTAMP WITHOUT TIME ZONE,
+            two_factor_last_used TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
@@ -0,0 +1,55 @@
+"""report_jobs
+
+Revision ID: b7c41e9a2f03
+Revises: 09b5499cb593
+Create Date: 2026-10-19 19:40:12.518730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c41e9a2f03'
+down_revision = '09b5499cb593'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('data_version', sa.String(length=40), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='reportjobstatus'), nullable=False),
+    sa.Column('cached', sa.Boolean(), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('rows', sa.Integer(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by'], ['system_users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_report_jobs_status', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_report_jobs_cache_key', ['cache_key'], unique=False)
+        batch_op.create_index('ix_report_jobs_requested_by', ['requested_by', 'created_at'], unique=False)
+
+    # La versión de los datos de los informes usa MAX(recorded_at): sin índice sería un recorrido completo
+    with op.batch_alter_table('attendances', schema=None) as batch_op:
+        batch_op.create_index('ix_attendances_recorded_at', ['recorded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendances', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendances_recorded_at')
+    op.drop_table('report_jobs')
+    sa.Enum(name='reportjobstatus').drop(op.get_bind(), checkfirst=True)
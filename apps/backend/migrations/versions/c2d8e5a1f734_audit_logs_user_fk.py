@@ -0,0 +1,54 @@
+"""audit_logs_user_fk
+
+Revision ID: c2d8e5a1f734
+Revises: b7c41e9a2f03
+Create Date: 2026-10-19 20:15:36.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8e5a1f734'
+down_revision = 'b7c41e9a2f03'
+branch_labels = None
+depends_on = None
+
+# audit_logs.user_id deja de ser FK: el historial tiene que sobrevivir al borrado definitivo del usuario que hizo
+# los cambios (con la FK había que vaciar user_id o impedir el borrado). En SQLite la FK no tiene nombre y el
+# batch la reconoce con esta convención
+NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _user_fks(bind):
+    return [fk for fk in sa.inspect(bind).get_foreign_keys('audit_logs')
+            if fk['referred_table'] == 'system_users' and fk['constrained_columns'] == ['user_id']]
+
+
+def upgrade():
+    bind = op.get_bind()
+    fks = _user_fks(bind)
+    if not fks:
+        return
+    if bind.dialect.name == 'sqlite':
+        with op.batch_alter_table('audit_logs', naming_convention=NAMING) as batch_op:
+            batch_op.drop_constraint(fks[0]['name'] or 'fk_audit_logs_user_id_system_users', type_='foreignkey')
+        return
+    # Postgres: en la tabla padre particionada; se borra también en todas las particiones
+    for fk in fks:
+        op.drop_constraint(fk['name'], 'audit_logs', type_='foreignkey')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _user_fks(bind):
+        return
+    # Los registros de usuarios ya borrados no cumplirían la FK
+    op.execute("UPDATE audit_logs SET user_id = NULL WHERE user_id IS NOT NULL "
+               "AND user_id NOT IN (SELECT id FROM system_users)")
+    if bind.dialect.name == 'sqlite':
+        with op.batch_alter_table('audit_logs', naming_convention=NAMING) as batch_op:
+            batch_op.create_foreign_key('fk_audit_logs_user_id_system_users', 'system_users', ['user_id'], ['id'])
+        return
+    op.create_foreign_key('audit_logs_user_id_fkey', 'audit_logs', 'system_users', ['user_id'], ['id'])
@@ -120,10 +120,10 @@ export const useDashboard = (role, userId, cssId = null) => {
 
     const loadProfessionalDashboard = useCallback(async () => {
         try {
-            const [scheduleResponse, attendanceResponse] = await Promise.all([
-                apiService.getMySchedule(),
-                apiService.getMyWorkshopsAttendance()
-            ]);
+            // Una sola petición: /dashboard devuelve el mismo JSON que /sessions/schedule y /attendance/my-workshops
+            const dashboard = await apiService.getDashboard(['sessions', 'attendance']);
+            const scheduleResponse = dashboard.sessions || {};
+            const attendanceResponse = dashboard.attendance || {};
 
             const scheduleStats = scheduleResponse.stats || {};
             const attendanceStats = attendanceResponse.stats || {};
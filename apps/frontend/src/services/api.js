@@ -545,6 +545,26 @@ async getMySchedule() {
   });
 }
 
+/**
+ * Obtener el dashboard del usuario en una sola petición
+ * @param {string[]} sections - me, workshops, sessions, attendance, thematic_areas, css (vacío: todas las del rol)
+ * @param {Object} fields - campos por sección, ej: { workshops: ['id', 'name'] }
+ */
+async getDashboard(sections = [], fields = {}) {
+  const params = new URLSearchParams();
+  if (sections.length) {
+    params.append('sections', sections.join(','));
+  }
+  Object.entries(fields).forEach(([section, names]) => {
+    params.append(`fields[${section}]`, names.join(','));
+  });
+
+  const queryString = params.toString();
+  return this.request(`/dashboard${queryString ? `?${queryString}` : ''}`, {
+    method: 'GET'
+  });
+}
+
 // Obtener usuarios de un centro de servicio social 
 
 async getActiveCSSCenters(){